@@ -1,11 +1,19 @@
 from django.contrib import admin
-from .models import Book
+from .models import Author, Book
 
 # Register your models here.
 
 @admin.register(Book)
 class BookAdmin(admin.ModelAdmin):
     list_display = ['title', 'author', 'publication_year']
-    list_filter = ['publication_year', 'author']
-    search_fields = ['title', 'author']
+    # Filter on the indexed author id rather than the text column
+    list_filter = ['publication_year', 'author_ref']
+    search_fields = ['title', 'author_ref__name']
     ordering = ['title']
+    # Set from author on save
+    readonly_fields = ['author_ref']
+
+@admin.register(Author)
+class AuthorAdmin(admin.ModelAdmin):
+    search_fields = ['name']
+    ordering = ['name']
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bookshelf.authors import backfill_authors, verify_authors
+from bookshelf.models import Author, Book
+
+
+class Command(BaseCommand):
+    """
+    Link every Book to the Author of its author name, in batches.
+
+    Each batch is a short transaction, so the command can run while the
+    site is up, be interrupted and run again; new writes set author_ref
+    themselves (see bookshelf.models.Book). --sleep pauses between
+    batches to leave the database some headroom.
+
+    --verify then checks that every book is linked to an author of the
+    same name, and fails otherwise.
+
+    Usage:
+        python manage.py backfill_book_authors --batch-size 5000 --sleep 0.1
+        python manage.py backfill_book_authors --verify
+    """
+    help = 'Backfill Book.author_ref from the author names, then optionally verify it.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Books per transaction.')
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to wait between batches.')
+        parser.add_argument('--verify', action='store_true', help='Check every book once the backfill is done.')
+
+    def handle(self, *args, **options):
+        total = 0
+        start = time.perf_counter()
+        for last_pk, read, linked in backfill_authors(Book, Author, options['batch_size']):
+            total += linked
+            self.stdout.write('Linked %d of %d books up to pk %d (%d in total)' % (linked, read, last_pk, total))
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(
+            'Linked %d books in %.1fs.' % (total, time.perf_counter() - start)
+        ))
+
+        if options['verify']:
+            unlinked, mismatched = verify_authors(Book)
+            if unlinked or mismatched:
+                raise CommandError('%d books have no author_ref and %d an author_ref with another name.' % (
+                    unlinked, mismatched,
+                ))
+            self.stdout.write(self.style.SUCCESS('Every book is linked to its author.'))
@@ -1,14 +1,84 @@
 from django.db import models
 
+from .authors import resolve_authors
+
 # Create your models here.
 
+class AuthorQuerySet(models.QuerySet):
+    def resolve(self, names):
+        """Return {name: pk} for names, creating the missing authors."""
+        return resolve_authors(self.model, names)
+
+class Author(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    objects = AuthorQuerySet.as_manager()
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ['name']
+
+class BookQuerySet(models.QuerySet):
+    # Dual write: bulk inserts and updates of the author name also set author_ref
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        pks = Author.objects.resolve({book.author for book in objs})
+        for book in objs:
+            book.author_ref_id = pks[book.author]
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if 'author' in fields and 'author_ref' not in fields:
+            objs = list(objs)
+            pks = Author.objects.resolve({book.author for book in objs})
+            for book in objs:
+                book.author_ref_id = pks[book.author]
+            fields = [*fields, 'author_ref']
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs):
+        if isinstance(kwargs.get('author'), str) and 'author_ref' not in kwargs:
+            kwargs['author_ref'] = Author.objects.resolve([kwargs['author']])[kwargs['author']]
+        return super().update(**kwargs)
+
 class Book(models.Model):
+    """
+    A book; its author is being moved from the author text column to the
+    Author table.
+
+    Every write through the ORM sets author_ref from author (save(),
+    bulk_create(), bulk_update() and update(author=...)), and the
+    backfill_book_authors command links the rows written before. Once it verifies clean, author
+    can be dropped and author_ref renamed to author: its column already
+    is author_id.
+    """
     title = models.CharField(max_length=200)
     author = models.CharField(max_length=100)
+    author_ref = models.ForeignKey(Author, models.PROTECT, null=True, blank=True, db_column='author_id',
+                                   related_name='books', verbose_name='author')
     publication_year = models.IntegerField()
+
+    objects = BookQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.title} by {self.author} ({self.publication_year})"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_author = instance.__dict__.get('author')
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.author_ref_id is None or getattr(self, '_loaded_author', None) != self.author:
+            self.author_ref_id = Author.objects.resolve([self.author])[self.author]
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'author_ref'}
+        super().save(*args, **kwargs)
+        self._loaded_author = self.author
     
     class Meta:
         ordering = ['title']
@@ -50,13 +50,16 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.instrumentation.RequestMetricsMiddleware',
+    'api.nplusone.NPlusOneMiddleware',
 ]
 
 ROOT_URLCONF = 'advanced_api_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'api.instrumentation.TimedDjangoTemplates',
+        'NAME': 'django',  # The alias would otherwise follow the backend's module name
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -124,6 +127,39 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Caching
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Shared by all server processes and the request_metrics command
+    'request-metrics': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.request_metrics',
+    },
+}
+
+# Response cache for the Book API (see api/cache.py); a timeout of 0 disables it.
+# The local-memory default cache only suits a single process (runserver): with
+# several workers, point the alias at a shared backend such as Redis or the
+# database cache, or writes in one worker leave stale pages in the others
+API_RESPONSE_CACHE_ALIAS = 'default'
+API_RESPONSE_CACHE_TIMEOUT = 300
+
+# Per-request timings and per-view histograms (see api/instrumentation.py);
+# a sample rate of 0.0 turns the measurements off
+REQUEST_METRICS_SAMPLE_RATE = 0.0
+REQUEST_METRICS_SERVER_TIMING = True
+REQUEST_METRICS_CACHE_ALIAS = 'request-metrics'
+REQUEST_METRICS_FLUSH_INTERVAL = 10
+
+# N+1 query detection (see api/nplusone.py): logged during development,
+# raised in tests using NPlusOneTestMixin, off otherwise
+NPLUSONE_ACTION = 'log' if DEBUG else None
+NPLUSONE_THRESHOLD = 2
+
 REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def normalize_query_params(request):
+    """Return the query string as a sorted list of (name, value) pairs."""
+    return sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+
+
+class ResponseCache:
+    """
+    Cache of serialized API responses with per-model generation counters.
+
+    Every model a cached response depends on has a generation counter stored
+    in the cache. The counters are part of each response's cache key, so
+    bumping a model's generation (done by the post_save/post_delete receivers
+    in api.signals, once the write commits) makes every response built from
+    that model unreachable at once, without touching responses that depend
+    only on other models.
+    Stale entries are never read again and simply expire.
+
+    Keys:
+    - The host and path, so /books/ and /books/<pk>/ are separate entries
+      and absolute pagination links stay correct
+    - The query string, normalized by sorting parameters and their values,
+      so ?ordering=title&search=x and ?search=x&ordering=title share an entry
+    - The current generation of every dependency
+
+    Settings:
+    - API_RESPONSE_CACHE_ALIAS: cache alias to use (default 'default'). With
+      more than one server process it must be a shared backend (Redis,
+      Memcached, database or file cache): a local-memory cache keeps
+      generations per process, so a write bumps only the generation of the
+      process that made it and the others keep serving stale responses
+      until they expire. Local memory is only fit for a single process,
+      e.g. runserver or tests
+    - API_RESPONSE_CACHE_TIMEOUT: seconds to keep a response (default 300);
+      0 disables response caching
+
+    Statistics:
+    - Hits and misses are counted in the same cache, so they are shared by
+      all processes using a shared backend; see stats()
+    """
+    key_prefix = 'api:response-cache'
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'API_RESPONSE_CACHE_ALIAS', 'default')]
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'API_RESPONSE_CACHE_TIMEOUT', 300)
+
+    @property
+    def enabled(self):
+        return bool(self.timeout)
+
+    def generation_key(self, model):
+        return '%s:generation:%s' % (self.key_prefix, model._meta.label_lower)
+
+    def new_generation(self):
+        # Start from the clock rather than 1 so that a counter evicted from
+        # the cache can never come back at a value used by older entries.
+        return time.time_ns()
+
+    def get_generations(self, models):
+        keys = [self.generation_key(model) for model in models]
+        generations = self.cache.get_many(keys)
+        for key in keys:
+            if key not in generations:
+                self.cache.add(key, self.new_generation(), timeout=None)
+                generations[key] = self.cache.get(key)
+        return [generations[key] for key in keys]
+
+    def invalidate(self, model):
+        """Bump the generation of model, orphaning every response that used it."""
+        key = self.generation_key(model)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, self.new_generation(), timeout=None)
+
+    def make_key(self, request, models):
+        signature = json.dumps(
+            [request.get_host(), request.path, normalize_query_params(request), self.get_generations(models)],
+            separators=(',', ':'),
+        )
+        return '%s:%s' % (self.key_prefix, hashlib.sha256(signature.encode('utf-8')).hexdigest())
+
+    def get(self, key):
+        data = self.cache.get(key)
+        self.count('hits' if data is not None else 'misses')
+        return data
+
+    def set(self, key, data):
+        self.cache.set(key, data, timeout=self.timeout)
+
+    def count(self, name):
+        key = '%s:%s' % (self.key_prefix, name)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            if not self.cache.add(key, 1, timeout=None):
+                self.cache.incr(key)
+
+    def stats(self):
+        counters = self.cache.get_many(['%s:hits' % self.key_prefix, '%s:misses' % self.key_prefix])
+        hits = counters.get('%s:hits' % self.key_prefix, 0)
+        misses = counters.get('%s:misses' % self.key_prefix, 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / total if total else None,
+        }
+
+    def reset_stats(self):
+        self.cache.delete_many(['%s:hits' % self.key_prefix, '%s:misses' % self.key_prefix])
+
+
+response_cache = ResponseCache()
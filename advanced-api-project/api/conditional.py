@@ -0,0 +1,56 @@
+import hashlib
+import json
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The resource has changed since it was last fetched.'
+    default_code = 'precondition_failed'
+
+
+def make_etag(*parts):
+    """Return a strong, quoted ETag hashed from JSON-serializable parts."""
+    signature = json.dumps(parts, separators=(',', ':'), default=str)
+    return '"%s"' % hashlib.sha256(signature.encode('utf-8')).hexdigest()[:32]
+
+
+def validator_headers(etag, last_modified):
+    """ETag and Last-Modified response headers for the given validators."""
+    headers = {}
+    if etag:
+        headers['ETag'] = etag
+    if last_modified:
+        headers['Last-Modified'] = http_date(last_modified.timestamp())
+    return headers
+
+
+def set_headers(response, headers):
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+def evaluate_preconditions(request, etag=None, last_modified=None):
+    """
+    Evaluate If-Match, If-None-Match, If-Modified-Since and If-Unmodified-Since.
+
+    Returns a 304 Response when a GET/HEAD can be answered from the client's
+    copy, raises PreconditionFailed (412) when a precondition does not hold,
+    and returns None when the request should be processed normally.
+    """
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is None:
+        return None
+    if response.status_code == status.HTTP_412_PRECONDITION_FAILED:
+        raise PreconditionFailed()
+    return Response(status=status.HTTP_304_NOT_MODIFIED)
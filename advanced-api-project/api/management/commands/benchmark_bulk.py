@@ -0,0 +1,67 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import Author, Book
+from api.views import BookBulk, BookListCreate
+
+
+class Command(BaseCommand):
+    """
+    Compare ingestion throughput of the single-row POST /books/ endpoint with
+    the bulk POST /books/bulk/ endpoint.
+
+    Runs inside a transaction that is rolled back, so no rows are left behind.
+
+    Usage:
+        python manage.py benchmark_bulk --rows 5000 --batch-size 500
+    """
+    help = 'Benchmark single-row vs. bulk book creation.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Books to create with each endpoint.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per bulk INSERT.')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        factory = APIRequestFactory()
+
+        with transaction.atomic():
+            user = User.objects.create(username='benchmark-bulk-user')
+            authors = Author.objects.bulk_create([Author(name='Author %d' % n) for n in range(100)])
+            payload = [
+                {'title': 'Book %07d' % n, 'publication_year': 1900 + n % 120, 'author': authors[n % 100].pk}
+                for n in range(rows)
+            ]
+
+            single_view = BookListCreate.as_view()
+            start = time.perf_counter()
+            for row in payload:
+                request = factory.post('/api/books/', row, format='json', HTTP_HOST='localhost')
+                force_authenticate(request, user=user)
+                single_view(request).render()
+            single = time.perf_counter() - start
+
+            bulk_view = BookBulk.as_view()
+            request = factory.post(
+                '/api/books/bulk/?batch_size=%d' % options['batch_size'], payload, format='json',
+                HTTP_HOST='localhost',
+            )
+            force_authenticate(request, user=user)
+            start = time.perf_counter()
+            response = bulk_view(request)
+            response.render()
+            bulk = time.perf_counter() - start
+
+            assert response.status_code == 201, response.data
+            assert Book.objects.count() == rows * 2
+
+            self.stdout.write('%-22s %12s %12s' % ('endpoint', 'seconds', 'rows/sec'))
+            self.stdout.write('%-22s %12.3f %12.0f' % ('POST /books/', single, rows / single))
+            self.stdout.write('%-22s %12.3f %12.0f' % ('POST /books/bulk/', bulk, rows / bulk))
+            self.stdout.write('speedup: %.1fx' % (single / bulk))
+
+            transaction.set_rollback(True)
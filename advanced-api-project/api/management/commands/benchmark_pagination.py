@@ -0,0 +1,100 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.test import APIRequestFactory
+
+from api.models import Author, Book
+from api.pagination import KeysetPagination
+from api.views import BookListCreate
+
+
+class OffsetBookListCreate(BookListCreate):
+    """BookListCreate with classic LIMIT/OFFSET pagination, for comparison."""
+    pagination_class = LimitOffsetPagination
+
+
+class Command(BaseCommand):
+    """
+    Compare keyset pagination against offset pagination at deep pages.
+
+    Seeds a synthetic catalog inside a transaction that is rolled back at the
+    end, so the benchmark never leaves rows behind in the database.
+
+    Usage:
+        python manage.py benchmark_pagination --books 200000 --page-size 50
+    """
+    help = 'Benchmark keyset vs. offset pagination on the Book list endpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=100000, help='Number of books to seed.')
+        parser.add_argument('--page-size', type=int, default=50, help='Rows per page.')
+        parser.add_argument('--repeat', type=int, default=5, help='Requests per measurement.')
+        parser.add_argument(
+            '--depths', type=int, nargs='+', default=None,
+            help='Row offsets to measure (default: 0, 1%%, 10%%, 50%% and 90%% of --books).',
+        )
+
+    # Measure the views themselves, not the response cache
+    @override_settings(API_RESPONSE_CACHE_TIMEOUT=0)
+    def handle(self, *args, **options):
+        books = options['books']
+        page_size = options['page_size']
+        repeat = options['repeat']
+        depths = options['depths'] or sorted({0, books // 100, books // 10, books // 2, books * 9 // 10})
+
+        factory = APIRequestFactory()
+        keyset_view = BookListCreate.as_view()
+        offset_view = OffsetBookListCreate.as_view()
+
+        with transaction.atomic():
+            self.seed(books)
+
+            self.stdout.write('%10s %14s %14s' % ('depth', 'offset (ms)', 'keyset (ms)'))
+            for depth in depths:
+                offset_params = {'limit': page_size, 'offset': depth}
+                keyset_params = {'page_size': page_size}
+                if depth:
+                    keyset_params['cursor'] = self.cursor_at(depth - 1)
+
+                offset_ms = self.measure(offset_view, factory, offset_params, repeat)
+                keyset_ms = self.measure(keyset_view, factory, keyset_params, repeat)
+                self.stdout.write('%10d %14.2f %14.2f' % (depth, offset_ms, keyset_ms))
+
+            transaction.set_rollback(True)
+
+    def seed(self, count):
+        authors = Author.objects.bulk_create(
+            [Author(name='Author %d' % index) for index in range(max(count // 50, 1))]
+        )
+        Book.objects.bulk_create(
+            (
+                Book(
+                    title='Book %07d' % index,
+                    publication_year=1900 + index % 120,
+                    author=authors[index % len(authors)],
+                )
+                for index in range(count)
+            ),
+            batch_size=5000,
+        )
+
+    def cursor_at(self, index):
+        """Build the cursor a client would hold after reading row ``index``."""
+        position = list(
+            Book.objects.order_by('publication_year', 'title', 'id')
+            .values_list('publication_year', 'title', 'id')[index]
+        )
+        return KeysetPagination.encode_position(position)
+
+    def measure(self, view, factory, params, repeat):
+        timings = []
+        for _ in range(repeat):
+            request = factory.get('/api/books/', params, HTTP_HOST='localhost')
+            start = time.perf_counter()
+            response = view(request)
+            response.render()
+            timings.append(time.perf_counter() - start)
+        return min(timings) * 1000
@@ -0,0 +1,96 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+
+from api.models import Author, Book
+from api.search import SQLiteFTS5SearchBackend
+from api.views import BookListCreate
+
+
+class LikeBookListCreate(BookListCreate):
+    """BookListCreate with the full-text backend disabled, i.e. plain LIKE search."""
+
+    class search_backend(SQLiteFTS5SearchBackend):
+        def is_available(self, using):
+            return False
+
+
+class Command(BaseCommand):
+    """
+    Compare ?search= latency of the LIKE-based SearchFilter with the FTS5 index.
+
+    Seeds a synthetic catalog (1,000,000 books by default) inside a transaction
+    that is rolled back afterwards, so no rows are left behind. The FTS table
+    is filled by the insert triggers, so seeding also measures index upkeep.
+
+    Usage:
+        python manage.py benchmark_search --books 1000000 --repeat 5
+    """
+    help = 'Benchmark LIKE vs. FTS5 book search over a synthetic catalog.'
+
+    words = [
+        'river', 'shadow', 'garden', 'winter', 'silver', 'empire', 'forest', 'dragon', 'harbor', 'mirror',
+        'season', 'stone', 'voyage', 'letter', 'orchard', 'lantern', 'tempest', 'meadow', 'citadel', 'ember',
+    ]
+    terms = ['Lantern', 'citadel ember', 'Author 4242', 'xyzzy']
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=1000000, help='Number of synthetic books.')
+        parser.add_argument('--authors', type=int, default=10000, help='Number of synthetic authors.')
+        parser.add_argument('--repeat', type=int, default=5, help='Requests per search term and backend.')
+
+    # Measure the views themselves, not the response cache
+    @override_settings(API_RESPONSE_CACHE_TIMEOUT=0)
+    def handle(self, *args, **options):
+        if not SQLiteFTS5SearchBackend().is_available('default'):
+            raise CommandError('The api_book_fts table is missing; run migrate on an SQLite database with FTS5.')
+
+        with transaction.atomic():
+            start = time.perf_counter()
+            self.seed(options['books'], options['authors'])
+            self.stdout.write('seeded %d books in %.1fs' % (options['books'], time.perf_counter() - start))
+
+            self.stdout.write('%-16s %8s %12s %12s %9s' % ('term', 'rows', 'LIKE ms', 'FTS5 ms', 'speedup'))
+            for term in self.terms:
+                like, like_ids = self.time_search(LikeBookListCreate, term, options['repeat'])
+                fts, fts_ids = self.time_search(BookListCreate, term, options['repeat'])
+                # Pages are ordered differently (relevance vs. Meta.ordering), so only
+                # compare them when the whole result set fits on one page.
+                if len(like_ids) < 50:
+                    assert like_ids == fts_ids, term
+                self.stdout.write('%-16s %8d %12.1f %12.1f %8.1fx' % (
+                    term, len(fts_ids), like * 1000, fts * 1000, like / fts,
+                ))
+
+            transaction.set_rollback(True)
+
+    def seed(self, books, authors, batch_size=10000):
+        rng = random.Random(0)
+        author_objs = Author.objects.bulk_create(
+            [Author(name='Author %d' % n) for n in range(authors)], batch_size=batch_size,
+        )
+        for offset in range(0, books, batch_size):
+            Book.objects.bulk_create([
+                Book(
+                    title='%s %s %d' % (rng.choice(self.words).title(), rng.choice(self.words), n),
+                    publication_year=1900 + n % 120,
+                    author=author_objs[n % authors],
+                )
+                for n in range(offset, min(offset + batch_size, books))
+            ], batch_size=batch_size)
+
+    def time_search(self, view_class, term, repeat):
+        """Return the median seconds per first-page request and the page's book ids."""
+        factory = APIRequestFactory()
+        view = view_class.as_view()
+        timings = []
+        for _ in range(repeat):
+            request = factory.get('/api/books/', {'search': term, 'page_size': 50}, HTTP_HOST='localhost')
+            start = time.perf_counter()
+            response = view(request).render()
+            timings.append(time.perf_counter() - start)
+        return sorted(timings)[len(timings) // 2], {book['id'] for book in response.data['results']}
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework import serializers
+
+from api.models import Author, Book
+from api.serializers import BookSerializer
+
+
+class Command(BaseCommand):
+    """
+    Measure rows/sec of the per-field ModelSerializer path against the
+    values_list() fast path used by BookSerializer(many=True).
+
+    Each size is seeded inside a transaction that is rolled back afterwards.
+
+    Usage:
+        python manage.py benchmark_serializers --sizes 1000 10000 100000
+    """
+    help = 'Benchmark per-field vs. values_list() serialization of Book lists.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is reported).')
+
+    def handle(self, *args, **options):
+        self.stdout.write('%10s %18s %18s %9s' % ('books', 'per-field rows/s', 'fast path rows/s', 'speedup'))
+        for size in options['sizes']:
+            with transaction.atomic():
+                self.seed(size)
+                slow = self.measure(self.serialize_per_field, size, options['repeat'])
+                fast = self.measure(self.serialize_fast, size, options['repeat'])
+                self.stdout.write('%10d %18.0f %18.0f %8.1fx' % (size, slow, fast, fast / slow))
+                transaction.set_rollback(True)
+
+    def seed(self, count):
+        author = Author.objects.create(name='Benchmark Author')
+        Book.objects.bulk_create(
+            (Book(title='Book %07d' % index, publication_year=1900 + index % 120, author=author)
+             for index in range(count)),
+            batch_size=5000,
+        )
+
+    def serialize_per_field(self):
+        return serializers.ListSerializer(child=BookSerializer(), instance=Book.objects.all()).data
+
+    def serialize_fast(self):
+        return BookSerializer(Book.objects.all(), many=True).data
+
+    def measure(self, serialize, size, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            serialize()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return size / best
@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory
+
+from api.models import Author, Book
+from api.views import BookListCreate
+
+
+class Command(BaseCommand):
+    """
+    Compare payload size, latency and selected columns of the book list for
+    full, sparse (?fields=) and expanded (?expand=author) responses.
+
+    Books are seeded inside a transaction that is rolled back afterwards.
+
+    Usage:
+        python manage.py benchmark_sparse_fields --books 20000 --page-size 1000
+    """
+    help = 'Benchmark ?fields= and ?expand= on the book list.'
+
+    variants = [
+        ('full', {}),
+        ('fields=id,title', {'fields': 'id,title'}),
+        ('fields=id', {'fields': 'id'}),
+        ('expand=author', {'expand': 'author'}),
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=20000, help='Number of synthetic books.')
+        parser.add_argument('--page-size', type=int, default=0,
+                            help='?page_size= of each request; 0 requests the unpaginated list.')
+        parser.add_argument('--repeat', type=int, default=5, help='Requests per variant (median is reported).')
+
+    # Measure the views themselves, not the response cache
+    @override_settings(API_RESPONSE_CACHE_TIMEOUT=0)
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['books'])
+
+            self.stdout.write('%-18s %12s %10s %10s %9s' % ('variant', 'bytes', 'ms', 'columns', 'queries'))
+            for label, params in self.variants:
+                if options['page_size']:
+                    params = dict(params, page_size=options['page_size'])
+                size, elapsed, columns, queries = self.measure(params, options['repeat'])
+                self.stdout.write('%-18s %12d %10.1f %10d %9d' % (label, size, elapsed * 1000, columns, queries))
+
+            transaction.set_rollback(True)
+
+    def seed(self, count, batch_size=5000):
+        authors = Author.objects.bulk_create([Author(name='Author %d' % n) for n in range(max(count // 10, 1))])
+        for offset in range(0, count, batch_size):
+            Book.objects.bulk_create([
+                Book(title='Book %07d' % n, publication_year=1900 + n % 120, author=authors[n % len(authors)])
+                for n in range(offset, min(offset + batch_size, count))
+            ])
+
+    def measure(self, params, repeat):
+        """Return bytes, median seconds, selected columns of the row query and query count."""
+        factory = APIRequestFactory()
+        view = BookListCreate.as_view()
+        timings = []
+        for _ in range(repeat):
+            request = factory.get('/api/books/', params, HTTP_HOST='localhost')
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = view(request).render()
+                timings.append(time.perf_counter() - start)
+        row_sql = [query['sql'] for query in context.captured_queries if 'COUNT' not in query['sql']][-1]
+        columns = row_sql.split(' FROM ')[0].count(',') + 1
+        return len(response.content), sorted(timings)[len(timings) // 2], columns, len(context.captured_queries)
@@ -0,0 +1,123 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory
+
+from api.models import Author, Book
+from api.pagination import KeysetPagination
+from api.views import AuthorList, BookListCreate, BookRetrieveUpdateDestroy
+
+
+class Command(BaseCommand):
+    """
+    Run EXPLAIN QUERY PLAN on the queries issued by representative API requests.
+
+    Every SELECT executed while serving the requests below is explained. Any
+    plan step that scans a whole table ("SCAN api_book" without "USING INDEX")
+    is an error and makes the command exit with status 1, so index regressions
+    are caught in CI before deploy. Sorts that need a temporary B-tree are
+    reported as warnings.
+
+    ?search= is checked against the FTS5 index; the virtual table lookup shows
+    up as "SCAN api_book_fts VIRTUAL TABLE INDEX ..." and is not a table scan.
+    Terms shorter than three characters fall back to LIKE '%term%', which no
+    B-tree index can serve, so they are not covered.
+
+    A sample author and book are inserted inside a transaction that is rolled
+    back afterwards, so that follow-up queries such as the books prefetch run
+    even against an empty database.
+
+    Usage:
+        python manage.py check_query_plans [--verbose]
+    """
+    help = 'Fail if representative Book API queries fall back to full table scans.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose', action='store_true', help='Print the full plan of every query.')
+
+    def get_requests(self):
+        """Return (description, view class, query params, view kwargs) tuples to check."""
+        cursor = KeysetPagination.encode_position([1871, 'Middlemarch', self.book.pk])
+        return [
+            ('book list, default ordering', BookListCreate, {}, {}),
+            ('book list, ordering=title', BookListCreate, {'ordering': 'title'}, {}),
+            ('book list, ordering=-title', BookListCreate, {'ordering': '-title'}, {}),
+            ('book list, ordering=-publication_year', BookListCreate, {'ordering': '-publication_year'}, {}),
+            ('book list, publication_year filter', BookListCreate, {'publication_year': 1990}, {}),
+            ('book list, title filter', BookListCreate, {'title': 'Middlemarch'}, {}),
+            ('book list, author__name filter', BookListCreate, {'author__name': 'George Eliot'}, {}),
+            ('book list, author__name + publication_year', BookListCreate,
+             {'author__name': 'George Eliot', 'publication_year': 1871}, {}),
+            ('book list, keyset first page', BookListCreate, {'page_size': 50}, {}),
+            ('book list, keyset deep page', BookListCreate, {'page_size': 50, 'cursor': cursor}, {}),
+            ('book list, keyset deep page, ordering=-title', BookListCreate,
+             {'page_size': 50, 'ordering': '-title',
+              'cursor': KeysetPagination.encode_position(['Middlemarch', self.book.pk])}, {}),
+            ('book list, search', BookListCreate, {'search': 'Middlemarch'}, {}),
+            ('book list, search + ordering=title', BookListCreate, {'search': 'Eliot', 'ordering': 'title'}, {}),
+            ('book detail', BookRetrieveUpdateDestroy, {}, {'pk': self.book.pk}),
+            ('author list with books', AuthorList, {}, {}),
+        ]
+
+    # Cache hits would skip the queries being explained
+    @override_settings(API_RESPONSE_CACHE_TIMEOUT=0)
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('check_query_plans only understands SQLite query plans.')
+
+        with transaction.atomic():
+            author = Author.objects.create(name='George Eliot')
+            self.book = Book.objects.create(title='Middlemarch', publication_year=1871, author=author)
+            failures = self.check_requests(options['verbose'])
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError('%d query plan step(s) fall back to a full table scan.' % failures)
+        self.stdout.write(self.style.SUCCESS('All checked queries use indexes.'))
+
+    def check_requests(self, verbose):
+        factory = APIRequestFactory()
+        failures = 0
+        for description, view_class, params, kwargs in self.get_requests():
+            request = factory.get('/api/', params, HTTP_HOST='localhost')
+            with CaptureQueriesContext(connection) as context:
+                view_class.as_view()(request, **kwargs).render()
+
+            for query in context.captured_queries:
+                sql = query['sql']
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                errors, warnings, plan = self.inspect(sql)
+                failures += len(errors)
+                status = self.style.ERROR('FAIL') if errors else self.style.SUCCESS('ok')
+                self.stdout.write('%s  %s' % (status, description))
+                for message in errors:
+                    self.stdout.write('      full scan: %s' % message)
+                for message in warnings:
+                    self.stdout.write('      warning: %s' % message)
+                if verbose or errors:
+                    self.stdout.write('      sql: %s' % sql)
+                    for detail in plan:
+                        self.stdout.write('        %s' % detail)
+        return failures
+
+    def inspect(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            plan = [row[-1] for row in cursor.fetchall()]
+
+        errors, warnings = [], []
+        for detail in plan:
+            if self.is_full_scan(detail):
+                errors.append(detail)
+            elif 'USE TEMP B-TREE' in detail:
+                warnings.append(detail)
+        return errors, warnings, plan
+
+    def is_full_scan(self, detail):
+        # SQLite < 3.36 prints "SCAN TABLE x", newer versions "SCAN x".
+        if not detail.startswith('SCAN ') or 'USING' in detail or 'VIRTUAL TABLE' in detail:
+            return False
+        target = detail[len('SCAN '):]
+        # sqlite_master is read once by the search backend's table introspection.
+        return not (target.startswith(('(', 'CONSTANT ROW', 'sqlite_master')))
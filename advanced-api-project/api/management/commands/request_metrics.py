@@ -0,0 +1,60 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from api.instrumentation import request_metrics_store
+
+
+class Command(BaseCommand):
+    """
+    Print the per-view percentiles collected by RequestMetricsMiddleware.
+
+    Reads the histograms that server processes flushed to
+    REQUEST_METRICS_CACHE_ALIAS; requests sampled within the last
+    REQUEST_METRICS_FLUSH_INTERVAL seconds may not be included yet.
+    Durations are in milliseconds, 'queries' is the number of queries.
+
+    Usage:
+        python manage.py request_metrics
+        python manage.py request_metrics --view book-list-create --format json
+        python manage.py request_metrics --reset
+    """
+    help = 'Report p50/p95/p99 request timings and query counts per view.'
+
+    percentiles = (50, 95, 99)
+
+    def add_arguments(self, parser):
+        parser.add_argument('--view', action='append', default=[],
+                            help='Only report this view (URL name or dotted path); repeatable.')
+        parser.add_argument('--format', choices=['table', 'json'], default='table', help='Output format.')
+        parser.add_argument('--reset', action='store_true', help='Delete the collected histograms.')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            request_metrics_store.reset()
+            self.stdout.write('Request metrics reset.')
+            return
+
+        report = {}
+        for view_name, histograms in sorted(request_metrics_store.load().items()):
+            if options['view'] and view_name not in options['view']:
+                continue
+            report[view_name] = {
+                name: dict(
+                    {'p%d' % percent: histogram.percentile(percent) for percent in self.percentiles},
+                    count=histogram.count,
+                )
+                for name, histogram in histograms.items()
+            }
+
+        if options['format'] == 'json':
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        if not report:
+            self.stdout.write('No sampled requests; is REQUEST_METRICS_SAMPLE_RATE above 0?')
+            return
+        for view_name, metrics in report.items():
+            self.stdout.write('%s (%d requests)' % (view_name, metrics['total']['count']))
+            self.stdout.write('  %-10s %10s %10s %10s' % ('metric', 'p50', 'p95', 'p99'))
+            for name, values in metrics.items():
+                self.stdout.write('  %-10s %10g %10g %10g' % (name, values['p50'], values['p95'], values['p99']))
@@ -0,0 +1,90 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import api.models
+
+FTS_TABLE = 'api_book_fts'
+
+CREATE_STATEMENTS = [
+    # Trigram tokenizer: substring, case-insensitive matching like icontains.
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, author_name, tokenize='trigram')",
+    f"""INSERT INTO {FTS_TABLE} (rowid, title, author_name)
+        SELECT b.id, b.title, a.name FROM api_book b JOIN api_author a ON a.id = b.author_id""",
+    f"""CREATE TRIGGER api_book_fts_insert AFTER INSERT ON api_book BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, title, author_name)
+        VALUES (new.id, new.title, (SELECT name FROM api_author WHERE id = new.author_id));
+    END""",
+    f"""CREATE TRIGGER api_book_fts_update AFTER UPDATE OF title, author_id ON api_book BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE} (rowid, title, author_name)
+        VALUES (new.id, new.title, (SELECT name FROM api_author WHERE id = new.author_id));
+    END""",
+    f"""CREATE TRIGGER api_book_fts_delete AFTER DELETE ON api_book BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER api_author_fts_update AFTER UPDATE OF name ON api_author BEGIN
+        UPDATE {FTS_TABLE} SET author_name = new.name
+        WHERE rowid IN (SELECT id FROM api_book WHERE author_id = new.id);
+    END""",
+]
+
+DROP_STATEMENTS = [
+    'DROP TRIGGER IF EXISTS api_author_fts_update',
+    'DROP TRIGGER IF EXISTS api_book_fts_delete',
+    'DROP TRIGGER IF EXISTS api_book_fts_update',
+    'DROP TRIGGER IF EXISTS api_book_fts_insert',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def supports_fts5_trigram(connection):
+    """FTS5 and its trigram tokenizer (SQLite 3.34+) are compile-time options."""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.api_fts_probe USING fts5(x, tokenize='trigram')")
+        except Exception:
+            return False
+        cursor.execute('DROP TABLE temp.api_fts_probe')
+    return True
+
+
+def create_book_fts(apps, schema_editor):
+    # Other databases (and SQLite builds without FTS5) keep using the
+    # LIKE-based SearchFilter; see api.search.FullTextSearchFilter.
+    if not supports_fts5_trigram(schema_editor.connection):
+        return
+    for statement in CREATE_STATEMENTS:
+        schema_editor.execute(statement)
+
+
+def drop_book_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_STATEMENTS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_book_author_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_book_fts, drop_book_fts),
+        migrations.CreateModel(
+            name='BookSearchIndex',
+            fields=[
+                ('book', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='api.book')),
+                ('title', models.TextField()),
+                ('author_name', models.TextField()),
+                ('document', api.models.FullTextField(db_column='api_book_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'api_book_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,81 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+FTS_TABLE = 'api_book_fts'
+
+# SQLite rebuilds api_author and api_book to add the columns, and a table
+# cannot be renamed while triggers of migration 0003 still reference it.
+TRIGGER_STATEMENTS = [
+    f"""CREATE TRIGGER api_book_fts_insert AFTER INSERT ON api_book BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, title, author_name)
+        VALUES (new.id, new.title, (SELECT name FROM api_author WHERE id = new.author_id));
+    END""",
+    f"""CREATE TRIGGER api_book_fts_update AFTER UPDATE OF title, author_id ON api_book BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE} (rowid, title, author_name)
+        VALUES (new.id, new.title, (SELECT name FROM api_author WHERE id = new.author_id));
+    END""",
+    f"""CREATE TRIGGER api_book_fts_delete AFTER DELETE ON api_book BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER api_author_fts_update AFTER UPDATE OF name ON api_author BEGIN
+        UPDATE {FTS_TABLE} SET author_name = new.name
+        WHERE rowid IN (SELECT id FROM api_book WHERE author_id = new.id);
+    END""",
+]
+
+DROP_TRIGGER_STATEMENTS = [
+    'DROP TRIGGER IF EXISTS api_author_fts_update',
+    'DROP TRIGGER IF EXISTS api_book_fts_delete',
+    'DROP TRIGGER IF EXISTS api_book_fts_update',
+    'DROP TRIGGER IF EXISTS api_book_fts_insert',
+]
+
+
+def has_fts_table(schema_editor):
+    connection = schema_editor.connection
+    return connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names()
+
+
+def drop_fts_triggers(apps, schema_editor):
+    if has_fts_table(schema_editor):
+        for statement in DROP_TRIGGER_STATEMENTS:
+            schema_editor.execute(statement)
+
+
+def create_fts_triggers(apps, schema_editor):
+    if has_fts_table(schema_editor):
+        for statement in TRIGGER_STATEMENTS:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_book_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_fts_triggers, create_fts_triggers),
+        migrations.AddField(
+            model_name='author',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(create_fts_triggers, drop_fts_triggers),
+        migrations.AddIndex(
+            model_name='author',
+            index=models.Index(fields=['updated_at'], name='api_author_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['updated_at'], name='api_book_updated_at_idx'),
+        ),
+    ]
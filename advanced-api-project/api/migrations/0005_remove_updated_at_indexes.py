@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 08:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_book_author_updated_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='author',
+            name='api_author_updated_at_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='book',
+            name='api_book_updated_at_idx',
+        ),
+    ]
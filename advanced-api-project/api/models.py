@@ -6,17 +6,24 @@ class Author(models.Model):
 
     Fields:
     - name: The full name of the author (CharField with max 100 characters)
+    - updated_at: When the author was last saved (used for the book detail
+      ETag/Last-Modified)
 
     This model has a one-to-many relationship with Book model.
     One author can write multiple books.
     """
     name = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
     class Meta:
         ordering = ['name']
+        indexes = [
+            # Serves Meta.ordering and ?author__name= lookups from the Book API
+            models.Index(fields=['name'], name='api_author_name_idx'),
+        ]
 
 
 class Book(models.Model):
@@ -27,17 +34,83 @@ class Book(models.Model):
     - title: The title of the book (CharField with max 200 characters)
     - publication_year: The year the book was published (IntegerField)
     - author: Foreign key relationship to Author model (many-to-one)
+    - updated_at: When the book was last saved (used for the detail
+      ETag/Last-Modified);
+      bulk_update() and QuerySet.update() must set it explicitly
 
     Relationships:
     - Each book belongs to one author (many-to-one relationship via ForeignKey)
     - When an author is deleted, all their books are also deleted (CASCADE)
+
+    String Representation:
+    - Includes the author's name only when the author is already loaded
+      (e.g. via select_related), so str() never issues a hidden query
     """
     title = models.CharField(max_length=200)
     publication_year = models.IntegerField()
     author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='books')
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"{self.title} by {self.author.name}"
+        if Book.author.is_cached(self):
+            return f"{self.title} by {self.author.name}"
+        return self.title
 
     class Meta:
         ordering = ['publication_year', 'title']
+        indexes = [
+            # Matches Meta.ordering (the id tie-breaker rides along as the rowid),
+            # ?ordering=[-]publication_year and ?publication_year= filters
+            models.Index(fields=['publication_year', 'title'], name='api_book_year_title_idx'),
+            # ?title= filters and ?ordering=[-]title
+            models.Index(fields=['title'], name='api_book_title_idx'),
+            # ?author__name= filters and the AuthorSerializer books prefetch,
+            # already sorted by Meta.ordering within each author
+            models.Index(fields=['author', 'publication_year', 'title'], name='api_book_author_year_idx'),
+        ]
+
+
+class FullTextMatch(models.Lookup):
+    """FTS5 MATCH query: <column> MATCH <fts5 query string>."""
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return '%s MATCH %s' % (lhs, rhs), (*lhs_params, *rhs_params)
+
+
+class FullTextField(models.TextField):
+    """Column of a full-text table; supports the 'match' lookup."""
+
+
+FullTextField.register_lookup(FullTextMatch)
+
+
+class BookSearchIndex(models.Model):
+    """
+    Read-only view of the api_book_fts full-text table (see migration 0003).
+
+    The table is an SQLite FTS5 virtual table with one row per book, keyed
+    by the book's id as rowid, and kept in sync by database triggers. It
+    only exists on SQLite builds with FTS5, so the model is unmanaged.
+
+    Fields:
+    - book: The indexed book (the FTS rowid)
+    - title, author_name: The indexed text
+    - document: FTS5's hidden column named after the table, the target of
+      the 'match' lookup: search_index__document__match='"term"'
+    - rank: FTS5's hidden bm25 rank of the current match (lower is better)
+    """
+    book = models.OneToOneField(
+        Book, primary_key=True, db_column='rowid', on_delete=models.DO_NOTHING, related_name='search_index',
+    )
+    title = models.TextField()
+    author_name = models.TextField()
+    document = FullTextField(db_column='api_book_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'api_book_fts'
+
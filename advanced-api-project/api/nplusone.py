@@ -0,0 +1,204 @@
+import logging
+import os
+import re
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.template.base import Node
+from django.test.utils import override_settings
+
+logger = logging.getLogger(__name__)
+
+# NPlusOneDetector of the running request or block; None when detection is off
+current_detector = ContextVar('current_detector', default=None)
+
+
+class NPlusOneError(AssertionError):
+    """Raised by NPlusOneDetector in 'raise' mode."""
+
+
+class NPlusOneDetector:
+    """
+    Flags SELECTs of the same shape repeated from the same line of code.
+
+    Every SELECT is reduced to a fingerprint (whitespace collapsed, numbers
+    and quoted strings replaced with ?, IN lists of any length made equal)
+    and paired with its call site: the innermost frame of project code,
+    skipping Django, third-party packages and the instrumentation modules.
+    Queries run by a template, such as {{ book.author.name }} inside a
+    loop, also name the template and line that triggered them.
+
+    Once a (fingerprint, call site) pair has run `threshold` times the
+    detector either raises NPlusOneError at that query, so the traceback
+    leads to the loop, or remembers it and logs a warning per pair from
+    report() with the final count.
+
+    Only SELECTs are considered: repeated INSERTs and UPDATEs from a loop
+    are usually intentional and have bulk alternatives of their own.
+    """
+    literal_pattern = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+    in_list_pattern = re.compile(r'IN \((?:\?|%s)(?:, (?:\?|%s))*\)')
+    whitespace_pattern = re.compile(r'\s+')
+    skipped_modules = ('api.instrumentation', 'api.nplusone')
+
+    def __init__(self, action='raise', threshold=2, label=None):
+        self.action = action
+        self.threshold = threshold
+        self.label = label
+        self.counts = {}
+
+    @classmethod
+    def fingerprint(cls, sql):
+        sql = cls.whitespace_pattern.sub(' ', sql.strip())
+        sql = cls.literal_pattern.sub('?', sql)
+        return cls.in_list_pattern.sub('IN (...)', sql)
+
+    @classmethod
+    def is_project_frame(cls, frame):
+        filename = frame.f_code.co_filename
+        if 'site-packages' in filename or 'dist-packages' in filename:
+            return False
+        if frame.f_globals.get('__name__') in cls.skipped_modules:
+            return False
+        return filename.startswith(str(settings.BASE_DIR) + os.sep)
+
+    @classmethod
+    def call_site(cls):
+        template = None
+        frame = sys._getframe(1)
+        while frame is not None:
+            if template is None and frame.f_code is Node.render_annotated.__code__:
+                node = frame.f_locals['self']
+                template = ' (template %s, line %d)' % (
+                    node.origin.template_name or node.origin.name, node.token.lineno,
+                )
+            if cls.is_project_frame(frame):
+                return '%s:%d in %s%s' % (
+                    os.path.relpath(frame.f_code.co_filename, settings.BASE_DIR),
+                    frame.f_lineno,
+                    frame.f_code.co_name,
+                    template or '',
+                )
+            frame = frame.f_back
+        return '<unknown>%s' % (template or '')
+
+    def record(self, sql):
+        if not sql.lstrip()[:6].upper() == 'SELECT':
+            return
+        key = (self.fingerprint(sql), self.call_site())
+        count = self.counts[key] = self.counts.get(key, 0) + 1
+        if count == self.threshold and self.action == 'raise':
+            raise NPlusOneError(self.describe(key, count))
+
+    def describe(self, key, count):
+        fingerprint, call_site = key
+        where = ' during %s' % self.label if self.label else ''
+        return 'N+1 query%s: %d identical queries from %s: %s' % (where, count, call_site, fingerprint)
+
+    def get_repeated(self):
+        """Return {(fingerprint, call_site): count} of the pairs over the threshold."""
+        return {key: count for key, count in self.counts.items() if count >= self.threshold}
+
+    def report(self):
+        for key, count in self.get_repeated().items():
+            logger.warning(self.describe(key, count))
+
+
+def query_detector(execute, sql, params, many, context):
+    """connection.execute_wrapper() feeding the queries of the current block to its detector."""
+    detector = current_detector.get()
+    if detector is not None:
+        detector.record(sql)
+    return execute(sql, params, many, context)
+
+
+def install_query_detector(sender, connection, **kwargs):
+    """connection_created receiver adding query_detector to every connection (see install_query_timer)."""
+    if query_detector not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, query_detector)
+
+
+@contextmanager
+def detect_n_plus_one(action='raise', threshold=None, label=None):
+    """
+    Run the enclosed block under a fresh NPlusOneDetector and yield it.
+
+    threshold defaults to NPLUSONE_THRESHOLD. In 'log' mode the repeated
+    queries are logged when the block exits.
+    """
+    if threshold is None:
+        threshold = getattr(settings, 'NPLUSONE_THRESHOLD', 2)
+    detector = NPlusOneDetector(action, threshold, label)
+    token = current_detector.set(detector)
+    try:
+        yield detector
+    finally:
+        current_detector.reset(token)
+    if action == 'log':
+        detector.report()
+
+
+class NPlusOneMiddleware:
+    """
+    Checks every request for N+1 queries.
+
+    Each request gets its own NPlusOneDetector, so two requests fetching
+    the same book are not mistaken for a loop.
+
+    Settings:
+    - NPLUSONE_ACTION: 'log' to log a warning per repeated query at the end
+      of the request (development), 'raise' to fail the request with
+      NPlusOneError (tests, see NPlusOneTestMixin), None to turn the
+      detector off (default)
+    - NPLUSONE_THRESHOLD: executions of the same query from the same line
+      that count as N+1 (default 2)
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    @property
+    def action(self):
+        return getattr(settings, 'NPLUSONE_ACTION', None)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        action = self.action
+        if not action:
+            return self.get_response(request)
+        with detect_n_plus_one(action, label='%s %s' % (request.method, request.path)):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        action = self.action
+        if not action:
+            return await self.get_response(request)
+        with detect_n_plus_one(action, label='%s %s' % (request.method, request.path)):
+            return await self.get_response(request)
+
+
+class NPlusOneTestMixin:
+    """
+    TestCase mixin that fails any request of the test running N+1 queries.
+
+    Requests made through the test client raise NPlusOneError from the
+    offending query. Use assertNoNPlusOne() for ORM code called directly.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        settings_override = override_settings(NPLUSONE_ACTION='raise')
+        settings_override.enable()
+        cls.addClassCleanup(settings_override.disable)
+
+    def assertNoNPlusOne(self, threshold=None):
+        return detect_n_plus_one('raise', threshold=threshold, label=self.id())
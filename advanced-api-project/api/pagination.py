@@ -0,0 +1,269 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination keyed on the queryset's ordering.
+
+    Instead of skipping rows with OFFSET, every page is fetched with a
+    WHERE clause that continues after the last row of the previous page:
+
+        (publication_year, title, id) > (1977, 'The Shining', 3)
+
+    expanded into the equivalent OR/AND chain so that SQLite can use an index
+    on the ordering columns. Fetching page N therefore costs the same as
+    fetching page 1.
+
+    Ordering Resolution:
+    - The ordering applied by OrderingFilter (e.g. ?ordering=-title) is used
+      when present, otherwise the model's Meta.ordering
+    - The primary key is always appended as a final tie-breaker so that rows
+      sharing the same title or year are never skipped or repeated
+
+    Query Parameters:
+    - ?page_size=50: Enables pagination and sets the page size
+    - ?cursor=<opaque>: Continues from a page returned in 'next'/'previous'
+
+    Pagination is opt-in: when neither parameter is supplied the view keeps
+    returning a plain, unpaginated list so existing clients are unaffected.
+
+    Response Format:
+    {"next": <url or null>, "previous": <url or null>, "results": [...]}
+    """
+    page_size = 20
+    max_page_size = 1000
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+        if queryset is None:
+            return None
+        # Fetch one extra row to find out whether another page follows.
+        return self.set_page(list(queryset[:self.page_size + 1]))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() for async views, fetching the page with the async ORM."""
+        queryset = self.get_page_queryset(queryset, request)
+        if queryset is None:
+            return None
+        return self.set_page([row async for row in queryset[:self.page_size + 1]])
+
+    def get_page_queryset(self, queryset, request):
+        """Return the ordered, keyset-filtered queryset, or None when not paginating."""
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.query = queryset.query
+
+        self.position, self.reverse = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.order_by_expressions(self.reverse))
+        if self.position is not None:
+            queryset = queryset.filter(self.keyset_filter(self.position, self.reverse))
+        return queryset
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if self.reverse:
+            results.reverse()
+            self.has_next = self.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+
+        self.page = results
+        return results
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        """
+        Return the ordering as a list of (field_name, descending) tuples.
+
+        Only plain field names are supported; the primary key is appended as
+        a unique tie-breaker unless the ordering already ends on it. It sorts
+        in the same direction as the last field so that a single-column index,
+        which stores rows in (column, rowid) order, can serve the whole ORDER BY.
+        """
+        query = queryset.query
+        ordering = list(query.order_by) or list(query.get_meta().ordering)
+        pk_name = query.get_meta().pk.name
+
+        result = []
+        for field in ordering:
+            assert isinstance(field, str), (
+                'KeysetPagination only supports ordering by field names, got %r.' % (field,)
+            )
+            descending = field.startswith('-')
+            name = field.lstrip('-')
+            if name == 'pk':
+                name = pk_name
+            result.append((name, descending))
+
+        if not result or result[-1][0] != pk_name:
+            result.append((pk_name, result[-1][1] if result else False))
+        return result
+
+    def order_by_expressions(self, reverse):
+        return [
+            ('-' if descending != reverse else '') + name
+            for name, descending in self.ordering
+        ]
+
+    def keyset_filter(self, position, reverse):
+        """
+        Build the row-value comparison for "rows after this position".
+
+        For an ordering (a, -b, id) this produces:
+            a >= x AND (a > x OR (a = x AND b < y) OR (a = x AND b = y AND id > z))
+        with every comparison flipped when paging backwards. The redundant
+        leading "a >= x" lets the database seek straight to the position in
+        an index on a instead of scanning it from the start.
+        """
+        first_name, first_descending = self.ordering[0]
+        first_lookup = 'lte' if first_descending != reverse else 'gte'
+        bound = Q(**{'%s__%s' % (first_name, first_lookup): position[0]})
+
+        condition = Q()
+        for index, (name, descending) in enumerate(self.ordering):
+            lookup = 'lt' if descending != reverse else 'gt'
+            clause = Q(**{'%s__%s' % (name, lookup): position[index]})
+            for prev_index, (prev_name, _) in enumerate(self.ordering[:index]):
+                clause &= Q(**{prev_name: position[prev_index]})
+            condition |= clause
+        return bound & condition
+
+    def get_position(self, instance):
+        position = []
+        for name, _ in self.ordering:
+            value = instance
+            for attr in name.split('__'):
+                value = getattr(value, attr)
+            position.append(value)
+        return position
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            position = payload['p']
+            reverse = bool(payload.get('r', False))
+        except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return self.coerce_position(position), reverse
+
+    def coerce_position(self, position):
+        """
+        Convert the decoded position to the ordering fields' Python types.
+
+        Cursors come from the client, so a tampered one may hold values of
+        any JSON type; anything the field cannot convert is rejected here
+        rather than failing inside the keyset filter.
+        """
+        values = []
+        for (name, _), value in zip(self.ordering, position):
+            if value is None or isinstance(value, (bool, list, dict)):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                value = self.get_field(name).to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            values.append(value)
+        return values
+
+    def get_field(self, name):
+        """Return the model field or annotation output field an ordering name refers to."""
+        if name in self.query.annotations:
+            return self.query.annotations[name].output_field
+        opts = self.query.get_meta()
+        for attr in name.split('__'):
+            field = opts.get_field(attr)
+            if field.is_relation:
+                opts = field.related_model._meta
+        return field
+
+    @staticmethod
+    def encode_position(position, reverse=False):
+        """Return the opaque ?cursor= token for a row position."""
+        payload = {'p': position}
+        if reverse:
+            payload['r'] = 1
+        return urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+    def encode_cursor(self, position, reverse):
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.encode_position(position, reverse))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            url = self.request.build_absolute_uri()
+            return remove_query_param(url, self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class BookKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination for the Book list endpoint.
+
+    Pages follow Book.Meta.ordering (publication_year, title) with the id
+    as tie-breaker, or whatever ?ordering= the client selected.
+    """
+    page_size = 50
@@ -0,0 +1,30 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class JSONLinesParser(BaseParser):
+    """
+    Parses JSON Lines (newline-delimited JSON) request bodies into a list.
+
+    Each non-blank line must hold one JSON value; errors report the line
+    number so clients can find the offending record in large uploads.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        rows = []
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line.decode(encoding)))
+            except (UnicodeDecodeError, ValueError) as exc:
+                raise ParseError('JSON parse error on line %d - %s' % (number, exc))
+        return rows
@@ -0,0 +1,75 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+
+def dumps(data):
+    """Encode data exactly as DRF's JSONRenderer does with the default settings."""
+    ret = json.dumps(
+        data,
+        cls=encoders.JSONEncoder,
+        ensure_ascii=not api_settings.UNICODE_JSON,
+        allow_nan=not api_settings.STRICT_JSON,
+        separators=(',', ':') if api_settings.COMPACT_JSON else (', ', ': '),
+    )
+    # JSONRenderer escapes these so the output is also valid JavaScript.
+    return ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+
+
+def iter_json_lines(rows, chunk_size):
+    """
+    Yield JSON Lines (one object per line) as UTF-8 chunks of up to chunk_size rows.
+    """
+    buffer = []
+    for row in rows:
+        buffer.append(dumps(row))
+        if len(buffer) >= chunk_size:
+            buffer.append('')
+            yield '\n'.join(buffer).encode('utf-8')
+            buffer = []
+    if buffer:
+        buffer.append('')
+        yield '\n'.join(buffer).encode('utf-8')
+
+
+def iter_json_array(rows, chunk_size):
+    """
+    Yield a single JSON array in UTF-8 chunks of up to chunk_size rows.
+
+    The concatenated chunks are byte-identical to JSONRenderer output for the
+    same list, so clients cannot tell a streamed response from a buffered one.
+    """
+    yield b'['
+    separator = ''
+    buffer = []
+    for row in rows:
+        buffer.append(dumps(row))
+        if len(buffer) >= chunk_size:
+            yield (separator + ','.join(buffer)).encode('utf-8')
+            separator = ','
+            buffer = []
+    if buffer:
+        yield (separator + ','.join(buffer)).encode('utf-8')
+    yield b']'
+
+
+class JSONLinesRenderer(BaseRenderer):
+    """
+    Renderer for JSON Lines (newline-delimited JSON) responses.
+
+    Selected with ?format=jsonl or 'Accept: application/x-ndjson'. Streaming
+    views write their rows with iter_json_lines(); this render() only handles
+    regular responses such as error messages, writing lists one item per line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'jsonl'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not isinstance(data, (list, tuple)):
+            data = [data]
+        return b''.join(iter_json_lines(data, chunk_size=len(data) or 1))
@@ -0,0 +1,111 @@
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.db.models import F
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+
+class SQLiteFTS5SearchBackend:
+    """
+    Full-text search over Book title and author name using an SQLite FTS5 table.
+
+    The api_book_fts virtual table (created by migration 0003, mapped by
+    BookSearchIndex) uses the trigram tokenizer, so a term matches anywhere
+    inside a word, case-insensitively, exactly like the icontains lookups of
+    SearchFilter. Database triggers keep it in sync with api_book and
+    api_author, including bulk_create(), bulk_update() and QuerySet.update(),
+    which bypass model signals.
+    Migrations that make SQLite rebuild either table must drop the triggers
+    first and recreate them afterwards, as migration 0004 does.
+
+    Matching books are annotated with 'search_rank' (FTS5 bm25 rank, lower is
+    more relevant).
+
+    search() returns None when it cannot answer the query, and the caller
+    falls back to the regular LIKE-based search:
+    - the database is not SQLite or the FTS table does not exist
+    - a term is shorter than three characters (the trigram minimum)
+    - the view searches fields other than indexed_fields
+    """
+    table = 'api_book_fts'
+    indexed_fields = ('title', 'author__name')
+    min_term_length = 3
+
+    # Whether the FTS table exists, per database alias
+    _available = {}
+
+    def is_available(self, using):
+        if using not in self._available:
+            connection = connections[using]
+            self._available[using] = (
+                connection.vendor == 'sqlite'
+                and self.table in connection.introspection.table_names()
+            )
+        return self._available[using]
+
+    async def ais_available(self, using):
+        """is_available() for async views; the introspection query runs once per alias."""
+        if using not in self._available:
+            await sync_to_async(self.is_available)(using)
+        return self._available[using]
+
+    def supports(self, search_fields, terms):
+        return (
+            set(search_fields) == set(self.indexed_fields)
+            and all(len(term) >= self.min_term_length for term in terms)
+        )
+
+    def build_match(self, terms):
+        """Quote every term as an FTS5 string and require all of them."""
+        return ' AND '.join('"%s"' % term.replace('"', '""') for term in terms)
+
+    def search(self, queryset, search_fields, terms):
+        if not self.supports(search_fields, terms) or not self.is_available(queryset.db):
+            return None
+
+        # Joining api_book_fts lets SQLite drive the query from the MATCH and
+        # read each row's rank from the same lookup.
+        return queryset.filter(search_index__document__match=self.build_match(terms)).annotate(
+            search_rank=F('search_index__rank'),
+        )
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    SearchFilter that delegates ?search= to a full-text search backend.
+
+    The backend is taken from the view's search_backend attribute (a class),
+    defaulting to SQLiteFTS5SearchBackend. When the backend cannot handle a
+    query, the regular SearchFilter LIKE lookups are used instead, so the
+    ?search= contract is the same on every database.
+    """
+    default_search_backend = SQLiteFTS5SearchBackend
+
+    def get_search_backend(self, view):
+        return getattr(view, 'search_backend', self.default_search_backend)()
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+
+        result = self.get_search_backend(view).search(queryset, search_fields, search_terms)
+        if result is None:
+            return super().filter_queryset(request, queryset, view)
+        return result
+
+
+class RelevanceOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter that puts the most relevant full-text matches first.
+
+    When the queryset carries a 'search_rank' annotation and the client did
+    not pass ?ordering=, results are ordered by rank and then by the view's
+    default ordering. An explicit ?ordering= always wins.
+    """
+    rank_field = 'search_rank'
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if not params and self.rank_field in queryset.query.annotations:
+            return [self.rank_field] + list(self.get_default_ordering(view) or [])
+        return super().get_ordering(request, queryset, view)
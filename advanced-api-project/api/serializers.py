@@ -1,9 +1,251 @@
 from rest_framework import serializers
 from datetime import datetime
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Manager, Prefetch, QuerySet
+from django.utils import timezone
+from .instrumentation import TimedSerializerMixin
 from .models import Author, Book
 
 
-class BookSerializer(serializers.ModelSerializer):
+class EagerLoadingMixin:
+    """
+    Lets a serializer declare the relations it reads so views can load them up front.
+
+    Serializers list their needs in:
+    - select_related_fields: forward foreign keys joined into the main query
+    - prefetch_related_fields: reverse/many relations loaded in one extra query each
+
+    Override get_select_related()/get_prefetch_related() when a relation needs a
+    Prefetch object with a custom queryset. Views using EagerLoadingQuerysetMixin
+    call setup_eager_loading() on their queryset automatically, so nested
+    serializers never trigger one query per row (the N+1 problem).
+
+    With a sparse fieldset (see SparseFieldsetMixin) only the relations of
+    the rendered fields are loaded, and expanded relations are joined in.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    @classmethod
+    def get_select_related(cls):
+        return list(cls.select_related_fields)
+
+    @classmethod
+    def get_prefetch_related(cls):
+        return list(cls.prefetch_related_fields)
+
+    @staticmethod
+    def is_rendered(lookup, fields):
+        if fields is None:
+            return True
+        path = lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+        return path.split('__')[0] in fields
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None, expand=()):
+        """Load the relations read by fields (all fields when None) plus the expanded ones."""
+        select_related = [lookup for lookup in cls.get_select_related() if cls.is_rendered(lookup, fields)]
+        select_related += [name for name in expand if name not in select_related]
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        prefetch_related = [lookup for lookup in cls.get_prefetch_related() if cls.is_rendered(lookup, fields)]
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin for sparse fieldsets and expandable relations.
+
+    Arguments:
+    - fields: names of the fields to render; the others are dropped
+      (default None, every declared field)
+    - expand: names from expandable_fields to render as nested objects
+      instead of their primary key
+
+    expandable_fields maps a field name to the serializer class used when it
+    is expanded. get_projection() turns the remaining fields into the
+    columns the serializer reads, for QuerySet.only().
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in expand:
+            self.fields[name] = self.expandable_fields[name](read_only=True)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    def get_projection(self):
+        """
+        Return the only() lookups covering every rendered field, or None when
+        a field reads something other than model columns.
+
+        Expanded relations contribute their own columns with a prefix
+        (author__name); many-valued nested fields are loaded by prefetching
+        and need no column.
+        """
+        opts = self.Meta.model._meta
+        lookups = []
+        for field in self.fields.values():
+            if isinstance(field, serializers.ListSerializer):
+                continue
+            if field.source == '*' or '.' in field.source:
+                return None
+            try:
+                model_field = opts.get_field(field.source)
+            except FieldDoesNotExist:
+                return None
+            if not model_field.concrete:
+                return None
+            if isinstance(field, SparseFieldsetMixin):
+                nested = field.get_projection()
+                if nested is None:
+                    return None
+                lookups += ['%s__%s' % (model_field.name, lookup) for lookup in nested]
+            lookups.append(model_field.name)
+        return lookups
+
+
+class ValuesListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """
+    Read-only fast path for serializing many model instances at once.
+
+    ModelSerializer.to_representation() walks every field of every row, which
+    dominates CPU time on large pages. When all readable fields map straight to
+    a database column and their to_representation() would return the column
+    value unchanged, this list serializer instead:
+    - pulls tuples with values_list() when given an unevaluated queryset
+    - reads the column attributes directly when given model instances
+      (e.g. a page returned by a paginator, or a prefetched relation)
+    and zips them into dicts keyed by field name.
+
+    The output is identical to the per-field path. Serializers with any other
+    field type fall back to ListSerializer.to_representation(). Writes never go
+    through this class, so field validators such as validate_publication_year
+    keep running unchanged.
+    """
+    passthrough_field_types = (
+        serializers.IntegerField,
+        serializers.CharField,
+        serializers.BooleanField,
+        serializers.PrimaryKeyRelatedField,
+    )
+
+    def get_columns(self, exclude=()):
+        """
+        Return a list of (field_name, column_attname) pairs, or None when a
+        field needs its own to_representation().
+        """
+        opts = self.child.Meta.model._meta
+        columns = []
+        for field in self.child._readable_fields:
+            if field.field_name in exclude:
+                continue
+            if not isinstance(field, self.passthrough_field_types) or '.' in field.source:
+                return None
+            if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is not None:
+                return None
+            try:
+                model_field = opts.get_field(field.source)
+            except FieldDoesNotExist:
+                return None
+            if not model_field.concrete:
+                return None
+            columns.append((field.field_name, model_field.attname))
+        return columns
+
+    def is_unevaluated_queryset(self, iterable):
+        return isinstance(iterable, QuerySet) and iterable._result_cache is None
+
+    def get_rows(self, iterable, columns):
+        attnames = [attname for _, attname in columns]
+        if self.is_unevaluated_queryset(iterable):
+            return iterable.prefetch_related(None).values_list(*attnames)
+        return ([getattr(instance, attname) for attname in attnames] for instance in iterable)
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, Manager) else data
+        columns = self.get_columns()
+        if columns is None:
+            return super().to_representation(iterable)
+        names = [name for name, _ in columns]
+        return [dict(zip(names, row)) for row in self.get_rows(iterable, columns)]
+
+    def iter_representation(self, queryset, chunk_size=2000):
+        """
+        Yield one representation per row, fetching chunk_size rows at a time
+        with QuerySet.iterator() so memory stays flat for any number of rows.
+        """
+        columns = self.get_columns()
+        if columns is None:
+            for instance in queryset.iterator(chunk_size=chunk_size):
+                yield self.child.to_representation(instance)
+            return
+        names = [name for name, _ in columns]
+        rows = queryset.prefetch_related(None).values_list(*[attname for _, attname in columns])
+        for row in rows.iterator(chunk_size=chunk_size):
+            yield dict(zip(names, row))
+
+    async def aiter_representation(self, queryset, chunk_size=2000):
+        """iter_representation() for async views, reading rows with QuerySet.aiterator()."""
+        columns = self.get_columns()
+        if columns is None:
+            async for instance in queryset.aiterator(chunk_size=chunk_size):
+                yield self.child.to_representation(instance)
+            return
+        # values() rather than values_list(): ValuesListIterable runs its query
+        # as soon as it is created, i.e. in the event loop, under aiterator().
+        rows = queryset.prefetch_related(None).values(*[attname for _, attname in columns])
+        async for row in rows.aiterator(chunk_size=chunk_size):
+            yield {name: row[attname] for name, attname in columns}
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField that can resolve ids from objects loaded up front.
+
+    When the serializer context holds a {pk: instance} dict under context_key
+    (as BookBulkSerializer provides), ids are looked up there instead of
+    running one query per value. Without it the field behaves exactly like
+    PrimaryKeyRelatedField.
+    """
+
+    def __init__(self, context_key, **kwargs):
+        self.context_key = context_key
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get(self.context_key)
+        if preloaded is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool) or not isinstance(data, (int, str)):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except ValueError:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in preloaded:
+            self.fail('does_not_exist', pk_value=data)
+        return preloaded[pk]
+
+
+class AuthorSummarySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Compact author representation used when a book's author is expanded (?expand=author).
+
+    Fields:
+    - id, name (the author's books are not included)
+    """
+
+    class Meta:
+        model = Author
+        fields = ['id', 'name']
+
+
+class BookSerializer(TimedSerializerMixin, EagerLoadingMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     """
     BookSerializer for serializing Book model instances.
 
@@ -12,13 +254,31 @@ class BookSerializer(serializers.ModelSerializer):
     - publication_year: Year of publication
     - author: Foreign key to Author (will show author ID by default)
 
+    Sparse Fieldsets (SparseFieldsetMixin):
+    - fields=[...] keeps only the named fields
+    - expand=['author'] renders the author as {"id", "name"} with
+      AuthorSummarySerializer instead of its id
+
     Custom Validation:
     - validate_publication_year: Ensures the publication year is not in the future
+
+    Eager Loading:
+    - No relations to load: 'author' is rendered from the author_id column
+
+    Fast Path:
+    - many=True uses ValuesListSerializer, which reads id, title,
+      publication_year and author_id (or the requested subset) with values_list()
+    - BookBulkSerializer preloads authors and the current year once per
+      request, which 'author' and validate_publication_year pick up from the context
     """
+    author = PreloadedPrimaryKeyRelatedField(context_key='authors', queryset=Author.objects.all())
+
+    expandable_fields = {'author': AuthorSummarySerializer}
 
     class Meta:
         model = Book
         fields = ['id', 'title', 'publication_year', 'author']
+        list_serializer_class = ValuesListSerializer
 
     def validate_publication_year(self, value):
         """
@@ -36,7 +296,7 @@ class BookSerializer(serializers.ModelSerializer):
         Raises:
             serializers.ValidationError: If publication year is in the future
         """
-        current_year = datetime.now().year
+        current_year = self.context.get('current_year') or datetime.now().year
 
         if value > current_year:
             raise serializers.ValidationError(
@@ -46,7 +306,53 @@ class BookSerializer(serializers.ModelSerializer):
         return value
 
 
-class AuthorSerializer(serializers.ModelSerializer):
+class AuthorListSerializer(ValuesListSerializer):
+    """
+    Read-only fast path for lists of authors with their nested books.
+
+    Runs one values_list() query for the authors and one for all of their
+    books, then groups the book dicts by author_id. Books come back in
+    Book.Meta.ordering, the same order the 'books' prefetch produces.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, Manager) else data
+        books_field = self.child.fields.get('books')
+        if books_field is None:
+            # A sparse fieldset without books is a flat list of columns
+            return super().to_representation(iterable)
+        columns = self.get_columns(exclude=('books',))
+        book_columns = books_field.get_columns()
+        if columns is None or book_columns is None:
+            return super().to_representation(iterable)
+
+        names = [name for name, _ in columns]
+        if not self.is_unevaluated_queryset(iterable):
+            # Instances (e.g. a paginated page) already carry prefetched books.
+            return [
+                dict(zip(names, row), books=books_field.to_representation(instance.books))
+                for instance, row in zip(iterable, self.get_rows(iterable, columns))
+            ]
+
+        # Rows end with the author's pk, which ?fields= may leave out of the output
+        authors = [
+            (row[-1], dict(zip(names, row)))
+            for row in self.get_rows(iterable, columns + [('pk', Author._meta.pk.attname)])
+        ]
+        books_by_author = {pk: [] for pk, _ in authors}
+        book_names = [name for name, _ in book_columns]
+        book_rows = Book.objects.filter(author_id__in=list(books_by_author)).values_list(
+            *[attname for _, attname in book_columns], 'author_id'
+        )
+        for row in book_rows:
+            books_by_author[row[-1]].append(dict(zip(book_names, row)))
+
+        for pk, author in authors:
+            author['books'] = books_by_author[pk]
+        return [author for _, author in authors]
+
+
+class AuthorSerializer(TimedSerializerMixin, EagerLoadingMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     """
     AuthorSerializer for serializing Author model instances.
 
@@ -62,11 +368,164 @@ class AuthorSerializer(serializers.ModelSerializer):
     - many=True: Indicates that one author can have multiple books
     - read_only=True: Makes the books field read-only to prevent modification through this serializer
 
+    Sparse Fieldsets (SparseFieldsetMixin):
+    - fields=['id', 'name'] leaves out the books, and with them the prefetch
+
     This nested approach allows clients to get complete author information including
     all their books in a single API call, reducing the need for multiple requests.
+
+    Eager Loading:
+    - 'books' is prefetched in one query for the whole page of authors, loading
+      only the columns BookSerializer renders
+
+    Fast Path:
+    - many=True uses AuthorListSerializer, which builds the same nested output
+      from two values_list() queries
     """
     books = BookSerializer(many=True, read_only=True)
 
     class Meta:
         model = Author
         fields = ['id', 'name', 'books']
+        list_serializer_class = AuthorListSerializer
+
+    @classmethod
+    def get_prefetch_related(cls):
+        return [
+            Prefetch(
+                'books',
+                queryset=Book.objects.only('id', 'title', 'publication_year', 'author_id'),
+            ),
+        ]
+
+
+def parse_id(value):
+    """
+    Return a client-supplied id as an int, or None when it is not one.
+
+    Integers and strings of digits are accepted; bools, floats, lists and
+    objects are not, so they never reach a set or dict lookup.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        try:
+            return int(value)
+        except ValueError:
+            # isdigit() also accepts digits int() does not, e.g. superscripts
+            return None
+    return None
+
+
+class BookBulkSerializer(ValuesListSerializer):
+    """
+    Validates and writes many books in one pass.
+
+    Validation:
+    - All referenced author ids are resolved with a single query and the
+      current year is computed once, both shared with every row through the
+      serializer context
+    - Every row runs the regular BookSerializer validation, including
+      validate_publication_year
+    - Errors are reported per row, keyed by the row's index in the request
+      ({3: {"publication_year": [...]}}, the same shape as DRF's dict-based
+      ListSerializer errors), and no row is written unless all are valid
+
+    Writing:
+    - Creates use bulk_create() and updates use bulk_update(), both in
+      batches of batch_size rows
+    - For updates, pass a queryset as instance: every row must carry the
+      'id' of a book in that queryset, and all of them are loaded in one query
+    """
+    default_error_messages = {
+        'not_a_list': 'Expected a list of books but got type "{input_type}".',
+        'missing_id': 'This field is required.',
+        'invalid_id': 'A valid integer is required.',
+        'not_found': 'Book not found.',
+        'duplicate': 'Book {pk} appears more than once in this request.',
+    }
+
+    def __init__(self, *args, batch_size=500, **kwargs):
+        self.batch_size = batch_size
+        kwargs.setdefault('child', BookSerializer())
+        super().__init__(*args, **kwargs)
+
+    def get_author_ids(self, data):
+        ids = set()
+        for row in data:
+            value = row.get('author') if isinstance(row, dict) else None
+            if isinstance(value, int) and not isinstance(value, bool):
+                ids.add(value)
+            elif isinstance(value, str) and value.isdigit():
+                ids.add(int(value))
+        return ids
+
+    def get_instances(self, data):
+        """Load the books referenced by 'id' in one query; returns {pk: book}."""
+        ids = {parse_id(row.get('id')) for row in data if isinstance(row, dict)}
+        ids.discard(None)
+        return self.instance.in_bulk(ids)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError({
+                'non_field_errors': [self.error_messages['not_a_list'].format(input_type=type(data).__name__)]
+            })
+        if self.max_length is not None and len(data) > self.max_length:
+            raise serializers.ValidationError({
+                'non_field_errors': [self.error_messages['max_length'].format(max_length=self.max_length)]
+            })
+
+        self._context['authors'] = Author.objects.in_bulk(self.get_author_ids(data))
+        self._context['current_year'] = datetime.now().year
+        instances = self.get_instances(data) if self.instance is not None else None
+
+        validated, errors, seen = [], {}, set()
+        self.bulk_instances = []
+        for index, row in enumerate(data):
+            try:
+                if instances is not None:
+                    self.child.instance = self.get_row_instance(row, instances, seen)
+                attrs = self.child.run_validation(row)
+            except serializers.ValidationError as exc:
+                errors[index] = exc.detail
+            else:
+                validated.append(attrs)
+                self.bulk_instances.append(self.child.instance)
+        self.child.instance = None
+
+        if errors:
+            raise serializers.ValidationError(errors)
+        return validated
+
+    def get_row_instance(self, row, instances, seen):
+        value = row.get('id') if isinstance(row, dict) else None
+        if value is None:
+            raise serializers.ValidationError({'id': [self.error_messages['missing_id']]})
+        pk = parse_id(value)
+        if pk is None:
+            raise serializers.ValidationError({'id': [self.error_messages['invalid_id']]})
+        if pk in seen:
+            raise serializers.ValidationError({'id': [self.error_messages['duplicate'].format(pk=pk)]})
+        if pk not in instances:
+            raise serializers.ValidationError({'id': [self.error_messages['not_found']]})
+        seen.add(pk)
+        return instances[pk]
+
+    def create(self, validated_data):
+        books = [Book(**attrs) for attrs in validated_data]
+        return Book.objects.bulk_create(books, batch_size=self.batch_size)
+
+    def update(self, instance, validated_data):
+        fields = set()
+        updated_at = timezone.now()
+        for book, attrs in zip(self.bulk_instances, validated_data):
+            for attr, value in attrs.items():
+                setattr(book, attr, value)
+            # bulk_update() skips auto_now
+            book.updated_at = updated_at
+            fields.update(attrs)
+        if fields:
+            fields.add('updated_at')
+            Book.objects.bulk_update(self.bulk_instances, sorted(fields), batch_size=self.batch_size)
+        return self.bulk_instances
@@ -0,0 +1,29 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import response_cache
+from .instrumentation import install_query_timer
+from .nplusone import install_query_detector
+from .models import Author, Book
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def invalidate_cached_responses(sender, using, **kwargs):
+    """Orphan every cached API response built from the changed model."""
+    # Only once the write is committed: bumped earlier, a concurrent GET could
+    # still read the old rows and cache them under the new generation
+    transaction.on_commit(partial(response_cache.invalidate, sender), using=using)
+
+
+# Count and time the SQL of requests sampled by RequestMetricsMiddleware
+connection_created.connect(install_query_timer)
+
+# Look for N+1 queries in requests and tests (see api.nplusone)
+connection_created.connect(install_query_detector)
@@ -0,0 +1,127 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from .models import Author, Book
+
+
+@override_settings(API_RESPONSE_CACHE_TIMEOUT=0)
+class AsyncBookViewsTestCase(TestCase):
+    """
+    Tests for the async /async/books/ endpoints.
+
+    Responses are compared with the synchronous views, which share the
+    same filtering, searching, ordering, pagination and permissions.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User(username='asyncuser')
+        cls.user.set_unusable_password()
+        cls.user.save()
+        cls.author = Author.objects.create(name='Becky Chambers')
+        cls.other_author = Author.objects.create(name='Martha Wells')
+        cls.book = Book.objects.create(title='A Closed and Common Orbit', publication_year=2016, author=cls.author)
+        Book.objects.create(title='Record of a Spaceborn Few', publication_year=2018, author=cls.author)
+        Book.objects.create(title='All Systems Red', publication_year=2017, author=cls.other_author)
+        Book.objects.create(title='Network Effect', publication_year=2020, author=cls.other_author)
+
+    def setUp(self):
+        cache.clear()
+        self.books_url = reverse('async-book-list-create')
+        self.detail_url = reverse('async-book-detail', kwargs={'pk': self.book.pk})
+
+    async def assertSameAsSync(self, params):
+        async_response = await self.async_client.get(self.books_url, params)
+        sync_response = await self.async_client.get(reverse('book-list-create'), params)
+
+        self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+        # Pagination links point back at the view that produced them
+        self.assertEqual(
+            async_response.content.decode().replace('/api/async/books/', '/api/books/'),
+            sync_response.content.decode(),
+        )
+
+    async def test_list_matches_sync_view(self):
+        """Filtering, searching, ordering and pagination match BookListCreate"""
+        for params in [
+            {},
+            {'author__name': 'Martha Wells'},
+            {'publication_year': 2016},
+            {'search': 'record'},
+            {'ordering': '-title'},
+            {'page_size': 2, 'ordering': 'title'},
+        ]:
+            with self.subTest(params=params):
+                await self.assertSameAsSync(params)
+
+    async def test_pagination_links(self):
+        """Cursor links returned by the async list keep working"""
+        response = await self.async_client.get(self.books_url, {'page_size': 3})
+        titles = [book['title'] for book in response.json()['results']]
+
+        next_page = await self.async_client.get(response.json()['next'])
+
+        titles += [book['title'] for book in next_page.json()['results']]
+        self.assertEqual(len(titles), 4)
+        self.assertIsNone(next_page.json()['next'])
+
+    async def test_detail(self):
+        """GET /async/books/<pk>/ returns the book, unknown ids return 404"""
+        response = await self.async_client.get(self.detail_url)
+        self.assertEqual(response.json(), {
+            'id': self.book.pk, 'title': 'A Closed and Common Orbit', 'publication_year': 2016,
+            'author': self.author.pk,
+        })
+
+        response = await self.async_client.get(reverse('async-book-detail', kwargs={'pk': 99999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_create_requires_authentication(self):
+        """Anonymous writes are rejected like in the sync views"""
+        data = {'title': 'Exit Strategy', 'publication_year': 2018, 'author': self.other_author.pk}
+
+        response = await self.async_client.post(self.books_url, data, content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(await Book.objects.filter(title='Exit Strategy').aexists())
+
+    async def test_create(self):
+        """Authenticated users create books with acreate()"""
+        await self.async_client.aforce_login(self.user)
+        data = {'title': 'Exit Strategy', 'publication_year': 2018, 'author': self.other_author.pk}
+
+        response = await self.async_client.post(self.books_url, data, content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        book = await Book.objects.aget(title='Exit Strategy')
+        self.assertEqual(response.json()['id'], book.pk)
+        self.assertEqual(book.author_id, self.other_author.pk)
+
+    async def test_create_validation_errors(self):
+        """Serializer validation, including validate_publication_year, still applies"""
+        await self.async_client.aforce_login(self.user)
+        data = {'title': 'Future Book', 'publication_year': 3000, 'author': 99999}
+
+        response = await self.async_client.post(self.books_url, data, content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.json()), {'publication_year', 'author'})
+
+    async def test_update_and_delete(self):
+        """PATCH, PUT and DELETE go through asave() and adelete()"""
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.patch(self.detail_url, {'publication_year': 2017},
+                                                 content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['publication_year'], 2017)
+
+        data = {'title': 'A Closed and Common Orbit (Reissue)', 'publication_year': 2016, 'author': self.author.pk}
+        response = await self.async_client.put(self.detail_url, data, content_type='application/json')
+        self.assertEqual(response.json()['title'], 'A Closed and Common Orbit (Reissue)')
+
+        response = await self.async_client.delete(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(await Book.objects.filter(pk=self.book.pk).aexists())
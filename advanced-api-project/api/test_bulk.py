@@ -0,0 +1,223 @@
+import json
+from datetime import datetime
+from django.contrib.auth.models import User
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from .models import Author, Book
+from .views import BookBulk
+
+
+class BookBulkTestCase(APITestCase):
+    """
+    Tests for the /books/bulk/ endpoint.
+
+    Covers JSON array and JSON Lines bodies, per-row error reporting,
+    all-or-nothing writes, the query budget of a bulk write and permissions.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User(username='bulkuser')
+        cls.user.set_unusable_password()
+        cls.user.save()
+        cls.author1 = Author.objects.create(name='Toni Morrison')
+        cls.author2 = Author.objects.create(name='James Baldwin')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(user=self.user)
+        self.bulk_url = reverse('book-bulk')
+
+    def test_bulk_create_json_array(self):
+        """POST with a JSON array creates every book"""
+        data = [
+            {'title': 'Beloved', 'publication_year': 1987, 'author': self.author1.pk},
+            {'title': 'Sula', 'publication_year': 1973, 'author': self.author1.pk},
+            {'title': 'Giovanni’s Room', 'publication_year': 1956, 'author': self.author2.pk},
+        ]
+
+        response = self.client.post(self.bulk_url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([book['title'] for book in response.data], ['Beloved', 'Sula', 'Giovanni’s Room'])
+        self.assertTrue(all(book['id'] for book in response.data))
+        self.assertEqual(Book.objects.count(), 3)
+
+    def test_bulk_create_json_lines(self):
+        """POST with an application/x-ndjson body creates one book per line"""
+        body = '\n'.join(json.dumps({'title': f'Book {n}', 'publication_year': 2000, 'author': self.author2.pk})
+                         for n in range(5)) + '\n\n'
+
+        response = self.client.post(self.bulk_url, body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Book.objects.filter(author=self.author2).count(), 5)
+
+    def test_bulk_create_invalid_json_line(self):
+        """A malformed line is reported with its line number"""
+        body = '{"title": "Ok", "publication_year": 2000, "author": 1}\n{broken\n'
+
+        response = self.client.post(self.bulk_url, body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('line 2', str(response.data['detail']))
+
+    def test_bulk_create_query_budget(self):
+        """Validation resolves authors once and the inserts are batched"""
+        data = [
+            {'title': f'Book {n}', 'publication_year': 1990, 'author': (self.author1, self.author2)[n % 2].pk}
+            for n in range(50)
+        ]
+
+        # SAVEPOINT, author lookup, one INSERT per batch of 20, RELEASE
+        with self.assertNumQueries(6):
+            response = self.client.post(f'{self.bulk_url}?batch_size=20', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Book.objects.count(), 50)
+
+    def test_bulk_create_reports_errors_per_row(self):
+        """Invalid rows are reported by index and nothing is written"""
+        data = [
+            {'title': 'Valid', 'publication_year': 1990, 'author': self.author1.pk},
+            {'title': 'Future', 'publication_year': datetime.now().year + 1, 'author': self.author1.pk},
+            {'title': 'Valid Too', 'publication_year': 1991, 'author': self.author2.pk},
+            {'title': 'No Author', 'publication_year': 1992, 'author': 99999},
+        ]
+
+        response = self.client.post(self.bulk_url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['errors']
+        self.assertEqual(sorted(errors), [1, 3])
+        self.assertIn('publication_year', errors[1])
+        self.assertIn('author', errors[3])
+        self.assertFalse(Book.objects.exists())
+
+    def test_bulk_create_rejects_non_list(self):
+        """A single object is not accepted by the bulk endpoint"""
+        response = self.client.post(self.bulk_url, {'title': 'x'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('non_field_errors', response.data['errors'])
+
+    def test_bulk_partial_update(self):
+        """PATCH updates many books with bulk_update"""
+        book1 = Book.objects.create(title='Jazz', publication_year=1990, author=self.author1)
+        book2 = Book.objects.create(title='Paradise', publication_year=1990, author=self.author1)
+        data = [
+            {'id': book1.pk, 'publication_year': 1992},
+            {'id': book2.pk, 'publication_year': 1997, 'title': 'Paradise'},
+        ]
+
+        response = self.client.patch(self.bulk_url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        book1.refresh_from_db()
+        book2.refresh_from_db()
+        self.assertEqual((book1.title, book1.publication_year), ('Jazz', 1992))
+        self.assertEqual((book2.title, book2.publication_year), ('Paradise', 1997))
+
+    def test_bulk_update_unknown_and_duplicate_ids(self):
+        """Missing, unknown and repeated ids are reported per row"""
+        book = Book.objects.create(title='Jazz', publication_year=1992, author=self.author1)
+        data = [
+            {'id': book.pk, 'title': 'Jazz'},
+            {'id': book.pk, 'title': 'Jazz Again'},
+            {'id': 99999, 'title': 'Ghost'},
+            {'title': 'No Id'},
+        ]
+
+        response = self.client.patch(self.bulk_url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(sorted(response.data['errors']), [1, 2, 3])
+
+    def test_bulk_update_invalid_ids(self):
+        """Ids that are not integers are reported per row; numeric strings are accepted"""
+        book = Book.objects.create(title='Jazz', publication_year=1992, author=self.author1)
+        data = [
+            {'id': str(book.pk), 'title': 'Jazz'},
+            {'id': [book.pk], 'title': 'List'},
+            {'id': {'a': 1}, 'title': 'Object'},
+            {'id': True, 'title': 'Bool'},
+        ]
+
+        response = self.client.patch(self.bulk_url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(sorted(response.data['errors']), [1, 2, 3])
+        self.assertEqual(response.data['errors'][1]['id'], ['A valid integer is required.'])
+
+        response = self.client.patch(self.bulk_url, data[:1], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_bulk_delete(self):
+        """DELETE removes every listed book"""
+        books = [Book.objects.create(title=f'B{n}', publication_year=2000, author=self.author2) for n in range(3)]
+
+        response = self.client.delete(self.bulk_url, [books[0].pk, books[2].pk], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['deleted'], 2)
+        self.assertEqual(list(Book.objects.values_list('pk', flat=True)), [books[1].pk])
+
+    def test_bulk_delete_unknown_id(self):
+        """Unknown ids reject the whole delete"""
+        book = Book.objects.create(title='B', publication_year=2000, author=self.author2)
+
+        response = self.client.delete(self.bulk_url, [book.pk, 99999], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data['errors']), [1])
+        self.assertTrue(Book.objects.filter(pk=book.pk).exists())
+
+    def test_bulk_delete_invalid_ids(self):
+        """Ids that are not integers are reported per row; numeric strings are accepted"""
+        book = Book.objects.create(title='B', publication_year=2000, author=self.author2)
+
+        response = self.client.delete(self.bulk_url, [str(book.pk), {'a': 1}, [1], True, 1.5], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(sorted(response.data['errors']), [1, 2, 3, 4])
+        self.assertTrue(Book.objects.filter(pk=book.pk).exists())
+
+        response = self.client.delete(self.bulk_url, [str(book.pk)], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Book.objects.exists())
+
+    def test_bulk_delete_limits(self):
+        """DELETE rejects more than max_rows ids and checks them batch_size at a time"""
+        books = [Book.objects.create(title=f'B{n}', publication_year=2000, author=self.author2) for n in range(3)]
+        ids = [book.pk for book in books]
+
+        with mock.patch.object(BookBulk, 'max_rows', 2):
+            response = self.client.delete(self.bulk_url, ids, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'],
+                         {'non_field_errors': ['Ensure this field has no more than 2 elements.']})
+
+        # Two existence checks of two ids and one id
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.delete('%s?batch_size=2' % self.bulk_url, ids, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        checks = [query for query in context.captured_queries if query['sql'].startswith('SELECT "api_book"."id" AS')]
+        self.assertEqual(len(checks), 2)
+        self.assertFalse(Book.objects.exists())
+
+    def test_bulk_requires_authentication(self):
+        """Unauthenticated clients cannot use the bulk endpoint"""
+        self.client.force_authenticate(user=None)
+        data = [{'title': 'Beloved', 'publication_year': 1987, 'author': self.author1.pk}]
+
+        response = self.client.post(self.bulk_url, data, format='json')
+
+        self.assertIn(response.status_code, [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN])
+        self.assertFalse(Book.objects.exists())
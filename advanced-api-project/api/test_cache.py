@@ -0,0 +1,193 @@
+import tempfile
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from .cache import response_cache
+from .models import Author, Book
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'api-response-cache-tests'},
+})
+class BookResponseCacheTestCase(APITestCase):
+    """
+    Tests for the Book API response cache.
+
+    Covers hits and misses, query string normalization, invalidation through
+    model generations, the file-based backend and the statistics endpoint.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name='Octavia E. Butler')
+        cls.other_author = Author.objects.create(name='N. K. Jemisin')
+        cls.kindred = Book.objects.create(title='Kindred', publication_year=1979, author=cls.author)
+        cls.dawn = Book.objects.create(title='Dawn', publication_year=1987, author=cls.author)
+        cls.fifth_season = Book.objects.create(title='The Fifth Season', publication_year=2015,
+                                               author=cls.other_author)
+        cls.staff = User(username='cachestaff', is_staff=True)
+        cls.staff.set_unusable_password()
+        cls.staff.save()
+
+    def setUp(self):
+        cache.clear()
+        self.books_url = reverse('book-list-create')
+        self.detail_url = reverse('book-detail', kwargs={'pk': self.kindred.pk})
+
+    def test_second_request_is_served_from_cache(self):
+        """A repeated GET skips the database entirely"""
+        first = self.client.get(self.books_url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.books_url)
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.json(), first.json())
+
+    def test_detail_is_cached(self):
+        """Book detail responses are cached too"""
+        self.client.get(self.detail_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.detail_url)
+
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['title'], 'Kindred')
+
+    def test_query_string_is_normalized(self):
+        """Parameter order does not create separate entries"""
+        self.client.get(self.books_url, {'search': 'Butler', 'ordering': 'title'})
+        response = self.client.get(f'{self.books_url}?ordering=title&search=Butler')
+
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual([book['title'] for book in response.data], ['Dawn', 'Kindred'])
+
+    def test_different_parameters_are_cached_separately(self):
+        """Filters, ordering and pagination are part of the key"""
+        self.client.get(self.books_url, {'ordering': 'title'})
+
+        response = self.client.get(self.books_url, {'ordering': '-title'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data[0]['title'], 'The Fifth Season')
+
+        response = self.client.get(self.books_url, {'ordering': 'title', 'page_size': 1})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_book_save_invalidates_list_and_detail(self):
+        """post_save on Book bumps its generation"""
+        self.client.get(self.books_url)
+        self.client.get(self.detail_url)
+
+        # Generations are bumped once the write commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kindred.title = 'Kindred (Anniversary Edition)'
+            self.kindred.save()
+
+        list_response = self.client.get(self.books_url)
+        detail_response = self.client.get(self.detail_url)
+        self.assertEqual(list_response['X-Cache'], 'MISS')
+        self.assertIn('Kindred (Anniversary Edition)', [book['title'] for book in list_response.data])
+        self.assertEqual(detail_response['X-Cache'], 'MISS')
+        self.assertEqual(detail_response.data['title'], 'Kindred (Anniversary Edition)')
+
+    def test_generation_bumped_after_commit(self):
+        """A write bumps the generation only once its transaction commits"""
+        before = response_cache.get_generations([Book])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kindred.save()
+            self.assertEqual(response_cache.get_generations([Book]), before)
+
+        self.assertNotEqual(response_cache.get_generations([Book]), before)
+
+    def test_book_delete_invalidates_list(self):
+        """post_delete on Book bumps its generation"""
+        self.client.get(self.books_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dawn.delete()
+
+        response = self.client.get(self.books_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertNotIn('Dawn', [book['title'] for book in response.data])
+
+    def test_author_change_only_invalidates_dependent_views(self):
+        """Renaming an author refreshes author-name searches but not book details"""
+        self.client.get(self.books_url, {'author__name': 'Octavia E. Butler'})
+        self.client.get(self.detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.name = 'Octavia Estelle Butler'
+            self.author.save()
+
+        response = self.client.get(self.books_url, {'author__name': 'Octavia E. Butler'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data, [])
+        self.assertEqual(self.client.get(self.detail_url)['X-Cache'], 'HIT')
+
+    def test_api_writes_invalidate(self):
+        """Creating a book through the API is visible on the next list request"""
+        self.client.get(self.books_url)
+        self.client.force_authenticate(user=self.staff)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.books_url, {'title': 'Wild Seed', 'publication_year': 1980, 'author': self.author.pk})
+            bulk = [{'title': 'Parable of the Sower', 'publication_year': 1993, 'author': self.author.pk}]
+            self.client.post(reverse('book-bulk'), bulk, format='json')
+
+        titles = [book['title'] for book in self.client.get(self.books_url).data]
+        self.assertIn('Wild Seed', titles)
+        self.assertIn('Parable of the Sower', titles)
+
+    def test_errors_are_not_cached(self):
+        """404 responses are not stored"""
+        missing_url = reverse('book-detail', kwargs={'pk': 99999})
+        self.client.get(missing_url)
+
+        response = self.client.get(missing_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response_cache.stats()['misses'], 2)
+
+    @override_settings(API_RESPONSE_CACHE_TIMEOUT=0)
+    def test_timeout_zero_disables_cache(self):
+        """API_RESPONSE_CACHE_TIMEOUT = 0 turns response caching off"""
+        self.client.get(self.books_url)
+        response = self.client.get(self.books_url)
+
+        self.assertNotIn('X-Cache', response)
+
+    def test_file_based_backend(self):
+        """The cache works with the file-based backend"""
+        with tempfile.TemporaryDirectory() as location:
+            with override_settings(CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location},
+            }):
+                self.client.get(self.books_url)
+                self.assertEqual(self.client.get(self.books_url)['X-Cache'], 'HIT')
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    Book.objects.create(title='Fledgling', publication_year=2005, author=self.author)
+
+                response = self.client.get(self.books_url)
+                self.assertEqual(response['X-Cache'], 'MISS')
+                self.assertIn('Fledgling', [book['title'] for book in response.data])
+
+    def test_stats_endpoint(self):
+        """Staff can read and reset the hit and miss counters"""
+        stats_url = reverse('response-cache-stats')
+        self.client.get(self.books_url)
+        self.client.get(self.books_url)
+        self.client.get(self.books_url)
+
+        self.assertIn(self.client.get(stats_url).status_code,
+                      [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN])
+
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(stats_url)
+        self.assertEqual(response.data, {'hits': 2, 'misses': 1, 'hit_ratio': 2 / 3})
+
+        self.assertEqual(self.client.delete(stats_url).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(response_cache.stats()['hits'], 0)
@@ -0,0 +1,234 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.test import APITestCase
+from .models import Author, Book
+
+
+@override_settings(API_RESPONSE_CACHE_TIMEOUT=0)
+class ConditionalRequestTestCase(APITestCase):
+    """
+    Tests for ETag / Last-Modified handling on the book list and detail endpoints.
+
+    Covers 304 responses (with the response cache off, only the detail
+    skips the row query), validator changes on writes, and If-Match
+    protection against lost updates.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User(username='etaguser')
+        cls.user.set_unusable_password()
+        cls.user.save()
+        cls.author = Author.objects.create(name='Iain M. Banks')
+        cls.other_author = Author.objects.create(name='Ann Leckie')
+        cls.book = Book.objects.create(title='Excession', publication_year=1996, author=cls.author)
+        Book.objects.create(title='Use of Weapons', publication_year=1990, author=cls.author)
+        Book.objects.create(title='Ancillary Justice', publication_year=2013, author=cls.other_author)
+
+    def setUp(self):
+        cache.clear()
+        self.books_url = reverse('book-list-create')
+        self.detail_url = reverse('book-detail', kwargs={'pk': self.book.pk})
+
+    def assertNoRowQuery(self, queries):
+        for query in queries:
+            selected_columns = query['sql'].split(' FROM ')[0]
+            self.assertNotIn('"api_book"."title"', selected_columns)
+
+    def test_list_returns_validators(self):
+        """The list carries an ETag but no Last-Modified, and runs no aggregate for them"""
+        with self.assertNumQueries(1) as context:
+            response = self.client.get(self.books_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertNotIn('Last-Modified', response)
+        self.assertNotIn('COUNT', context.captured_queries[0]['sql'])
+
+    def test_list_not_modified(self):
+        """Without the response cache, If-None-Match is compared with a hash of the built page"""
+        etag = self.client.get(self.books_url)['ETag']
+
+        # The page is still loaded: only the body is saved
+        with self.assertNumQueries(1):
+            response = self.client.get(self.books_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_list_etag_changes_on_writes(self):
+        """Updates, deletions and author renames all produce a new ETag"""
+        params = {'expand': 'author'}
+        etags = {self.client.get(self.books_url, params)['ETag']}
+
+        Book.objects.filter(pk=self.book.pk).update(
+            title='Excession (Reissue)', updated_at=self.book.updated_at + timedelta(seconds=1),
+        )
+        etags.add(self.client.get(self.books_url, params)['ETag'])
+
+        Book.objects.filter(title='Use of Weapons').delete()
+        etags.add(self.client.get(self.books_url, params)['ETag'])
+
+        self.other_author.name = 'Ann Leckie (Author)'
+        self.other_author.save()
+        response = self.client.get(self.books_url, params, HTTP_IF_NONE_MATCH=', '.join(etags))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn(response['ETag'], etags)
+
+    def test_list_etag_depends_on_query(self):
+        """Each filter, ordering and page has its own ETag"""
+        etags = {
+            self.client.get(self.books_url, params)['ETag']
+            for params in [{}, {'ordering': 'title'}, {'author__name': 'Ann Leckie'}, {'page_size': 1}]
+        }
+
+        self.assertEqual(len(etags), 4)
+
+    def test_list_ignores_if_modified_since(self):
+        """Deletions do not move any timestamp, so If-Modified-Since alone never produces a 304 on lists"""
+        self.client.get(self.books_url)
+        Book.objects.filter(title='Use of Weapons').delete()
+
+        response = self.client.get(self.books_url, HTTP_IF_MODIFIED_SINCE=http_date())
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+    def test_detail_plain_get_has_no_extra_query(self):
+        """Validators of an unconditional GET come from the loaded book"""
+        with self.assertNumQueries(1):
+            response = self.client.get(self.detail_url)
+
+        self.assertIn('ETag', response)
+        self.assertEqual(response['Last-Modified'], http_date(self.book.updated_at.timestamp()))
+
+    def test_detail_not_modified_skips_row_query(self):
+        """If-None-Match or If-Modified-Since returns 304 from a one-column lookup"""
+        response = self.client.get(self.detail_url)
+
+        for headers in [{'HTTP_IF_NONE_MATCH': response['ETag']},
+                        {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']}]:
+            with self.subTest(headers=headers):
+                with self.assertNumQueries(1) as context:
+                    not_modified = self.client.get(self.detail_url, **headers)
+
+                self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(not_modified['ETag'], response['ETag'])
+                self.assertNoRowQuery(context.captured_queries)
+
+    def test_detail_etag_changes_after_update(self):
+        """Saving the book produces a new ETag"""
+        etag = self.client.get(self.detail_url)['ETag']
+
+        self.book.title = 'Excession (Reissue)'
+        self.book.save()
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_missing_book_is_404(self):
+        """Conditional headers do not hide a missing book"""
+        response = self.client.get(reverse('book-detail', kwargs={'pk': 99999}), HTTP_IF_NONE_MATCH='"x"')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_update_with_current_if_match(self):
+        """PATCH with the current ETag succeeds and returns the new validators"""
+        self.client.force_authenticate(user=self.user)
+        etag = self.client.get(self.detail_url)['ETag']
+
+        response = self.client.patch(self.detail_url, {'publication_year': 1997}, HTTP_IF_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(self.detail_url)['ETag'], response['ETag'])
+
+    def test_update_with_stale_if_match_is_rejected(self):
+        """PUT/PATCH with an outdated ETag fails with 412 and changes nothing"""
+        self.client.force_authenticate(user=self.user)
+        etag = self.client.get(self.detail_url)['ETag']
+        self.client.patch(self.detail_url, {'title': 'Excession (First Edit)'})
+
+        response = self.client.patch(self.detail_url, {'title': 'Excession (Lost Update)'}, HTTP_IF_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.title, 'Excession (First Edit)')
+
+    def test_update_with_if_unmodified_since(self):
+        """If-Unmodified-Since older than the book rejects the write"""
+        self.client.force_authenticate(user=self.user)
+        earlier = http_date((self.book.updated_at - timedelta(days=1)).timestamp())
+
+        response = self.client.patch(self.detail_url, {'publication_year': 1997}, HTTP_IF_UNMODIFIED_SINCE=earlier)
+
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+    def test_delete_with_stale_if_match_is_rejected(self):
+        """DELETE honors If-Match as well"""
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.delete(self.detail_url, HTTP_IF_MATCH='"stale"')
+
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertTrue(Book.objects.filter(pk=self.book.pk).exists())
+
+    def test_bulk_update_sets_updated_at(self):
+        """bulk_update() writes updated_at although auto_now does not run"""
+        self.client.force_authenticate(user=self.user)
+        etag = self.client.get(self.detail_url)['ETag']
+
+        self.client.patch(reverse('book-bulk'), [{'id': self.book.pk, 'publication_year': 1997}], format='json')
+
+        self.book.refresh_from_db()
+        self.assertNotEqual(self.client.get(self.detail_url)['ETag'], etag)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'api-conditional-tests'},
+})
+class CachedConditionalRequestTestCase(APITestCase):
+    """Tests for conditional requests answered from the response cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(name='Iain M. Banks')
+        cls.book = Book.objects.create(title='Excession', publication_year=1996, author=author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_revalidation_from_cache_runs_no_query(self):
+        """A cached list or detail answers If-None-Match without touching the database"""
+        for url in [reverse('book-list-create'), reverse('book-detail', kwargs={'pk': self.book.pk})]:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+
+                with self.assertNumQueries(0):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(response['X-Cache'], 'HIT')
+                self.assertEqual(response['ETag'], etag)
+
+    def test_list_etag_follows_generations(self):
+        """A committed write changes the list ETag, so an old one gets the new page"""
+        url = reverse('book-list-create')
+        etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.title = 'Excession (Reissue)'
+            self.book.save()
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([book['title'] for book in response.data], ['Excession (Reissue)'])
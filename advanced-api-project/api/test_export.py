@@ -0,0 +1,89 @@
+import json
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from .models import Author, Book
+from .views import BookExport
+
+
+class BookExportTestCase(APITestCase):
+    """
+    Tests for the streaming GET /books/export/ endpoint.
+
+    Verifies both output formats, that the body is streamed, and that the
+    list view's filter/search/ordering parameters are honored.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author1 = Author.objects.create(name='Italo Calvino')
+        cls.author2 = Author.objects.create(name='Elsa Morante')
+        Book.objects.create(title='Invisible Cities', publication_year=1972, author=cls.author1)
+        Book.objects.create(title='The Baron in the Trees', publication_year=1957, author=cls.author1)
+        Book.objects.create(title='If on a winter’s night a traveler', publication_year=1979, author=cls.author1)
+        Book.objects.create(title='History', publication_year=1974, author=cls.author2)
+        Book.objects.create(title='Arturo’s Island', publication_year=1957, author=cls.author2)
+
+    def setUp(self):
+        cache.clear()
+        self.export_url = reverse('book-export')
+        self.books_url = reverse('book-list-create')
+
+    def read_lines(self, response):
+        body = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(body.endswith('\n'))
+        return [json.loads(line) for line in body.splitlines()]
+
+    def test_jsonl_is_default(self):
+        """The export streams JSON Lines matching the list endpoint"""
+        response = self.client.get(self.export_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(self.read_lines(response), self.client.get(self.books_url).json())
+
+    def test_json_array_is_byte_identical(self):
+        """?format=json streams the same bytes the list endpoint renders"""
+        response = self.client.get(self.export_url, {'format': 'json'})
+
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(b''.join(response.streaming_content), self.client.get(self.books_url).content)
+
+    def test_chunk_boundaries(self):
+        """Small chunk sizes still produce a single valid document"""
+        original = BookExport.chunk_size
+        BookExport.chunk_size = 2
+        try:
+            array = self.client.get(self.export_url, {'format': 'json'})
+            chunks = list(array.streaming_content)
+            lines = self.read_lines(self.client.get(self.export_url))
+        finally:
+            BookExport.chunk_size = original
+
+        self.assertGreater(len(chunks), 3)
+        self.assertEqual(b''.join(chunks), self.client.get(self.books_url).content)
+        self.assertEqual(len(lines), 5)
+
+    def test_export_honors_filters_search_and_ordering(self):
+        """Filters, search and ordering work exactly as on the list view"""
+        params = {'author__name': 'Italo Calvino', 'search': 'the', 'ordering': '-publication_year'}
+
+        lines = self.read_lines(self.client.get(self.export_url, params))
+
+        self.assertEqual(lines, self.client.get(self.books_url, params).json())
+        self.assertEqual([book['title'] for book in lines], ['The Baron in the Trees'])
+
+    def test_export_ignores_pagination(self):
+        """Pagination parameters do not truncate the export"""
+        lines = self.read_lines(self.client.get(self.export_url, {'page_size': 2}))
+
+        self.assertEqual(len(lines), 5)
+
+    def test_export_is_read_only(self):
+        """The export endpoint does not accept writes"""
+        response = self.client.post(self.export_url, {})
+
+        self.assertIn(response.status_code, [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN,
+                                             status.HTTP_405_METHOD_NOT_ALLOWED])
@@ -0,0 +1,156 @@
+import json
+import re
+import time
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from .instrumentation import Histogram, RequestMetrics, query_timer, request_metrics_store
+from .models import Author, Book
+
+
+@override_settings(
+    API_RESPONSE_CACHE_TIMEOUT=0,
+    REQUEST_METRICS_SAMPLE_RATE=1.0,
+    REQUEST_METRICS_CACHE_ALIAS='request-metrics-tests',
+    REQUEST_METRICS_FLUSH_INTERVAL=0,
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'api-tests'},
+        'request-metrics-tests': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'api-request-metrics-tests',
+        },
+    },
+)
+class RequestMetricsTestCase(APITestCase):
+    """
+    Tests for RequestMetricsMiddleware.
+
+    Covers the Server-Timing header, query counting, the serializer and
+    template phases, sampling and the request_metrics command.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(name='Ursula K. Le Guin')
+        cls.book = Book.objects.create(title='The Dispossessed', publication_year=1974, author=author)
+
+    def setUp(self):
+        request_metrics_store.reset()
+
+    def server_timing(self, response):
+        return {
+            name: float(duration)
+            for name, duration in re.findall(r'(\w+);dur=([\d.]+)', response['Server-Timing'])
+        }
+
+    def test_server_timing_header(self):
+        """Sampled responses report every phase and the query count"""
+        # The rows; the ETag comes from the cache generations
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('book-list-create'))
+
+        timings = self.server_timing(response)
+        self.assertEqual(set(timings), {'db', 'serialize', 'template', 'render', 'total'})
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+        self.assertGreater(timings['db'], 0)
+        self.assertGreater(timings['serialize'], 0)
+        self.assertLessEqual(timings['db'] + timings['serialize'] + timings['render'], timings['total'] + 0.05)
+
+    def test_template_time(self):
+        """HTML responses rendered through templates report template time"""
+        response = self.client.get(reverse('book-list-create'), HTTP_ACCEPT='text/html')
+
+        self.assertGreater(self.server_timing(response)['template'], 0)
+
+    def test_sampling_off(self):
+        """With a sample rate of 0 nothing is measured or recorded"""
+        with self.settings(REQUEST_METRICS_SAMPLE_RATE=0.0):
+            response = self.client.get(reverse('book-list-create'))
+
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(request_metrics_store.load(), {})
+
+    def test_header_can_be_disabled(self):
+        """REQUEST_METRICS_SERVER_TIMING=False still records the request"""
+        with self.settings(REQUEST_METRICS_SERVER_TIMING=False):
+            response = self.client.get(reverse('book-list-create'))
+
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(request_metrics_store.load()['book-list-create']['total'].count, 1)
+
+    def test_async_view(self):
+        """Queries run by async views through sync_to_async() are counted"""
+        response = self.client.get(reverse('async-book-detail', kwargs={'pk': self.book.pk}))
+
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+    def test_histograms_per_view(self):
+        """Requests are aggregated per URL name and reported by the command"""
+        for _ in range(3):
+            self.client.get(reverse('book-list-create'))
+        self.client.get(reverse('book-detail', kwargs={'pk': self.book.pk}))
+
+        out = StringIO()
+        call_command('request_metrics', '--format', 'json', stdout=out)
+        report = json.loads(out.getvalue())
+
+        self.assertEqual(set(report), {'book-list-create', 'book-detail'})
+        self.assertEqual(report['book-list-create']['total']['count'], 3)
+        self.assertEqual(report['book-list-create']['queries']['p99'], 1)
+        self.assertEqual(set(report['book-detail']['db']), {'p50', 'p95', 'p99', 'count'})
+
+        call_command('request_metrics', '--reset', stdout=StringIO())
+        self.assertEqual(request_metrics_store.load(), {})
+
+    def test_query_timer_installed_once(self):
+        """Every connection carries the query timer exactly once"""
+        connection.close()
+        connection.ensure_connection()
+        self.assertEqual(connection.execute_wrappers.count(query_timer), 1)
+
+    def test_flush_interval(self):
+        """Histograms stay in the process until the flush interval passes"""
+        with self.settings(REQUEST_METRICS_FLUSH_INTERVAL=3600):
+            request_metrics_store.flush()
+            self.client.get(reverse('book-list-create'))
+            self.assertEqual(request_metrics_store.load(), {})
+
+            request_metrics_store.flush()
+        self.assertEqual(request_metrics_store.load()['book-list-create']['total'].count, 1)
+
+
+class InstrumentationTestCase(SimpleTestCase):
+    """Tests for the building blocks of the request metrics."""
+
+    def test_phases_are_exclusive(self):
+        """Time in a nested phase is not counted in the outer phase"""
+        metrics = RequestMetrics()
+        metrics.enter('serialize')
+        metrics.enter('db')
+        time.sleep(0.02)
+        metrics.exit()
+        metrics.exit()
+        metrics.finish()
+
+        self.assertGreaterEqual(metrics.durations['db'], 0.02)
+        self.assertLess(metrics.durations['serialize'], 0.01)
+        self.assertEqual(metrics.stack, [])
+
+    def test_histogram_percentiles(self):
+        """Percentiles are read from buckets rounded to two significant digits"""
+        histogram = Histogram()
+        for value in range(1, 101):
+            histogram.add(value)
+        other = Histogram()
+        other.add(1234.5)
+        histogram.merge(other)
+
+        self.assertEqual(histogram.count, 101)
+        self.assertEqual(histogram.percentile(50), 51)
+        self.assertEqual(histogram.percentile(99), 100)
+        self.assertEqual(histogram.percentile(100), 1200)
+        self.assertIsNone(Histogram().percentile(50))
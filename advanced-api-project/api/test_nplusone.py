@@ -0,0 +1,67 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from .models import Author, Book
+from .nplusone import NPlusOneDetector, NPlusOneError, NPlusOneTestMixin, detect_n_plus_one
+
+
+class NPlusOneDetectorTestCase(NPlusOneTestMixin, TestCase):
+    """
+    Tests for the N+1 query detector.
+
+    Covers query fingerprints, call sites, the raise and log actions and
+    the per-request scope of NPlusOneMiddleware.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ['Octavia E. Butler', 'N. K. Jemisin', 'Ann Leckie']:
+            author = Author.objects.create(name=name)
+            Book.objects.create(title='%s novel' % name, publication_year=2000, author=author)
+
+    def test_lazy_relation_in_loop_raises(self):
+        """Reading book.author for every book is reported at the second author query"""
+        with self.assertRaisesMessage(NPlusOneError, 'FROM "api_author" WHERE "api_author"."id" = %s') as context:
+            with self.assertNoNPlusOne():
+                [book.author.name for book in Book.objects.all()]
+
+        self.assertIn('2 identical queries from api/test_nplusone.py:', str(context.exception))
+
+    def test_eager_loading_passes(self):
+        """The same loop with select_related() runs one query"""
+        with self.assertNoNPlusOne(), self.assertNumQueries(1):
+            [book.author.name for book in Book.objects.select_related('author')]
+
+    def test_same_query_from_different_lines(self):
+        """Identical queries from separate lines of code are not a loop"""
+        with self.assertNoNPlusOne():
+            Book.objects.filter(author__name='Ann Leckie').first()
+            Book.objects.filter(author__name='N. K. Jemisin').first()
+
+    def test_log_action(self):
+        """In 'log' mode each repeated query is logged once with its final count"""
+        with self.assertLogs('api.nplusone', 'WARNING') as logs:
+            with detect_n_plus_one('log') as detector:
+                [book.author.name for book in Book.objects.all()]
+
+        self.assertEqual(list(detector.get_repeated().values()), [3])
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('3 identical queries', logs.output[0])
+
+    def test_requests_are_checked_separately(self):
+        """The same query in consecutive requests is not an N+1"""
+        book = Book.objects.first()
+        url = reverse('book-detail', kwargs={'pk': book.pk})
+
+        for _ in range(3):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_fingerprint(self):
+        """Literals and IN lists do not change the fingerprint"""
+        fingerprint = NPlusOneDetector.fingerprint
+
+        self.assertEqual(
+            fingerprint('SELECT "a" FROM "t"  WHERE "id" IN (%s, %s, %s) LIMIT 21'),
+            fingerprint('SELECT "a" FROM "t" WHERE "id" IN (%s) LIMIT 1'),
+        )
+        self.assertEqual(fingerprint("SELECT 1 FROM t WHERE name = 'it''s'"), 'SELECT ? FROM t WHERE name = ?')
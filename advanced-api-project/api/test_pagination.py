@@ -0,0 +1,164 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from .models import Author, Book
+from .pagination import KeysetPagination
+
+
+class BookKeysetPaginationTestCase(APITestCase):
+    """
+    Tests for keyset pagination on the Book list endpoint.
+
+    Test Data Setup:
+    - Two authors and 11 books, several of them sharing a publication year
+      and one sharing a title, so the id tie-breaker is exercised
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author1 = Author.objects.create(name='Ursula K. Le Guin')
+        cls.author2 = Author.objects.create(name='Octavia E. Butler')
+        rows = [
+            ('A Wizard of Earthsea', 1968, cls.author1),
+            ('The Left Hand of Darkness', 1969, cls.author1),
+            ('The Lathe of Heaven', 1971, cls.author1),
+            ('The Dispossessed', 1974, cls.author1),
+            ('Kindred', 1979, cls.author2),
+            ('Wild Seed', 1980, cls.author2),
+            ('Dawn', 1987, cls.author2),
+            ('Adulthood Rites', 1988, cls.author2),
+            ('Imago', 1989, cls.author2),
+            ('Imago', 1989, cls.author2),
+            ('Parable of the Sower', 1993, cls.author2),
+        ]
+        for title, year, author in rows:
+            Book.objects.create(title=title, publication_year=year, author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.books_url = reverse('book-list-create')
+
+    def collect(self, params, direction='next'):
+        """Walk every page and return the concatenated list of book ids."""
+        response = self.client.get(self.books_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [book['id'] for book in response.data['results']]
+        while response.data[direction]:
+            response = self.client.get(response.data[direction])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(book['id'] for book in response.data['results'])
+        return ids
+
+    def test_unpaginated_without_parameters(self):
+        """Without ?page_size or ?cursor the endpoint still returns a plain list"""
+        response = self.client.get(self.books_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 11)
+
+    def test_first_page(self):
+        """?page_size limits the results and provides a next link"""
+        response = self.client.get(self.books_url, {'page_size': 4})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertIsNotNone(response.data['next'])
+        self.assertIsNone(response.data['previous'])
+
+    def test_walk_default_ordering(self):
+        """Walking all pages matches Meta.ordering with id as tie-breaker"""
+        expected = list(Book.objects.order_by('publication_year', 'title', 'id').values_list('id', flat=True))
+
+        self.assertEqual(self.collect({'page_size': 3}), expected)
+
+    def test_walk_descending_title(self):
+        """Keyset pagination follows ?ordering=-title"""
+        expected = list(Book.objects.order_by('-title', '-id').values_list('id', flat=True))
+
+        self.assertEqual(self.collect({'page_size': 2, 'ordering': '-title'}), expected)
+
+    def test_walk_descending_publication_year(self):
+        """Keyset pagination follows ?ordering=-publication_year"""
+        expected = list(Book.objects.order_by('-publication_year', '-id').values_list('id', flat=True))
+
+        self.assertEqual(self.collect({'page_size': 4, 'ordering': '-publication_year'}), expected)
+
+    def test_previous_link(self):
+        """Following 'previous' from the last page returns the pages in reverse"""
+        response = self.client.get(self.books_url, {'page_size': 3})
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+        last_page = [book['id'] for book in response.data['results']]
+
+        previous_ids = []
+        while response.data['previous']:
+            response = self.client.get(response.data['previous'])
+            previous_ids = [book['id'] for book in response.data['results']] + previous_ids
+
+        expected = list(Book.objects.order_by('publication_year', 'title', 'id').values_list('id', flat=True))
+        self.assertEqual(previous_ids + last_page, expected)
+
+    def test_pagination_with_filter_and_search(self):
+        """Pagination composes with filtering and searching"""
+        params = {'author__name': 'Ursula K. Le Guin', 'search': 'the'}
+        ids = self.collect({'page_size': 2, **params})
+        # Search results are ordered by relevance; pages follow the same order
+        expected = [book['id'] for book in self.client.get(self.books_url, params).data]
+
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(ids, expected)
+        self.assertEqual(
+            sorted(ids),
+            sorted(Book.objects.filter(author=self.author1, title__icontains='the').values_list('id', flat=True)),
+        )
+
+    def test_page_size_is_capped(self):
+        """page_size above max_page_size is clamped"""
+        response = self.client.get(self.books_url, {'page_size': 100000})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 11)
+        self.assertIsNone(response.data['next'])
+
+    def test_invalid_cursor_returns_404(self):
+        """A malformed cursor is rejected with 404"""
+        response = self.client.get(self.books_url, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_cursor_returns_404(self):
+        """Cursor positions of the wrong type are rejected with 404, not a server error"""
+        for position in [[{'a': 1}, 'x', 1], ['abc', 'x', 1], [1977, 'x', [1]], [1977, None, 1], [True, 'x', 1]]:
+            with self.subTest(position=position):
+                cursor = KeysetPagination.encode_position(position)
+                response = self.client.get(self.books_url, {'cursor': cursor})
+
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_values_are_coerced(self):
+        """A numeric string in a cursor is read as the field's type"""
+        cursor = KeysetPagination.encode_position(['1980', 'Wild Seed', '0'])
+        response = self.client.get(self.books_url, {'cursor': cursor, 'page_size': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([book['title'] for book in response.data['results']], ['Wild Seed', 'Dawn'])
+
+    def test_id_tie_breaker_follows_last_field(self):
+        """Duplicate titles are ordered by id in the direction of the ordering"""
+        ids = self.collect({'page_size': 1, 'ordering': '-title', 'title': 'Imago'})
+
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(ids), 2)
+
+    def test_deep_page_query_has_no_offset(self):
+        """Pages after the first are fetched with a WHERE clause, not OFFSET"""
+        first = self.client.get(self.books_url, {'page_size': 5})
+        # Only the page itself: the ETag comes from the cache generations
+        with self.assertNumQueries(1) as context:
+            self.client.get(first.data['next'])
+
+        sql = context.captured_queries[0]['sql'].upper()
+        self.assertIn('LIMIT', sql)
+        self.assertNotIn('OFFSET', sql)
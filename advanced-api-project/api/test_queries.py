@@ -0,0 +1,87 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from .models import Author, Book
+from .serializers import AuthorSerializer
+
+
+class QueryCountTestCase(APITestCase):
+    """
+    Query-count regression tests for the API endpoints.
+
+    Each test measures an endpoint at two data sizes and asserts the number of
+    queries does not grow with the number of rows (no N+1 queries).
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def create_authors(self, count, books_per_author=3):
+        # Run the commit hooks so that cached responses are invalidated
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(count):
+                author = Author.objects.create(name=f'Author {index}')
+                Book.objects.bulk_create(
+                    Book(title=f'Book {index}-{number}', publication_year=1950 + number, author=author)
+                    for number in range(books_per_author)
+                )
+
+    def test_author_list_uses_constant_queries(self):
+        """GET /authors/ runs the same number of queries for 2 or 20 authors"""
+        url = reverse('author-list')
+
+        self.create_authors(2)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+        self.create_authors(18)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data), 20)
+
+    def test_author_list_nested_books(self):
+        """Prefetched books are rendered exactly like the plain serializer would"""
+        self.create_authors(3)
+
+        response = self.client.get(reverse('author-list'))
+
+        expected = AuthorSerializer(Author.objects.all(), many=True).data
+        self.assertEqual(response.data, expected)
+
+    def test_prefetch_loads_only_rendered_columns(self):
+        """The books prefetch query selects only the columns BookSerializer renders"""
+        self.create_authors(1)
+
+        with self.assertNumQueries(2) as context:
+            self.client.get(reverse('author-list'))
+
+        books_sql = context.captured_queries[1]['sql']
+        self.assertIn('"api_book"."publication_year"', books_sql)
+        self.assertNotIn('"api_author"."name"', books_sql)
+
+    def test_book_list_uses_constant_queries(self):
+        """GET /books/ runs a single row query regardless of the number of books"""
+        url = reverse('book-list-create')
+
+        self.create_authors(1)
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+        self.create_authors(10)
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    def test_book_str_does_not_query(self):
+        """str(book) never triggers a query for the author"""
+        self.create_authors(1, books_per_author=1)
+        book = Book.objects.get()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(str(book), 'Book 0-0')
+
+        book = Book.objects.select_related('author').get()
+        with self.assertNumQueries(0):
+            self.assertEqual(str(book), 'Book 0-0 by Author 0')
@@ -0,0 +1,39 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from .management.commands.check_query_plans import Command
+
+
+class QueryPlanTestCase(TestCase):
+    """
+    Runs the check_query_plans command against the migrated test database so
+    that removing or changing an index breaks the test suite.
+    """
+
+    @override_settings(ALLOWED_HOSTS=['localhost'])
+    def test_representative_queries_use_indexes(self):
+        """No representative list/detail query falls back to a full table scan"""
+        out = StringIO()
+
+        call_command('check_query_plans', stdout=out)
+
+        self.assertIn('All checked queries use indexes.', out.getvalue())
+        self.assertNotIn('FAIL', out.getvalue())
+
+    def test_full_scan_detection(self):
+        """Plain table scans are flagged; index scans and subqueries are not"""
+        command = Command()
+
+        self.assertTrue(command.is_full_scan('SCAN api_book'))
+        self.assertTrue(command.is_full_scan('SCAN TABLE api_book'))
+        self.assertFalse(command.is_full_scan('SCAN api_book USING INDEX api_book_title_idx'))
+        self.assertFalse(command.is_full_scan('SEARCH api_book USING INTEGER PRIMARY KEY (rowid=?)'))
+        self.assertFalse(command.is_full_scan('SCAN (subquery-1)'))
+
+    def test_search_query_is_detected_as_full_scan(self):
+        """Sanity check: a LIKE '%term%' search is reported as a full scan"""
+        errors, _, _ = Command().inspect(
+            "SELECT id FROM api_book WHERE title LIKE '%hobbit%' ESCAPE '\\'"
+        )
+
+        self.assertEqual(errors, ['SCAN api_book'])
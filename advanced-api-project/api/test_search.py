@@ -0,0 +1,134 @@
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from .models import Author, Book
+from .search import SQLiteFTS5SearchBackend
+from .views import BookListCreate
+
+
+class NoFullTextSearchBackend(SQLiteFTS5SearchBackend):
+    """Backend that behaves like a database without FTS support."""
+
+    def is_available(self, using):
+        return False
+
+
+class BookFullTextSearchTestCase(APITestCase):
+    """
+    Tests for ?search= on the book list backed by the FTS5 index.
+
+    Covers LIKE-compatible matching, relevance ordering, the fallbacks to
+    SearchFilter and the triggers that keep the index in sync.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.le_guin = Author.objects.create(name='Ursula K. Le Guin')
+        cls.tolkien = Author.objects.create(name='J.R.R. Tolkien')
+        cls.dispossessed = Book.objects.create(title='The Dispossessed', publication_year=1974, author=cls.le_guin)
+        cls.earthsea = Book.objects.create(title='A Wizard of Earthsea', publication_year=1968, author=cls.le_guin)
+        cls.hobbit = Book.objects.create(title='The Hobbit', publication_year=1937, author=cls.tolkien)
+        cls.silmarillion = Book.objects.create(title='The Silmarillion', publication_year=1977, author=cls.tolkien)
+
+    def setUp(self):
+        cache.clear()
+        self.books_url = reverse('book-list-create')
+
+    def search(self, term, **params):
+        response = self.client.get(self.books_url, {'search': term, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [book['title'] for book in response.data]
+
+    def test_search_uses_fts_index(self):
+        """Searches of three or more characters query the FTS table instead of LIKE"""
+        with CaptureQueriesContext(connection) as context:
+            self.search('hobbit')
+
+        sql = context.captured_queries[-1]['sql']
+        self.assertIn('api_book_fts', sql)
+        self.assertNotIn('LIKE', sql)
+
+    def test_search_matches_like_semantics(self):
+        """Matches are case-insensitive substrings of the title or author name"""
+        for term in ['HOBB', 'arth', 'tolkien', 'Le Guin', 'Silmarillion']:
+            with self.subTest(term=term):
+                expected = set(
+                    Book.objects.filter(title__icontains=term).values_list('title', flat=True)
+                ) | set(
+                    Book.objects.filter(author__name__icontains=term).values_list('title', flat=True)
+                )
+                self.assertEqual(set(self.search(term)), expected)
+
+    def test_search_requires_every_term(self):
+        """Multiple terms must all match, as with SearchFilter"""
+        self.assertEqual(self.search('the tolkien'), ['The Hobbit', 'The Silmarillion'])
+
+    def test_search_orders_by_relevance(self):
+        """Without ?ordering= the better match comes first"""
+        Book.objects.create(title='Tolkien: A Biography of Tolkien', publication_year=2000, author=self.le_guin)
+
+        titles = self.search('tolkien')
+
+        self.assertEqual(titles[0], 'Tolkien: A Biography of Tolkien')
+        self.assertEqual(len(titles), 3)
+
+    def test_explicit_ordering_wins(self):
+        """?ordering= overrides relevance ordering"""
+        self.assertEqual(
+            self.search('the', ordering='-publication_year'),
+            ['The Silmarillion', 'The Dispossessed', 'The Hobbit'],
+        )
+
+    def test_short_term_falls_back_to_like(self):
+        """Terms shorter than the trigram minimum use SearchFilter's LIKE lookups"""
+        with CaptureQueriesContext(connection) as context:
+            titles = self.search('ob')
+
+        self.assertEqual(titles, ['The Hobbit'])
+        self.assertNotIn('api_book_fts', context.captured_queries[-1]['sql'])
+
+    def test_fallback_without_fts(self):
+        """Databases without FTS keep the regular SearchFilter behaviour"""
+        with mock.patch.object(BookListCreate, 'search_backend', NoFullTextSearchBackend):
+            with CaptureQueriesContext(connection) as context:
+                titles = self.search('hobbit')
+
+        self.assertEqual(titles, ['The Hobbit'])
+        self.assertIn('LIKE', context.captured_queries[-1]['sql'])
+
+    def test_index_follows_book_changes(self):
+        """Creating, renaming and deleting books update the index"""
+        # Cached responses are invalidated once each write commits
+        with self.captureOnCommitCallbacks(execute=True):
+            book = Book.objects.create(title='Lavinia', publication_year=2008, author=self.le_guin)
+        self.assertEqual(self.search('lavinia'), ['Lavinia'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            book.title = 'Lavinia (Reissue)'
+            book.save()
+        self.assertEqual(self.search('reissue'), ['Lavinia (Reissue)'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            book.delete()
+        self.assertEqual(self.search('lavinia'), [])
+
+    def test_index_follows_author_rename(self):
+        """Renaming an author updates every book of that author"""
+        Author.objects.filter(pk=self.tolkien.pk).update(name='John Ronald Reuel Tolkien')
+
+        self.assertEqual(self.search('Ronald'), ['The Hobbit', 'The Silmarillion'])
+
+    def test_index_follows_bulk_operations(self):
+        """bulk_create() and QuerySet.update() bypass signals but not the triggers"""
+        Book.objects.bulk_create([
+            Book(title='Always Coming Home', publication_year=1985, author=self.le_guin),
+            Book(title='Unfinished Tales', publication_year=1980, author=self.tolkien),
+        ])
+        Book.objects.filter(pk=self.hobbit.pk).update(author=self.le_guin)
+
+        self.assertEqual(self.search('coming home'), ['Always Coming Home'])
+        self.assertEqual(self.search('tolkien', ordering='title'), ['The Silmarillion', 'Unfinished Tales'])
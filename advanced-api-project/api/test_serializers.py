@@ -0,0 +1,98 @@
+from datetime import datetime
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from .models import Author, Book
+from .serializers import AuthorSerializer, BookSerializer
+
+
+class ReadOnlyFastPathTestCase(APITestCase):
+    """
+    Tests that the values_list() fast path renders exactly what the per-field
+    ModelSerializer path renders, for querysets, instance lists and nested data.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author1 = Author.objects.create(name='Chinua Achebe')
+        cls.author2 = Author.objects.create(name='Ngũgĩ wa Thiong\'o')
+        Author.objects.create(name='No Books Yet')
+        Book.objects.create(title='Things Fall Apart', publication_year=1958, author=cls.author1)
+        Book.objects.create(title='No Longer at Ease', publication_year=1960, author=cls.author1)
+        Book.objects.create(title='Arrow of God', publication_year=1964, author=cls.author1)
+        Book.objects.create(title='Weep Not, Child', publication_year=1964, author=cls.author2)
+        Book.objects.create(title='A Grain of Wheat', publication_year=1967, author=cls.author2)
+
+    def render(self, data):
+        return JSONRenderer().render(data)
+
+    def slow_books(self, instances):
+        return serializers.ListSerializer(child=BookSerializer(), instance=instances).data
+
+    def slow_authors(self, instances):
+        return serializers.ListSerializer(child=AuthorSerializer(), instance=instances).data
+
+    def test_book_queryset_is_byte_identical(self):
+        """values_list() rows render byte-identical JSON to the per-field path"""
+        queryset = Book.objects.all()
+
+        fast = BookSerializer(queryset, many=True).data
+
+        self.assertEqual(self.render(fast), self.render(self.slow_books(list(queryset))))
+
+    def test_book_queryset_uses_values_list(self):
+        """An unevaluated queryset is serialized with a single values_list() query"""
+        with self.assertNumQueries(1) as context:
+            BookSerializer(Book.objects.all(), many=True).data
+
+        sql = context.captured_queries[0]['sql']
+        self.assertIn('"api_book"."author_id"', sql)
+
+    def test_book_instances_are_byte_identical(self):
+        """Lists of instances (e.g. paginated pages) use the attribute path"""
+        instances = list(Book.objects.all())
+
+        with self.assertNumQueries(0):
+            fast = BookSerializer(instances, many=True).data
+
+        self.assertEqual(self.render(fast), self.render(self.slow_books(instances)))
+
+    def test_author_queryset_is_byte_identical(self):
+        """Nested author/books output matches the prefetch-based serializer"""
+        queryset = Author.objects.all()
+
+        with self.assertNumQueries(2):
+            fast = AuthorSerializer(queryset, many=True).data
+
+        slow = self.slow_authors(list(AuthorSerializer.setup_eager_loading(Author.objects.all())))
+        self.assertEqual(self.render(fast), self.render(slow))
+
+    def test_author_instances_are_byte_identical(self):
+        """Prefetched author instances reuse the prefetched books"""
+        instances = list(AuthorSerializer.setup_eager_loading(Author.objects.all()))
+
+        with self.assertNumQueries(0):
+            fast = AuthorSerializer(instances, many=True).data
+
+        self.assertEqual(self.render(fast), self.render(self.slow_authors(instances)))
+
+    def test_list_endpoints_are_byte_identical(self):
+        """The list endpoints render the same bytes as the per-field serializer"""
+        response = self.client.get('/api/books/', {'ordering': '-title'})
+        slow = self.slow_books(list(Book.objects.order_by('-title')))
+        self.assertEqual(response.content, self.render(slow))
+
+        response = self.client.get('/api/authors/')
+        slow = self.slow_authors(list(AuthorSerializer.setup_eager_loading(Author.objects.all())))
+        self.assertEqual(response.content, self.render(slow))
+
+    def test_write_path_still_validates(self):
+        """The single-object write path keeps validate_publication_year"""
+        serializer = BookSerializer(data={
+            'title': 'Future Book',
+            'publication_year': datetime.now().year + 1,
+            'author': self.author1.pk,
+        })
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('publication_year', serializer.errors)
@@ -0,0 +1,204 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from .models import Author, Book
+
+
+@override_settings(API_RESPONSE_CACHE_TIMEOUT=0)
+class SparseFieldsetTestCase(APITestCase):
+    """
+    Tests for ?fields= and ?expand= on the book and author endpoints.
+
+    Covers the rendered fields, the columns and joins in the SQL, pagination
+    with a projection, validation errors and conditional GET validators.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User(username='sparseuser')
+        cls.user.set_unusable_password()
+        cls.user.save()
+        cls.author = Author.objects.create(name='Ted Chiang')
+        cls.other_author = Author.objects.create(name='Kelly Link')
+        cls.book = Book.objects.create(title='Exhalation', publication_year=2019, author=cls.author)
+        Book.objects.create(title='Stories of Your Life', publication_year=2002, author=cls.author)
+        Book.objects.create(title='Get in Trouble', publication_year=2015, author=cls.other_author)
+
+    def setUp(self):
+        cache.clear()
+        self.books_url = reverse('book-list-create')
+        self.detail_url = reverse('book-detail', kwargs={'pk': self.book.pk})
+
+    def row_query(self, queries):
+        return queries[-1]['sql']
+
+    def test_fields_limit_output_and_columns(self):
+        """?fields=id,title renders and selects only id and title"""
+        with self.assertNumQueries(1) as context:
+            response = self.client.get(self.books_url, {'fields': 'title,id'})
+
+        self.assertEqual([set(book) for book in response.json()], [{'id', 'title'}] * 3)
+        sql = self.row_query(context.captured_queries)
+        self.assertNotIn('"api_book"."author_id"', sql)
+        self.assertNotIn('"api_book"."publication_year"', sql.split(' FROM ')[0])
+
+    def test_payload_shrinks(self):
+        """The sparse response is smaller than the full one"""
+        full = self.client.get(self.books_url).content
+        sparse = self.client.get(self.books_url, {'fields': 'id,title'}).content
+
+        self.assertLess(len(sparse), len(full) * 0.75)
+
+    def test_paginated_projection(self):
+        """Pages load the requested and ordering columns only, and cursors still work"""
+        with self.assertNumQueries(1) as context:
+            response = self.client.get(self.books_url, {'fields': 'title', 'page_size': 2})
+
+        sql = self.row_query(context.captured_queries)
+        self.assertNotIn('"api_book"."author_id"', sql)
+        self.assertEqual(response.json()['results'], [{'title': 'Stories of Your Life'}, {'title': 'Get in Trouble'}])
+
+        next_page = self.client.get(response.json()['next'])
+        self.assertEqual(next_page.json()['results'], [{'title': 'Exhalation'}])
+
+    def test_expand_author(self):
+        """?expand=author nests the author and joins it in the same query"""
+        with self.assertNumQueries(1) as context:
+            response = self.client.get(self.books_url, {'expand': 'author', 'ordering': 'title'})
+
+        self.assertEqual(response.json()[0], {
+            'id': self.book.pk, 'title': 'Exhalation', 'publication_year': 2019,
+            'author': {'id': self.author.pk, 'name': 'Ted Chiang'},
+        })
+        self.assertIn('JOIN "api_author"', self.row_query(context.captured_queries))
+
+    def test_no_join_without_expand(self):
+        """The plain list never joins the author table for its rows"""
+        with self.assertNumQueries(1) as context:
+            self.client.get(self.books_url, {'page_size': 2})
+
+        self.assertNotIn('JOIN "api_author"', self.row_query(context.captured_queries))
+
+    def test_expand_requires_field(self):
+        """Expanding a field left out by ?fields= has no effect"""
+        response = self.client.get(self.books_url, {'fields': 'id', 'expand': 'author'})
+
+        self.assertEqual(set(response.json()[0]), {'id'})
+
+    def test_invalid_names_are_rejected(self):
+        """Unknown fields and non-expandable fields return 400"""
+        response = self.client.get(self.books_url, {'fields': 'id,isbn', 'expand': 'title'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {
+            'fields': ['Unknown field(s): isbn.'],
+            'expand': ['Field(s) cannot be expanded: title.'],
+        })
+
+    def test_writes_ignore_fields(self):
+        """POST validates and returns the full book"""
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.post('%s?fields=id' % self.books_url,
+                                    {'title': 'Magic for Beginners', 'publication_year': 2005,
+                                     'author': self.other_author.pk})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(set(response.json()), {'id', 'title', 'publication_year', 'author'})
+
+    def test_detail(self):
+        """The detail view supports ?fields= and ?expand=author in one query"""
+        with self.assertNumQueries(1):
+            response = self.client.get(self.detail_url, {'fields': 'title,author', 'expand': 'author'})
+
+        self.assertEqual(response.json(), {
+            'title': 'Exhalation', 'author': {'id': self.author.pk, 'name': 'Ted Chiang'},
+        })
+
+    def test_detail_etag_per_representation(self):
+        """Each fieldset has its own ETag; an expanded author is part of it"""
+        plain = self.client.get(self.detail_url)['ETag']
+        sparse = self.client.get(self.detail_url, {'fields': 'title'})['ETag']
+        expanded = self.client.get(self.detail_url, {'expand': 'author'})
+        self.assertEqual(len({plain, sparse, expanded['ETag']}), 3)
+
+        response = self.client.get(self.detail_url, {'expand': 'author'}, HTTP_IF_NONE_MATCH=expanded['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.author.name = 'Ted Chiang (Author)'
+        self.author.save()
+        response = self.client.get(self.detail_url, {'expand': 'author'}, HTTP_IF_NONE_MATCH=expanded['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['author']['name'], 'Ted Chiang (Author)')
+
+    def test_if_match_uses_plain_etag(self):
+        """Writes are checked against the ETag of the plain detail"""
+        self.client.force_authenticate(user=self.user)
+        etag = self.client.get(self.detail_url)['ETag']
+
+        response = self.client.patch(self.detail_url, {'publication_year': 2020}, HTTP_IF_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_author_fields_skip_books(self):
+        """?fields=id,name on authors runs a single query"""
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('author-list'), {'fields': 'id,name'})
+
+        self.assertEqual(response.json(), [
+            {'id': self.other_author.pk, 'name': 'Kelly Link'},
+            {'id': self.author.pk, 'name': 'Ted Chiang'},
+        ])
+
+    def test_author_books_without_id(self):
+        """Nested books are grouped correctly when the author id is not rendered"""
+        response = self.client.get(reverse('author-list'), {'fields': 'books,name'})
+
+        self.assertEqual(response.json()[1]['name'], 'Ted Chiang')
+        self.assertEqual([book['title'] for book in response.json()[1]['books']],
+                         ['Stories of Your Life', 'Exhalation'])
+        self.assertNotIn('id', response.json()[1])
+
+    def test_export_and_async_views(self):
+        """The export and the async list honor the same parameters"""
+        params = {'fields': 'title', 'expand': 'author', 'format': 'json'}
+        expected = self.client.get(self.books_url, params).content
+
+        export = self.client.get(reverse('book-export'), params)
+        async_list = self.client.get(reverse('async-book-list-create'), params)
+
+        self.assertEqual(b''.join(export.streaming_content), expected)
+        self.assertEqual(async_list.content, expected)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'api-sparse-tests'},
+})
+class CachedSparseFieldsetTestCase(APITestCase):
+    """Tests for sparse fieldsets combined with the response cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name='Ted Chiang')
+        cls.book = Book.objects.create(title='Exhalation', publication_year=2019, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_expanded_detail_follows_author_changes(self):
+        """A cached ?expand=author detail is invalidated by author writes"""
+        url = reverse('book-detail', kwargs={'pk': self.book.pk})
+        self.client.get(url, {'expand': 'author'})
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.name = 'Ted Chiang (Author)'
+            self.author.save()
+
+        response = self.client.get(url, {'expand': 'author'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['author']['name'], 'Ted Chiang (Author)')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
@@ -1,14 +1,16 @@
 from django.test import TestCase
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from datetime import datetime
 from .models import Author, Book
+from .nplusone import NPlusOneTestMixin
 from .serializers import BookSerializer, AuthorSerializer
 
 
-class BookAPITestCase(APITestCase):
+class BookAPITestCase(NPlusOneTestMixin, APITestCase):
     """
     Comprehensive unit tests for the Book API endpoints.
 
@@ -17,6 +19,7 @@ class BookAPITestCase(APITestCase):
     2. Permissions: Ensure proper access control for authenticated vs unauthenticated users
     3. Validation: Test custom serializer validation (future publication year)
     4. Querying: Test filtering, searching, and ordering functionality
+    5. N+1 queries: NPlusOneTestMixin fails any request that repeats a query per row
 
     Test Data Setup:
     - Creates multiple authors and books with varied data for comprehensive testing
@@ -32,6 +35,9 @@ class BookAPITestCase(APITestCase):
         - Multiple authors and books for comprehensive testing
         - Authenticated and unauthenticated API clients
         """
+        # Responses cached by earlier tests would otherwise outlive their rows
+        cache.clear()
+
         # Create test user for authentication
         self.user = User.objects.create_user(
             username='testuser',
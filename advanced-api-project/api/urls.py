@@ -1,5 +1,8 @@
 from django.urls import path
-from .views import BookListCreate, BookRetrieveUpdateDestroy
+from .views import (
+    AsyncBookListCreate, AsyncBookRetrieveUpdateDestroy, AuthorList, BookBulk, BookExport, BookListCreate,
+    BookRetrieveUpdateDestroy, ResponseCacheStats,
+)
 
 urlpatterns = [
     # Book list and creation endpoint
@@ -7,10 +10,35 @@ urlpatterns = [
     # POST /books/ - Create a new book (requires authentication)
     path('books/', BookListCreate.as_view(), name='book-list-create'),
 
+    # Streaming book export
+    # GET /books/export/ - Stream all matching books as JSON Lines (?format=json for an array)
+    path('books/export/', BookExport.as_view(), name='book-export'),
+
+    # Bulk book writes (require authentication)
+    # POST /books/bulk/ - Create many books from a JSON array or JSON Lines body
+    # PUT/PATCH /books/bulk/ - Update many books; every row carries its 'id'
+    # DELETE /books/bulk/ - Delete the books listed as an array of ids
+    path('books/bulk/', BookBulk.as_view(), name='book-bulk'),
+
     # Book detail, update, and delete endpoint
     # GET /books/<int:pk>/ - Retrieve a specific book (accessible to all users)
     # PUT /books/<int:pk>/ - Update a specific book (requires authentication)
     # PATCH /books/<int:pk>/ - Partially update a specific book (requires authentication)
     # DELETE /books/<int:pk>/ - Delete a specific book (requires authentication)
     path('books/<int:pk>/', BookRetrieveUpdateDestroy.as_view(), name='book-detail'),
+
+    # Async (ASGI-native) book endpoints, same behavior as books/ and books/<int:pk>/
+    # GET/POST /async/books/ - List or create books
+    # GET/PUT/PATCH/DELETE /async/books/<int:pk>/ - Retrieve, update or delete a book
+    path('async/books/', AsyncBookListCreate.as_view(), name='async-book-list-create'),
+    path('async/books/<int:pk>/', AsyncBookRetrieveUpdateDestroy.as_view(), name='async-book-detail'),
+
+    # Author list endpoint
+    # GET /authors/ - List all authors with their nested books (accessible to all users)
+    path('authors/', AuthorList.as_view(), name='author-list'),
+
+    # Response cache statistics (staff only)
+    # GET /cache/stats/ - Hit and miss counters of the book response cache
+    # DELETE /cache/stats/ - Reset the counters
+    path('cache/stats/', ResponseCacheStats.as_view(), name='response-cache-stats'),
 ]
@@ -1,12 +1,383 @@
-from rest_framework import generics
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from rest_framework.filters import SearchFilter, OrderingFilter
+from functools import partial
+
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework import generics, status
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, NotFound, ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.permissions import SAFE_METHODS, IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.request import Request
+from rest_framework.serializers import ListSerializer
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Book
-from .serializers import BookSerializer
+from .cache import normalize_query_params, response_cache
+from .conditional import evaluate_preconditions, make_etag, set_headers, validator_headers
+from .models import Author, Book
+from .pagination import BookKeysetPagination
+from .parsers import JSONLinesParser
+from .renderers import JSONLinesRenderer, dumps, iter_json_array, iter_json_lines
+from .search import FullTextSearchFilter, RelevanceOrderingFilter, SQLiteFTS5SearchBackend
+from .serializers import AuthorSerializer, BookBulkSerializer, BookSerializer, parse_id
+
+
+class EagerLoadingQuerysetMixin:
+    """
+    Applies the serializer's declared select_related/prefetch_related to the queryset.
+
+    Serializers built on EagerLoadingMixin describe which relations they read;
+    this mixin calls their setup_eager_loading() from get_queryset() so every
+    view using the serializer loads those relations in a fixed number of queries.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        setup_eager_loading = getattr(self.get_serializer_class(), 'setup_eager_loading', None)
+        if setup_eager_loading is not None:
+            queryset = setup_eager_loading(queryset, **self.get_eager_loading_options())
+        return queryset
+
+    def get_eager_loading_options(self):
+        return {}
+
+
+class SparseFieldsetViewMixin:
+    """
+    Lets GET requests pick the fields they need with ?fields= and ?expand=.
+
+    Query Parameters:
+    - ?fields=id,title: render only these serializer fields
+    - ?expand=author: render a relation from the serializer's
+      expandable_fields as a nested object instead of its id
+
+    Both parameters drive the serializer (SparseFieldsetMixin in
+    api.serializers) and the ORM projection:
+    - QuerySet.only() loads just the columns behind the rendered fields,
+      plus the ordering columns and any get_validator_columns()
+    - Relations are joined (select_related) or prefetched only when rendered
+      or expanded, e.g. ?fields=id,name on authors skips the books query
+
+    Unknown or non-expandable names are rejected with 400 Bad Request.
+    Writes ignore both parameters and always use the full serializer.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def get_sparse_fieldset(self):
+        """Return {'fields': [...] or None, 'expand': [...]} for this request."""
+        if getattr(self, '_sparse_fieldset', None) is None:
+            self._sparse_fieldset = self.parse_sparse_fieldset()
+        return self._sparse_fieldset
+
+    def parse_names(self, param):
+        value = self.request.query_params.get(param, '')
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        return names or None
+
+    def parse_sparse_fieldset(self):
+        fieldset = {'fields': None, 'expand': []}
+        if self.request.method not in SAFE_METHODS:
+            return fieldset
+
+        serializer_class = self.get_serializer_class()
+        available = list(serializer_class().fields)
+        expandable = list(getattr(serializer_class, 'expandable_fields', {}))
+        fields = self.parse_names(self.fields_query_param)
+        expand = self.parse_names(self.expand_query_param) or []
+
+        errors = {}
+        unknown = set(fields or ()).difference(available)
+        if unknown:
+            errors[self.fields_query_param] = ['Unknown field(s): %s.' % ', '.join(sorted(unknown))]
+        unknown = set(expand).difference(expandable)
+        if unknown:
+            errors[self.expand_query_param] = ['Field(s) cannot be expanded: %s.' % ', '.join(sorted(unknown))]
+        if errors:
+            raise ValidationError(errors)
+
+        if fields is not None:
+            fieldset['fields'] = [name for name in available if name in fields]
+        fieldset['expand'] = [
+            name for name in expandable
+            if name in expand and (fields is None or name in fields)
+        ]
+        return fieldset
+
+    def is_sparse(self):
+        fieldset = self.get_sparse_fieldset()
+        return fieldset['fields'] is not None or bool(fieldset['expand'])
+
+    def get_serializer(self, *args, **kwargs):
+        fieldset = self.get_sparse_fieldset()
+        if fieldset['fields'] is not None:
+            kwargs.setdefault('fields', fieldset['fields'])
+        if fieldset['expand']:
+            kwargs.setdefault('expand', fieldset['expand'])
+        return super().get_serializer(*args, **kwargs)
 
+    def get_eager_loading_options(self):
+        return self.get_sparse_fieldset()
 
-class BookListCreate(generics.ListCreateAPIView):
+    def get_required_columns(self, queryset):
+        """Columns loaded whatever the fieldset: ordering columns (read by keyset pagination) and validators."""
+        opts = queryset.model._meta
+        concrete = {field.name for field in opts.concrete_fields}
+        ordering = [name.lstrip('-') for name in list(queryset.query.order_by) or list(opts.ordering)
+                    if isinstance(name, str)]
+        columns = [name for name in ordering if name in concrete]
+        get_validator_columns = getattr(self, 'get_validator_columns', None)
+        if get_validator_columns is not None:
+            columns += get_validator_columns()
+        return columns
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not self.is_sparse():
+            return queryset
+        get_projection = getattr(self.get_serializer(), 'get_projection', None)
+        projection = get_projection() if get_projection is not None else None
+        if projection is None:
+            return queryset
+        return queryset.only(*projection, *self.get_required_columns(queryset))
+
+
+class CachedResponseMixin:
+    """
+    Serves GET requests from the response cache.
+
+    The serialized response data of successful GETs is stored in
+    api.cache.response_cache under a key made of the path, the normalized
+    query string and the generations of cache_dependencies. Writes to any of
+    those models bump their generation, so cached entries are never stale.
+
+    Cached responses skip the database and serialization; only rendering
+    runs. Every GET carries an X-Cache: HIT or MISS header.
+
+    When combined with a conditional GET mixin, the ETag/Last-Modified
+    validators are cached with the data, so a revalidation that hits the
+    cache is answered with 304 without any query.
+    """
+    # Models whose changes invalidate this view's cached responses
+    cache_dependencies = ()
+
+    cached_headers = ('ETag', 'Last-Modified')
+
+    def get_cache_dependencies(self):
+        return self.cache_dependencies
+
+    def get(self, request, *args, **kwargs):
+        if not response_cache.enabled:
+            return super().get(request, *args, **kwargs)
+
+        key = response_cache.make_key(request, self.get_cache_dependencies())
+        entry = response_cache.get(key)
+        if entry is not None:
+            response = None
+            if entry['validators'] is not None:
+                response = evaluate_preconditions(request, **entry['validators'])
+            if response is None:
+                response = Response(entry['data'])
+            set_headers(response, entry['headers'])
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response_cache.set(key, {
+                'data': response.data,
+                'headers': {header: response[header] for header in self.cached_headers if header in response},
+                'validators': getattr(self, 'validators', None),
+            })
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag and Last-Modified to GET responses and answers revalidations with 304.
+
+    Subclasses implement get_validators(), which must be cheap: it returns
+    (etag, last_modified) computed without loading or serializing the
+    rows. When the client's If-None-Match (or, where allowed,
+    If-Modified-Since) matches, a 304 is returned before the row query runs.
+    Subclasses whose validators can only come from the built response
+    override validators_before_response() and get_response_validators();
+    a match then still spares sending the body.
+
+    The validators used for the request are kept on the view as
+    self.validators for CachedResponseMixin.
+    """
+    # Whether If-Modified-Since alone may produce a 304
+    last_modified_is_validator = True
+
+    # Whether unconditional GETs may compute the validators after the
+    # response, from what it loaded; otherwise they are computed first, so
+    # a concurrent write can only make the ETag older than the body
+    validators_from_response = False
+
+    precondition_headers = ('HTTP_IF_MATCH', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'HTTP_IF_UNMODIFIED_SINCE')
+
+    def get_validators(self):
+        raise NotImplementedError('get_validators() must return (etag, last_modified).')
+
+    def get_response_validators(self, response):
+        """Validators of a successful response built without them; get_validators() by default."""
+        return self.get_validators()
+
+    def validators_before_response(self, request):
+        return self.is_conditional(request) or not self.validators_from_response
+
+    def is_conditional(self, request):
+        return any(header in request.META for header in self.precondition_headers)
+
+    def set_validators(self, etag, last_modified):
+        self.validators = None if etag is None else {
+            'etag': etag,
+            'last_modified': last_modified if self.last_modified_is_validator else None,
+        }
+        self.validator_headers = validator_headers(etag, last_modified)
+
+    def get(self, request, *args, **kwargs):
+        self.validators = None
+        if self.validators_before_response(request):
+            self.set_validators(*self.get_validators())
+            if self.validators is not None:
+                response = evaluate_preconditions(request, **self.validators)
+                if response is not None:
+                    return set_headers(response, self.validator_headers)
+
+        response = super().get(request, *args, **kwargs)
+        if self.validators is None and response.status_code == status.HTTP_200_OK:
+            self.set_validators(*self.get_response_validators(response))
+            if self.validators is not None and self.is_conditional(request):
+                not_modified = evaluate_preconditions(request, **self.validators)
+                if not_modified is not None:
+                    return set_headers(not_modified, self.validator_headers)
+        if self.validators is not None:
+            set_headers(response, self.validator_headers)
+        return response
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    """
+    Conditional GET for list views, without a query over the whole list.
+
+    The ETag covers the path, the normalized query string and the response
+    format, so every filter, ordering and page has its own, plus:
+    - with the response cache enabled, the generations of
+      cache_dependencies, which every committed write to those models
+      bumps (see api.signals). They are read from the cache before the view
+      runs, so a matching If-None-Match is answered with 304 without any
+      query; like the cached responses, writes that bypass the signals
+      (QuerySet.update(), bulk_create()) must call response_cache.invalidate()
+    - otherwise a hash of the response data, computed once the page is
+      built. A matching If-None-Match then only saves sending the body:
+      the rows are still loaded and serialized, so a 304 that skips the
+      row query needs the response cache
+
+    Lists carry no Last-Modified: it would take a MAX(updated_at) over
+    every matching row, and deleting a book does not move it anyway.
+    """
+    last_modified_is_validator = False
+
+    # Models whose writes change the list, and so its ETag
+    cache_dependencies = ()
+
+    def get_cache_dependencies(self):
+        return self.cache_dependencies
+
+    def validators_before_response(self, request):
+        return response_cache.enabled
+
+    def get_etag(self, *parts):
+        return make_etag(
+            self.request.path, normalize_query_params(self.request), self.request.accepted_renderer.format, *parts,
+        )
+
+    def get_validators(self):
+        return self.get_etag(response_cache.get_generations(self.get_cache_dependencies())), None
+
+    def get_response_validators(self, response):
+        return self.get_etag(response.data), None
+
+
+class ConditionalObjectMixin(ConditionalGetMixin):
+    """
+    Conditional GET and optimistic concurrency for detail views.
+
+    The validators are the object's updated_at (see get_validator_columns()).
+    Conditional requests fetch it with a one-column query before anything
+    else; plain GETs take it from the loaded object, so they cost no extra
+    query. PUT, PATCH and DELETE honor If-Match and If-Unmodified-Since:
+    if the object changed since the client fetched it, the write is
+    rejected with 412 Precondition Failed instead of overwriting it.
+    Successful updates return the new ETag and Last-Modified.
+
+    The ETag of a GET also covers its query string, since ?fields= and
+    ?expand= change the representation. Writes compare against the ETag of
+    the plain GET /<pk>/.
+    """
+
+    validators_from_response = True
+
+    def get_object(self):
+        self.object = super().get_object()
+        return self.object
+
+    def get_validator_columns(self):
+        """Timestamp columns (lookups from the object) that the representation depends on."""
+        return ['updated_at']
+
+    def get_validators(self, for_update=False):
+        columns = self.get_validator_columns()
+        # Once the object is loaded its own updated_at is authoritative
+        instance = getattr(self, 'object', None)
+        if instance is not None and not for_update:
+            values = []
+            for column in columns:
+                value = instance
+                for attr in column.split('__'):
+                    value = getattr(value, attr)
+                values.append(value)
+            return self.make_validators(instance.pk, *values)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        if for_update:
+            queryset = queryset.select_for_update()
+        row = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]}).order_by().values_list(
+            'pk', *columns,
+        ).first()
+        if row is None:
+            return None, None
+        return self.make_validators(*row)
+
+    def make_validators(self, pk, *updated_at):
+        variant = normalize_query_params(self.request) if self.request.method in SAFE_METHODS else []
+        etag = make_etag(pk, *updated_at, self.request.accepted_renderer.format, variant)
+        return etag, max(updated_at)
+
+    def check_write_preconditions(self):
+        etag, last_modified = self.get_validators(for_update=True)
+        if etag is not None:
+            evaluate_preconditions(self.request, etag=etag, last_modified=last_modified)
+
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            self.check_write_preconditions()
+            response = super().update(request, *args, **kwargs)
+        return set_headers(response, validator_headers(*self.get_validators()))
+
+    def destroy(self, request, *args, **kwargs):
+        with transaction.atomic():
+            self.check_write_preconditions()
+            return super().destroy(request, *args, **kwargs)
+
+
+class BookListCreate(CachedResponseMixin, ConditionalListMixin, SparseFieldsetViewMixin, EagerLoadingQuerysetMixin,
+                     generics.ListCreateAPIView):
     """
     Generic view for listing all books and creating new books with advanced querying capabilities.
 
@@ -22,22 +393,49 @@ class BookListCreate(generics.ListCreateAPIView):
        - Filter by publication year: ?publication_year=2023
        - Multiple filters can be combined: ?publication_year=2023&author__name=John
 
-    2. SEARCHING (SearchFilter):
+    2. SEARCHING (FullTextSearchFilter):
        - Search across title and author name: ?search=fiction
        - Performs case-insensitive partial matching
        - Searches in both book title and related author's name
        - Example: ?search=tolkien (finds books by Tolkien or with "tolkien" in title)
+       - Answered from the SQLite FTS5 index (search_backend); falls back to
+         SearchFilter's LIKE lookups on other databases or for terms shorter
+         than three characters
 
-    3. ORDERING (OrderingFilter):
+    3. ORDERING (RelevanceOrderingFilter):
        - Order by title: ?ordering=title (ascending) or ?ordering=-title (descending)
        - Order by publication year: ?ordering=publication_year or ?ordering=-publication_year
        - Multiple ordering: ?ordering=publication_year,title
        - Default ordering follows model's Meta.ordering
+       - Full-text search results without ?ordering= are sorted by relevance first
+
+    4. PAGINATION (BookKeysetPagination):
+       - Opt-in: ?page_size=50 returns {"next", "previous", "results"}
+       - Follow the 'next'/'previous' links (?cursor=...) to move between pages
+       - Keyset based, so deep pages cost the same as the first one
+       - Respects the active ordering, including ?ordering=-title
+
+    5. SPARSE FIELDSETS (SparseFieldsetViewMixin):
+       - Only some fields: ?fields=id,title (loads just those columns)
+       - Nested author instead of its id: ?expand=author ({"id", "name"},
+         joined with select_related only when requested)
 
     Combined Query Examples:
     - ?publication_year=2023&search=fiction&ordering=-title
     - ?author__name=Stephen King&ordering=publication_year
     - ?search=fantasy&ordering=-publication_year
+    - ?search=fantasy&ordering=-publication_year&page_size=20
+    - ?fields=id,title&page_size=100
+
+    Caching (CachedResponseMixin):
+    - GET responses are cached per normalized query string
+    - Invalidated whenever a Book or Author is saved or deleted
+
+    Conditional Requests (ConditionalListMixin):
+    - Responses carry an ETag made from the Book and Author cache
+      generations, or from the page itself when the cache is disabled
+    - If-None-Match returns 304 Not Modified; from the generations, without
+      loading any book, or, with the cache disabled, after building the page
 
     Permissions:
     - Uses IsAuthenticatedOrReadOnly permission class
@@ -54,7 +452,7 @@ class BookListCreate(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     # Configure filter backends
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, RelevanceOrderingFilter]
 
     # Configure filtering fields
     # Allows exact matching on these fields
@@ -64,6 +462,9 @@ class BookListCreate(generics.ListCreateAPIView):
     # Allows partial, case-insensitive searching across these fields
     search_fields = ['title', 'author__name']
 
+    # Full-text index used for ?search= when the database supports it
+    search_backend = SQLiteFTS5SearchBackend
+
     # Configure ordering fields
     # Allows ordering by these fields (use - prefix for descending order)
     ordering_fields = ['title', 'publication_year']
@@ -71,8 +472,160 @@ class BookListCreate(generics.ListCreateAPIView):
     # Default ordering when no ordering is specified
     ordering = ['publication_year', 'title']
 
+    # Keyset pagination, enabled per request with ?page_size= or ?cursor=
+    pagination_class = BookKeysetPagination
+
+    # Books are filtered and searched by author name too
+    cache_dependencies = (Book, Author)
+
+
+class BookExport(BookListCreate):
+    """
+    Streaming export of books for unbounded result sets.
+
+    Handles:
+    - GET /books/export/: Streams every matching book (accessible to all users)
+
+    Output Formats:
+    - ?format=jsonl (default): JSON Lines, one book object per line
+    - ?format=json: a single JSON array, byte-identical to the list endpoint
+
+    Query Features:
+    - Inherits filtering, searching and ordering from BookListCreate, so
+      ?author__name=, ?search= and ?ordering= behave exactly as on /books/
+    - Pagination parameters are ignored; the export always covers all matches
+
+    Memory Usage:
+    - Rows are read with values_list().iterator(chunk_size=...) and written
+      through a StreamingHttpResponse in chunks of chunk_size rows, so peak
+      memory stays flat regardless of how many books match
+    """
+    http_method_names = ['get', 'head', 'options']
+    renderer_classes = [JSONLinesRenderer, JSONRenderer]
+    pagination_class = None
+
+    # Rows fetched from the database and written to the client per chunk
+    chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = self.get_serializer(many=True).iter_representation(queryset, self.chunk_size)
+
+        renderer = request.accepted_renderer
+        if renderer.format == JSONLinesRenderer.format:
+            stream = iter_json_lines(rows, self.chunk_size)
+        else:
+            stream = iter_json_array(rows, self.chunk_size)
+        return StreamingHttpResponse(stream, content_type=renderer.media_type)
+
+
+class BookBulk(generics.GenericAPIView):
+    """
+    Bulk endpoint for creating, updating and deleting many books per request.
+
+    Handles (all require authentication):
+    - POST /books/bulk/: Creates every book in the body
+    - PATCH /books/bulk/: Partially updates books; each row must include 'id'
+    - PUT /books/bulk/: Fully updates books; each row must include 'id'
+    - DELETE /books/bulk/: Deletes the books whose ids are listed in the body
+
+    Request Bodies:
+    - A JSON array (Content-Type: application/json)
+    - JSON Lines, one book per line (Content-Type: application/x-ndjson)
+    - DELETE takes a list of ids, e.g. [1, 2, 3]
+    - At most max_rows (50000) rows or ids per request
+
+    Validation and Errors:
+    - Rows are validated in one pass by BookBulkSerializer: authors are
+      resolved with a single query and validate_publication_year still runs
+    - Any invalid row rejects the whole request with 400 and errors keyed by
+      row index: {"errors": {"3": {"publication_year": [...]}}}
+
+    Writing:
+    - All writes run inside one transaction using bulk_create/bulk_update
+    - ?batch_size= (default 500, max 5000) controls rows per INSERT/UPDATE,
+      and ids per existence check and DELETE
+    """
+    queryset = Book.objects.all()
+    serializer_class = BookBulkSerializer
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, JSONLinesParser]
+    filter_backends = []
+    pagination_class = None
+
+    # Rows per statement and the most rows accepted in one request
+    batch_size = 500
+    max_batch_size = 5000
+    max_rows = 50000
+
+    def get_batch_size(self):
+        try:
+            batch_size = int(self.request.query_params['batch_size'])
+        except (KeyError, ValueError):
+            return self.batch_size
+        return min(max(batch_size, 1), self.max_batch_size)
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('batch_size', self.get_batch_size())
+        kwargs.setdefault('max_length', self.max_rows)
+        return super().get_serializer(*args, **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        return self.perform_write(serializer, status.HTTP_201_CREATED)
+
+    def put(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.get_queryset(), data=request.data)
+        return self.perform_write(serializer, status.HTTP_200_OK)
+
+    def patch(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.get_queryset(), data=request.data, partial=True)
+        return self.perform_write(serializer, status.HTTP_200_OK)
+
+    def perform_write(self, serializer, success_status):
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            serializer.save()
+            # bulk_create() and bulk_update() do not send post_save
+            transaction.on_commit(partial(response_cache.invalidate, Book))
+        return Response(serializer.data, status=success_status)
 
-class BookRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
+    def delete(self, request, *args, **kwargs):
+        ids = request.data
+        if not isinstance(ids, list):
+            return Response({'errors': {'non_field_errors': ['Expected a list of book ids.']}},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.max_rows:
+            message = ListSerializer.default_error_messages['max_length'].format(max_length=self.max_rows)
+            return Response({'errors': {'non_field_errors': [message]}}, status=status.HTTP_400_BAD_REQUEST)
+
+        batch_size = self.get_batch_size()
+        pks = [parse_id(pk) for pk in ids]
+        valid_pks = sorted({pk for pk in pks if pk is not None})
+        existing = set()
+        for start in range(0, len(valid_pks), batch_size):
+            existing.update(self.get_queryset().filter(
+                pk__in=valid_pks[start:start + batch_size]
+            ).order_by().values_list('pk', flat=True))
+        errors = {}
+        for index, pk in enumerate(pks):
+            if pk is None:
+                errors[index] = {'id': ['A valid integer is required.']}
+            elif pk not in existing:
+                errors[index] = {'id': ['Book not found.']}
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        ordered_ids = sorted(existing)
+        with transaction.atomic():
+            for start in range(0, len(ordered_ids), batch_size):
+                self.get_queryset().filter(pk__in=ordered_ids[start:start + batch_size]).delete()
+        return Response({'deleted': len(ordered_ids)}, status=status.HTTP_200_OK)
+
+
+class BookRetrieveUpdateDestroy(CachedResponseMixin, ConditionalObjectMixin, SparseFieldsetViewMixin,
+                                EagerLoadingQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Generic view for retrieving, updating, and deleting a single book.
 
@@ -85,11 +638,23 @@ class BookRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
     Note: Filtering, searching, and ordering are not applicable to single-item endpoints
     as they operate on collections of items.
 
+    Sparse Fieldsets (SparseFieldsetViewMixin):
+    - GET supports ?fields= and ?expand=author like the list
+
     Permissions:
     - Uses IsAuthenticatedOrReadOnly permission class
     - Unauthenticated users can read (GET) individual books
     - Authenticated users can read, update (PUT/PATCH), and delete (DELETE)
 
+    Caching (CachedResponseMixin):
+    - GET responses are cached until the Book table changes
+
+    Conditional Requests (ConditionalObjectMixin):
+    - GET returns ETag and Last-Modified; If-None-Match / If-Modified-Since
+      answer 304 Not Modified after a one-column updated_at lookup
+    - PUT, PATCH and DELETE honor If-Match / If-Unmodified-Since and return
+      412 Precondition Failed when the book changed in the meantime
+
     View Configuration:
     - Uses RetrieveUpdateDestroyAPIView which combines:
       * RetrieveAPIView (for GET requests)
@@ -100,3 +665,216 @@ class BookRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+
+    # The serialized book only holds the author's id
+    cache_dependencies = (Book,)
+
+    def is_author_expanded(self):
+        return 'author' in self.get_sparse_fieldset()['expand']
+
+    def get_cache_dependencies(self):
+        # ?expand=author renders the author's name as well
+        if self.is_author_expanded():
+            return (Book, Author)
+        return self.cache_dependencies
+
+    def get_validator_columns(self):
+        if self.is_author_expanded():
+            return ['updated_at', 'author__updated_at']
+        return ['updated_at']
+
+
+class AuthorList(SparseFieldsetViewMixin, EagerLoadingQuerysetMixin, generics.ListAPIView):
+    """
+    Generic view for listing authors together with their books.
+
+    Handles:
+    - GET /authors/: Returns all authors with their nested books (accessible to all users)
+
+    Query Efficiency:
+    - AuthorSerializer declares a Prefetch for 'books', applied through
+      EagerLoadingQuerysetMixin, so the endpoint runs two queries no matter
+      how many authors are listed
+    - ?fields=id,name leaves out the books and runs a single query
+
+    Permissions:
+    - Uses IsAuthenticatedOrReadOnly permission class (read-only endpoint)
+    """
+    queryset = Author.objects.all()
+    serializer_class = AuthorSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+
+class ResponseCacheStats(APIView):
+    """
+    Hit and miss counters of the API response cache.
+
+    Handles:
+    - GET /cache/stats/: Returns {"hits", "misses", "hit_ratio"}
+    - DELETE /cache/stats/: Resets the counters
+
+    Permissions:
+    - Staff users only (IsAdminUser)
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(response_cache.stats())
+
+    def delete(self, request, *args, **kwargs):
+        response_cache.reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class AsyncAPIViewMixin:
+    """
+    Runs a DRF generic view's configuration from a native async Django view.
+
+    DRF views are synchronous, so under ASGI every request to them is moved
+    onto a worker thread. Views using this mixin are plain Django views with
+    async handlers that borrow everything but the I/O from sync_view_class:
+    queryset, serializer, filter backends, pagination and permission classes.
+
+    Async Safety:
+    - The user is resolved with request.auser() and set on the DRF request
+      up front, so permission classes never trigger a synchronous lookup
+    - Filtering, searching and ordering only build querysets; the one
+      database check they need (full-text index availability) is awaited
+      before filtering
+    - Every query runs through the async ORM (aiterator, aget, acreate,
+      asave, adelete)
+
+    Authentication:
+    - Session authentication only (the DRF Basic authentication class is
+      synchronous); writes are protected by Django's CSRF middleware
+    """
+    sync_view_class = None
+    parser_classes = [JSONParser]
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            self.view = await self.initial(request, *args, **kwargs)
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            return self.handle_exception(exc)
+
+    def handle_exception(self, exc):
+        """Render API errors the way DRF's default exception handler does."""
+        status_code = exc.status_code
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            # Session authentication sends no WWW-Authenticate header, so DRF answers 403
+            status_code = status.HTTP_403_FORBIDDEN
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        return self.render(data, status_code)
+
+    async def initial(self, request, *args, **kwargs):
+        view = self.sync_view_class()
+        view.args, view.kwargs, view.format_kwarg = args, kwargs, None
+        view.request = Request(request, parsers=[parser() for parser in self.parser_classes])
+        view.request.user = await request.auser()
+        view.check_permissions(view.request)
+
+        search_backend = getattr(view, 'search_backend', None)
+        if search_backend is not None:
+            await search_backend().ais_available(view.get_queryset().db)
+        return view
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        content = b'' if data is None else dumps(data).encode('utf-8')
+        return HttpResponse(content, status=status_code, content_type='application/json')
+
+    async def get_valid_serializer(self, *args, **kwargs):
+        """Validate request.data with the authors it references loaded asynchronously."""
+        data = self.view.request.data
+        author_id = data.get('author') if isinstance(data, dict) else None
+        try:
+            author_ids = [int(author_id)] if author_id is not None and not isinstance(author_id, bool) else []
+        except (TypeError, ValueError):
+            author_ids = []
+        context = self.view.get_serializer_context()
+        context['authors'] = await Author.objects.ain_bulk(author_ids)
+        serializer = self.view.get_serializer_class()(*args, data=data, context=context, **kwargs)
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+
+class AsyncBookListCreate(AsyncAPIViewMixin, View):
+    """
+    Async version of BookListCreate for ASGI deployments.
+
+    Handles:
+    - GET /async/books/: Lists books (accessible to all users)
+    - POST /async/books/: Creates a book (requires authentication)
+
+    Query Features:
+    - Same filtering, searching, ordering and keyset pagination as
+      BookListCreate, with byte-identical JSON output
+    - Unpaginated lists are streamed from the database with aiterator()
+    """
+    sync_view_class = BookListCreate
+
+    # Rows fetched per round trip by aiterator()
+    chunk_size = 2000
+
+    async def get(self, request, *args, **kwargs):
+        view = self.view
+        queryset = view.filter_queryset(view.get_queryset())
+        serializer = view.get_serializer(many=True)
+
+        paginator = view.paginator
+        page = None if paginator is None else await paginator.apaginate_queryset(queryset, view.request, view)
+        if page is not None:
+            return self.render(paginator.get_paginated_response(serializer.to_representation(page)).data)
+
+        return self.render([row async for row in serializer.aiter_representation(queryset, self.chunk_size)])
+
+    async def post(self, request, *args, **kwargs):
+        serializer = await self.get_valid_serializer()
+        book = await Book.objects.acreate(**serializer.validated_data)
+        return self.render(self.view.get_serializer(book).data, status.HTTP_201_CREATED)
+
+
+class AsyncBookRetrieveUpdateDestroy(AsyncAPIViewMixin, View):
+    """
+    Async version of BookRetrieveUpdateDestroy for ASGI deployments.
+
+    Handles:
+    - GET /async/books/<int:pk>/: Retrieves a book (accessible to all users)
+    - PUT/PATCH /async/books/<int:pk>/: Updates a book (requires authentication)
+    - DELETE /async/books/<int:pk>/: Deletes a book (requires authentication)
+    """
+    sync_view_class = BookRetrieveUpdateDestroy
+
+    async def get_object(self):
+        view = self.view
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        queryset = view.filter_queryset(view.get_queryset())
+        try:
+            book = await queryset.aget(**{view.lookup_field: view.kwargs[lookup_url_kwarg]})
+        except Book.DoesNotExist:
+            raise NotFound('No Book matches the given query.')
+        view.check_object_permissions(view.request, book)
+        return book
+
+    async def get(self, request, *args, **kwargs):
+        book = await self.get_object()
+        return self.render(self.view.get_serializer(book).data)
+
+    async def put(self, request, *args, **kwargs):
+        return await self.update(partial=False)
+
+    async def patch(self, request, *args, **kwargs):
+        return await self.update(partial=True)
+
+    async def update(self, partial):
+        book = await self.get_object()
+        serializer = await self.get_valid_serializer(book, partial=partial)
+        for attr, value in serializer.validated_data.items():
+            setattr(book, attr, value)
+        await book.asave()
+        return self.render(self.view.get_serializer(book).data)
+
+    async def delete(self, request, *args, **kwargs):
+        book = await self.get_object()
+        await book.adelete()
+        return self.render(None, status.HTTP_204_NO_CONTENT)
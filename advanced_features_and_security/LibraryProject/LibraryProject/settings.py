@@ -73,13 +73,16 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'bookshelf.instrumentation.RequestMetricsMiddleware',  # Per-request timings, see bookshelf/instrumentation.py
+    'bookshelf.nplusone.NPlusOneMiddleware',  # N+1 query detection, see bookshelf/nplusone.py
 ]
 
 ROOT_URLCONF = 'LibraryProject.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'bookshelf.instrumentation.TimedDjangoTemplates',
+        'NAME': 'django',  # The alias would otherwise follow the backend's module name
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -106,6 +109,54 @@ DATABASES = {
 }
 
 
+# Caching
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        # Room for a fragment and two version counters per book row
+        'OPTIONS': {'MAX_ENTRIES': 30000},
+    },
+    # Shared by all server processes and the request_metrics command
+    'request-metrics': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.request_metrics',
+    },
+}
+
+# Rendered fragments of the relationship_app pages (see relationship_app/fragments.py);
+# a timeout of 0 disables fragment caching
+FRAGMENT_CACHE_ALIAS = 'default'
+FRAGMENT_CACHE_TIMEOUT = 600
+
+# Per-request timings and per-view histograms (see bookshelf/instrumentation.py);
+# a sample rate of 0.0 turns the measurements off
+REQUEST_METRICS_SAMPLE_RATE = 0.0
+REQUEST_METRICS_SERVER_TIMING = True
+REQUEST_METRICS_CACHE_ALIAS = 'request-metrics'
+REQUEST_METRICS_FLUSH_INTERVAL = 10
+
+# N+1 query detection (see bookshelf/nplusone.py): logged during development,
+# raised in tests using NPlusOneTestMixin, off otherwise
+NPLUSONE_ACTION = 'log' if DEBUG else None
+NPLUSONE_THRESHOLD = 2
+
+
+# Loads request.user with its UserProfile and role in one query and caches
+# permissions across requests
+AUTHENTICATION_BACKENDS = [
+    'relationship_app.backends.RoleModelBackend',
+    # Sessions created before RoleModelBackend store this path; keep it listed
+    # so they stay valid (they load the role on first use instead)
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Permission sets of users (see relationship_app/permissions.py); a timeout
+# of 0 disables the cache
+PERMISSION_CACHE_ALIAS = 'default'
+PERMISSION_CACHE_TIMEOUT = 300
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -142,6 +193,25 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded files; profile photos are stored under content hashes and never
+# change, so a front-end server can serve MEDIA_URL with long cache lifetimes
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Stream every upload to a temporary file in chunks instead of memory
+FILE_UPLOAD_HANDLERS = ['django.core.files.uploadhandler.TemporaryFileUploadHandler']
+
+# Admin changelists over large tables (see bookshelf/changelists.py): unfiltered
+# tables past the threshold show the database's row estimate, and filter
+# choices are cached for the timeout in seconds
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100000
+ADMIN_FACET_CACHE_TIMEOUT = 300
+
+# Profile photo thumbnails (see bookshelf/photos.py), built by background
+# threads; 0 workers builds them during the request
+PROFILE_PHOTO_SIZES = (96, 320)
+PROFILE_PHOTO_WORKERS = 2
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
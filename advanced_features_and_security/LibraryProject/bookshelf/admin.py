@@ -1,21 +1,44 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import Book, CustomUser
+from django.template.loader import render_to_string
+from .changelists import CachedValuesFilter, LargeTableAdminMixin
+from .models import Author, Book, CustomUser
 
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(LargeTableAdminMixin, UserAdmin):
     fieldsets = UserAdmin.fieldsets + (
         ('Additional Info', {'fields': ('date_of_birth', 'profile_photo')}),
     )
     add_fieldsets = UserAdmin.add_fieldsets + (
         ('Additional Info', {'fields': ('date_of_birth', 'profile_photo')}),
     )
-    list_display = UserAdmin.list_display + ('date_of_birth', 'profile_photo')
+    list_display = UserAdmin.list_display + ('date_of_birth', 'profile_photo_thumbnail')
+    # The changelist rows leave out passwords
+    list_only = ('username', 'email', 'first_name', 'last_name', 'is_staff', 'date_of_birth', 'profile_photo')
+    search_fields = ('username', 'email')
+
+    @admin.display(description='Profile photo')
+    def profile_photo_thumbnail(self, obj):
+        # The thumbnail, never the full-size original
+        if not obj.profile_photo:
+            return ''
+        return render_to_string('bookshelf/profile_photo.html', {'photo': obj.profile_photo})
 
 admin.site.register(CustomUser, CustomUserAdmin)
 
 @admin.register(Book)
-class BookAdmin(admin.ModelAdmin):
+class BookAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['title', 'author', 'publication_year']
-    list_filter = ['publication_year', 'author']
-    search_fields = ['title', 'author']
+    list_only = ['title', 'author', 'publication_year']
+    list_filter = [
+        CachedValuesFilter.for_field('publication_year', 'publication year'),
+        CachedValuesFilter.for_field('author_ref', 'author'),
+    ]
+    search_fields = ['title', 'author_ref__name']
     ordering = ['title']
+    # Set from author on save
+    readonly_fields = ['author_ref']
+
+@admin.register(Author)
+class AuthorAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    search_fields = ['name']
+    ordering = ['name']
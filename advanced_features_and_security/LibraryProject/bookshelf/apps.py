@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BookshelfConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bookshelf'
+
+    def ready(self):
+        # Connect the query timing, N+1 detection and profile photo receivers
+        from . import signals  # noqa: F401
@@ -0,0 +1,55 @@
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+
+
+def resolve_authors(author_model, names):
+    """Return {name: author pk} for names, creating the authors that do not exist yet."""
+    names = set(names)
+    manager = author_model._default_manager
+    pks = dict(manager.filter(name__in=names).values_list('name', 'pk'))
+    missing = names - pks.keys()
+    if missing:
+        # ignore_conflicts: a concurrent writer may create the same author
+        manager.bulk_create([author_model(name=name) for name in missing], ignore_conflicts=True)
+        pks.update(manager.filter(name__in=missing).values_list('name', 'pk'))
+    return pks
+
+
+def backfill_authors(book_model, author_model, batch_size=1000):
+    """
+    Link books that have no author_ref yet to the Author of their author
+    name, one batch of primary keys at a time.
+
+    Every batch is its own short transaction: one SELECT of the next
+    unlinked books, the author lookups and a single UPDATE, so the table
+    is never locked for long and an interrupted run resumes where it
+    stopped. A book whose name changed in the meantime is left for the
+    next run. Yields (last pk, books read, books linked) per batch.
+    """
+    manager = book_model._default_manager
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                manager.filter(author_ref__isnull=True, pk__gt=last_pk)
+                .order_by('pk').values_list('pk', 'author')[:batch_size]
+            )
+            if not rows:
+                return
+            pks = resolve_authors(author_model, {name for _, name in rows})
+            linked = manager.filter(pk__in=[pk for pk, _ in rows], author_ref__isnull=True).update(
+                author_ref=Case(
+                    *[When(author=name, then=Value(pk)) for name, pk in pks.items()],
+                    output_field=models.BigIntegerField(),
+                ),
+            )
+        last_pk = rows[-1][0]
+        yield last_pk, len(rows), linked
+
+
+def verify_authors(book_model):
+    """Return the number of books without an author_ref and of books whose author_ref has another name."""
+    manager = book_model._default_manager
+    unlinked = manager.filter(author_ref__isnull=True).count()
+    mismatched = manager.filter(author_ref__isnull=False).exclude(author_ref__name=F('author')).count()
+    return unlinked, mismatched
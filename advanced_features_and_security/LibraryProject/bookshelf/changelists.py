@@ -0,0 +1,191 @@
+from functools import cached_property
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Count, Q, QuerySet, Value
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.functions import Lower
+from django.db.models.lookups import GreaterThanOrEqual, LessThan
+
+
+def estimate_count(model, using='default'):
+    """
+    Return the database's estimate of the rows in model's table, or None.
+
+    PostgreSQL and MySQL keep one in their catalogs; SQLite has one in
+    sqlite_stat1 once ANALYZE has run. Estimates can be off by a few
+    percent and lag behind recent writes.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    queries = {
+        'postgresql': ('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table]),
+        'mysql': ('SELECT table_rows FROM information_schema.tables '
+                  'WHERE table_schema = DATABASE() AND table_name = %s', [table]),
+        'sqlite': ('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table]),
+    }
+    if connection.vendor not in queries:
+        return None
+    sql, params = queries[connection.vendor]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    except DatabaseError:
+        # e.g. sqlite_stat1 does not exist before the first ANALYZE
+        return None
+    if row is None or row[0] is None:
+        return None
+    count = int(str(row[0]).split()[0])
+    # PostgreSQL reports -1 for tables that were never vacuumed or analyzed
+    return count if count >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that takes the row count of an unfiltered, large table from
+    the database's estimate (see estimate_count) instead of COUNT(*).
+
+    Filtered and searched changelists, and tables with fewer rows than
+    ADMIN_ESTIMATED_COUNT_THRESHOLD (default 100000), are counted exactly.
+    With an estimate the last page number may be slightly off.
+    """
+
+    @cached_property
+    def count(self):
+        object_list = self.object_list
+        if isinstance(object_list, QuerySet) and not object_list.query.where:
+            estimate = estimate_count(object_list.model, object_list.db)
+            if estimate is not None and estimate >= getattr(settings, 'ADMIN_ESTIMATED_COUNT_THRESHOLD', 100000):
+                return estimate
+        return super().count
+
+
+class CachedValuesFilter(admin.SimpleListFilter):
+    """
+    List filter offering the most common values of a column, computed with
+    one GROUP BY and cached.
+
+    Unlike the default filter for plain fields, which runs SELECT DISTINCT
+    over the whole table on every changelist load, the choices are cached
+    for ADMIN_FACET_CACHE_TIMEOUT seconds (default 300) in the 'default'
+    cache, so values added meanwhile show up late. At most limit values,
+    the most frequent ones, are offered. For a foreign key the rows are
+    grouped by the key and labelled with the related objects, and the
+    filter is an integer lookup.
+
+    Usage:
+        list_filter = [CachedValuesFilter.for_field('author_ref', 'author')]
+    """
+    field_name = None
+    limit = 50
+    key_prefix = 'bookshelf:facets'
+
+    @classmethod
+    def for_field(cls, field_name, title=None, limit=None):
+        return type('CachedValuesFilter_%s' % field_name, (cls,), {
+            'field_name': field_name,
+            'parameter_name': field_name,
+            'title': title or field_name.replace('_', ' '),
+            'limit': limit or cls.limit,
+        })
+
+    def get_choices(self, model):
+        """Return the cached (value, label) choices, sorted by label."""
+        cache = caches['default']
+        key = '%s:%s:%s:%d' % (self.key_prefix, model._meta.label_lower, self.field_name, self.limit)
+        choices = cache.get(key)
+        if choices is None:
+            values = [
+                value for value in model._default_manager.values_list(self.field_name, flat=True)
+                .annotate(rows=Count('pk')).order_by('-rows', self.field_name)[:self.limit]
+                if value is not None
+            ]
+            field = model._meta.get_field(self.field_name)
+            if field.is_relation:
+                objects = field.related_model._default_manager.in_bulk(values)
+                choices = [(str(pk), str(obj)) for pk, obj in objects.items()]
+            else:
+                choices = [(str(value), str(value)) for value in sorted(values)]
+            choices.sort(key=lambda choice: choice[1])
+            cache.set(key, choices, getattr(settings, 'ADMIN_FACET_CACHE_TIMEOUT', 300))
+        return choices
+
+    def lookups(self, request, model_admin):
+        choices = self.get_choices(model_admin.model)
+        # Keep the selected value listed even when it is not among the cached ones
+        if self.value() is not None and self.value() not in dict(choices):
+            choices = choices + [(self.value(), self.value())]
+        return choices
+
+    def queryset(self, request, queryset):
+        if self.value() is not None:
+            try:
+                return queryset.filter(**{self.field_name: self.value()})
+            except (ValueError, ValidationError) as e:
+                # Like the stock filters: the changelist redirects to ?e=1
+                raise IncorrectLookupParameters(e)
+        return queryset
+
+
+class ProjectedChangeList(ChangeList):
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        if self.model_admin.list_only:
+            queryset = queryset.only(*self.model_admin.list_only)
+        return queryset
+
+
+class LargeTableAdminMixin:
+    """
+    ModelAdmin mixin for changelists over millions of rows.
+
+    - the page count comes from EstimatedCountPaginator, and the second
+      COUNT(*) for "x of y selected" is skipped
+    - search is a case-insensitive prefix search: each of search_fields
+      is matched with LOWER(field) >= LOWER(term) AND LOWER(field) <
+      LOWER(term) + U+10FFFF, a range that an index on Lower(field) can
+      serve on every backend (LOWER() only folds ASCII on SQLite)
+    - list_only limits the changelist rows to the listed columns (the pk
+      is always loaded); the change form still loads every field
+
+    Index Lower() of search_fields and the changelist ordering in the
+    model's Meta.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_only = ()
+
+    def get_changelist(self, request, **kwargs):
+        return ProjectedChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        search_fields = self.get_search_fields(request)
+        if not search_fields or not search_term.strip():
+            return queryset, False
+        term = search_term.strip()
+        condition = Q()
+        for field_name in search_fields:
+            condition |= self.prefix_condition(queryset.model, field_name.lstrip('^=@'), term)
+        return queryset.filter(condition), False
+
+    def prefix_condition(self, model, field_name, term):
+        """Return a Q matching the rows of model whose field_name starts with term."""
+        relation, _, remainder = field_name.partition(LOOKUP_SEP)
+        if remainder:
+            # A subquery on the related table, rather than a join, so that
+            # the OR of the search fields can use an index on each table
+            related_model = model._meta.get_field(relation).related_model
+            related = related_model._base_manager.filter(self.prefix_condition(related_model, remainder, term))
+            return Q(**{'%s__in' % relation: related.values('pk')})
+        # The same expression as the index, so the database can use it
+        return Q(
+            GreaterThanOrEqual(Lower(field_name), Lower(Value(term))),
+            LessThan(Lower(field_name), Lower(Value(term + '\U0010ffff'))),
+        )
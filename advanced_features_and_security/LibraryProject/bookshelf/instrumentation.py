@@ -0,0 +1,363 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.template.backends.django import DjangoTemplates, Template
+
+# RequestMetrics of the request being measured; None when it is not sampled
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    Timings and query count of one sampled request.
+
+    Time is attributed to the innermost running phase only: SQL run while a
+    template iterates a lazy queryset counts as 'db', not 'template', so
+    the phases add up to no more than the total latency.
+
+    Phases:
+    - db: SQL statements, through query_timer()
+    - template: template rendering, through TimedDjangoTemplates
+    - render: TemplateResponse.render() outside of templates
+    """
+    phases = ('db', 'template', 'render')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.durations = dict.fromkeys(self.phases, 0.0)
+        self.total = None
+        # [phase, started] of the running phases, innermost last
+        self.stack = []
+
+    def enter(self, name):
+        now = time.perf_counter()
+        if self.stack:
+            outer = self.stack[-1]
+            self.durations[outer[0]] += now - outer[1]
+        self.stack.append([name, now])
+
+    def exit(self):
+        now = time.perf_counter()
+        name, started = self.stack.pop()
+        self.durations[name] += now - started
+        if self.stack:
+            self.stack[-1][1] = now
+
+    def finish(self):
+        self.total = time.perf_counter() - self.start
+
+    def as_milliseconds(self):
+        values = {name: duration * 1000 for name, duration in self.durations.items()}
+        values['total'] = self.total * 1000
+        return values
+
+    def server_timing(self):
+        """Return the Server-Timing header value, durations in milliseconds."""
+        values = self.as_milliseconds()
+        entries = ['db;dur=%.2f;desc="%d queries"' % (values['db'], self.queries)]
+        entries += ['%s;dur=%.2f' % (name, values[name]) for name in self.phases[1:]]
+        entries.append('total;dur=%.2f' % values['total'])
+        return ', '.join(entries)
+
+
+@contextmanager
+def timed(name):
+    """Attribute the enclosed block to phase name of the current request, if sampled."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    metrics.enter(name)
+    try:
+        yield
+    finally:
+        metrics.exit()
+
+
+def query_timer(execute, sql, params, many, context):
+    """connection.execute_wrapper() that counts and times the queries of sampled requests."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    metrics.queries += 1
+    metrics.enter('db')
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.exit()
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """
+    connection_created receiver adding query_timer to every connection.
+
+    Connections are per thread, so the wrapper is installed on each of them
+    rather than per request; it also sees queries that async views run
+    through sync_to_async(). A connection object is reused when it
+    reconnects, hence the membership check, and the timer goes first so
+    that execute_wrapper() blocks, which pop the last wrapper, keep working.
+    """
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, query_timer)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timed('template'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    Django template backend that reports rendering time to RequestMetrics.
+
+    Covers render(), TemplateResponse and class-based views alike, since
+    they all load templates through the backend; {% include %} and
+    {% extends %} are part of the outer template's time.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+class Histogram:
+    """
+    Counts of values rounded to two significant digits.
+
+    Bounded in size (at most 90 buckets per decade) with a relative error
+    under 5%, and mergeable, so histograms from many processes can be added
+    together before computing percentiles.
+    """
+
+    def __init__(self, buckets=None):
+        self.buckets = dict(buckets or {})
+
+    @staticmethod
+    def bucket(value):
+        return float('%.2g' % value)
+
+    def add(self, value):
+        bucket = self.bucket(value)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def merge(self, other):
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+
+    @property
+    def count(self):
+        return sum(self.buckets.values())
+
+    def percentile(self, percent):
+        threshold = self.count * percent / 100
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= threshold:
+                return bucket
+        return None
+
+
+class RequestMetricsStore:
+    """
+    Per-view histograms of sampled requests.
+
+    Each process aggregates in memory and merges its histograms into the
+    cache every REQUEST_METRICS_FLUSH_INTERVAL seconds, so the
+    request_metrics management command can report on all processes sharing
+    the cache. The merge is a read-modify-write under a lock taken with
+    cache.add(); a flush that cannot get the lock keeps its data for the
+    next one.
+
+    Settings:
+    - REQUEST_METRICS_CACHE_ALIAS: cache holding the histograms (default
+      'default'); it has to be shared with the management command, so a
+      file, database or memcached/redis cache rather than local memory
+    - REQUEST_METRICS_FLUSH_INTERVAL: seconds between flushes (default 10);
+      0 flushes after every sampled request
+    """
+    key_prefix = 'bookshelf:request-metrics'
+    metrics = ('queries', 'db', 'template', 'render', 'total')
+    lock_timeout = 10
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.last_flush = time.monotonic()
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'REQUEST_METRICS_CACHE_ALIAS', 'default')]
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'REQUEST_METRICS_FLUSH_INTERVAL', 10)
+
+    def view_key(self, view_name):
+        return '%s:view:%s' % (self.key_prefix, view_name)
+
+    def record(self, view_name, request_metrics):
+        values = request_metrics.as_milliseconds()
+        values['queries'] = request_metrics.queries
+        with self.lock:
+            histograms = self.pending.setdefault(view_name, {name: Histogram() for name in self.metrics})
+            for name in self.metrics:
+                histograms[name].add(values[name])
+            if time.monotonic() - self.last_flush < self.flush_interval:
+                return
+            pending, self.pending = self.pending, {}
+            self.last_flush = time.monotonic()
+        if not self.merge(pending):
+            with self.lock:
+                for view_name, histograms in pending.items():
+                    self.add_pending(view_name, histograms)
+
+    def add_pending(self, view_name, histograms):
+        target = self.pending.setdefault(view_name, {name: Histogram() for name in self.metrics})
+        for name, histogram in histograms.items():
+            target[name].merge(histogram)
+
+    def merge(self, pending):
+        """Add pending histograms to the cached ones; False when the lock is taken."""
+        if not pending:
+            return True
+        lock_key = '%s:lock' % self.key_prefix
+        if not self.cache.add(lock_key, True, timeout=self.lock_timeout):
+            return False
+        try:
+            index_key = '%s:views' % self.key_prefix
+            views = set(self.cache.get(index_key, ()))
+            stored = self.cache.get_many([self.view_key(view_name) for view_name in pending])
+            for view_name, histograms in pending.items():
+                buckets = stored.get(self.view_key(view_name), {})
+                for name, histogram in histograms.items():
+                    merged = Histogram(buckets.get(name))
+                    merged.merge(histogram)
+                    buckets[name] = merged.buckets
+                self.cache.set(self.view_key(view_name), buckets, timeout=None)
+            self.cache.set(index_key, sorted(views | set(pending)), timeout=None)
+        finally:
+            self.cache.delete(lock_key)
+        return True
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.last_flush = time.monotonic()
+        return self.merge(pending)
+
+    def load(self):
+        """Return {view_name: {metric: Histogram}} from the cache."""
+        views = self.cache.get('%s:views' % self.key_prefix, ())
+        stored = self.cache.get_many([self.view_key(view_name) for view_name in views])
+        histograms = {}
+        for view_name in views:
+            buckets = stored.get(self.view_key(view_name))
+            if buckets:
+                histograms[view_name] = {name: Histogram(buckets.get(name)) for name in self.metrics}
+        return histograms
+
+    def reset(self):
+        with self.lock:
+            self.pending = {}
+        views = self.cache.get('%s:views' % self.key_prefix, ())
+        self.cache.delete_many([self.view_key(view_name) for view_name in views] + ['%s:views' % self.key_prefix])
+
+
+request_metrics_store = RequestMetricsStore()
+
+
+class RequestMetricsMiddleware:
+    """
+    Measures a sample of requests and aggregates them per view.
+
+    A sampled request records its query count, SQL time, template time,
+    rendering time and total latency (see RequestMetrics), returns them in
+    a Server-Timing header, and adds them to the histograms of its view
+    (the URL name, or the view's dotted path) in request_metrics_store.
+    Unsampled requests cost a settings lookup and at most a random() call,
+    and query_timer() and timed() return at once when no request is
+    measured.
+
+    Streaming responses are measured up to the point their headers are
+    ready; the streamed content is not included.
+
+    Settings:
+    - REQUEST_METRICS_SAMPLE_RATE: fraction of requests measured, from 0.0
+      (off, the default) to 1.0
+    - REQUEST_METRICS_SERVER_TIMING: send the Server-Timing header on
+      sampled responses (default True)
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    @property
+    def sample_rate(self):
+        return getattr(settings, 'REQUEST_METRICS_SAMPLE_RATE', 0.0)
+
+    def is_sampled(self, request):
+        sample_rate = self.sample_rate
+        return sample_rate >= 1 or (sample_rate > 0 and random.random() < sample_rate)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.is_sampled(request):
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not self.is_sampled(request):
+            return await self.get_response(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    def process_template_response(self, request, response):
+        # Called just before response.render(); time the rendering too
+        metrics = current_metrics.get()
+        if metrics is not None:
+            metrics.enter('render')
+            response.add_post_render_callback(lambda response: metrics.exit())
+        return response
+
+    def get_view_name(self, request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return '<unresolved>'
+        return match.view_name or match._func_path
+
+    def finish(self, request, response, metrics):
+        # A render that raised leaves its phase open
+        while metrics.stack:
+            metrics.exit()
+        metrics.finish()
+        if getattr(settings, 'REQUEST_METRICS_SERVER_TIMING', True):
+            response['Server-Timing'] = metrics.server_timing()
+        request_metrics_store.record(self.get_view_name(request), metrics)
+        return response
@@ -0,0 +1,129 @@
+import time
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from bookshelf.admin import BookAdmin, CustomUserAdmin
+from bookshelf.models import Author, Book
+
+
+class BaselineBookAdmin(admin.ModelAdmin):
+    list_display = ['title', 'author', 'publication_year']
+    list_filter = ['publication_year', 'author']
+    search_fields = ['title', 'author']
+    ordering = ['title']
+
+
+class BaselineUserAdmin(UserAdmin):
+    list_display = UserAdmin.list_display + ('date_of_birth', 'profile_photo')
+
+
+class Command(BaseCommand):
+    """
+    Compare changelist latency of the Book and CustomUser admins before and
+    after the large-table changes (see bookshelf.changelists).
+
+    "before" uses the previous admin options without the admin indexes,
+    which are dropped for that run (on databases with transactional DDL);
+    "after" uses bookshelf.admin as it is.
+    Every changelist is loaded unfiltered, with a search and with a filter;
+    the book list also with a lowercase search ("isearch", matching the
+    author). "before" filters books on the author name, "after" on the
+    author id.
+    Rows are seeded and ANALYZEd inside a transaction that is rolled back
+    afterwards.
+
+    Usage:
+        python manage.py benchmark_admin --books 1000000 --users 1000000 --repeat 5
+    """
+    help = 'Benchmark the bookshelf admin changelists on large tables.'
+
+    index_names = ['bookshelf_book_title_idx', 'bookshelf_book_year_idx',
+                   'bookshelf_book_author_ref_idx', 'bookshelf_book_lower_idx', 'bookshelf_author_lower_idx',
+                   'bookshelf_user_name_lower_idx', 'bookshelf_user_email_lower_idx']
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=1000000, help='Books to seed.')
+        parser.add_argument('--users', type=int, default=1000000, help='Users to seed.')
+        parser.add_argument('--repeat', type=int, default=5, help='Loads per measurement (median is reported).')
+
+    # A private cache, so the facet choices start cold and stay out of the real cache
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                           'LOCATION': 'benchmark-admin'}})
+    def handle(self, *args, **options):
+        UserModel = get_user_model()
+        with transaction.atomic():
+            superuser = self.seed(options['books'], options['users'])
+            author = Author.objects.get(name='Author 42')
+            # (admin, page, "before" parameters, "after" parameters)
+            pages = [
+                ('book', 'list', {}, {}),
+                ('book', 'search', {'q': 'Book 0123'}, {'q': 'Book 0123'}),
+                ('book', 'isearch', {'q': 'author 42'}, {'q': 'author 42'}),
+                ('book', 'filter', {'author': author.name}, {'author_ref': author.pk}),
+                ('user', 'list', {}, {}),
+                ('user', 'search', {'q': 'reader-0042'}, {'q': 'reader-0042'}),
+                ('user', 'filter', {'is_staff__exact': '0'}, {'is_staff__exact': '0'}),
+            ]
+            before = {}
+            with transaction.atomic():
+                self.drop_indexes()
+                admins = {'book': BaselineBookAdmin(Book, admin.site),
+                          'user': BaselineUserAdmin(UserModel, admin.site)}
+                for model, page, params, _ in pages:
+                    before[model, page] = self.measure(admins[model], superuser, params, options['repeat'])
+                transaction.set_rollback(True)
+
+            admins = {'book': BookAdmin(Book, admin.site), 'user': CustomUserAdmin(UserModel, admin.site)}
+            self.stdout.write('%-6s %-8s %11s %9s %11s %9s' % (
+                'admin', 'page', 'before ms', 'queries', 'after ms', 'queries',
+            ))
+            for model, page, _, params in pages:
+                after = self.measure(admins[model], superuser, params, options['repeat'])
+                self.stdout.write('%-6s %-8s %11.1f %9d %11.1f %9d' % (
+                    model, page, before[model, page][0] * 1000, before[model, page][1], after[0] * 1000, after[1],
+                ))
+
+            transaction.set_rollback(True)
+
+    def seed(self, books, users, batch_size=10000):
+        UserModel = get_user_model()
+        for offset in range(0, books, batch_size):
+            Book.objects.bulk_create([
+                Book(title='Book %07d' % n, author='Author %d' % (n % 5000), publication_year=1900 + n % 125)
+                for n in range(offset, min(offset + batch_size, books))
+            ])
+        for offset in range(0, users, batch_size):
+            UserModel.objects.bulk_create([
+                UserModel(username='reader-%07d' % n, email='reader-%07d@example.com' % n, password='!')
+                for n in range(offset, min(offset + batch_size, users))
+            ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return UserModel.objects.create_superuser('benchmark-admin', password=None)
+
+    def drop_indexes(self):
+        if not connection.features.can_rollback_ddl:
+            self.stderr.write('The database cannot roll back DDL; "before" keeps the admin indexes.')
+            return
+        with connection.cursor() as cursor:
+            for name in self.index_names:
+                cursor.execute('DROP INDEX %s' % connection.ops.quote_name(name))
+            cursor.execute('ANALYZE')
+
+    def measure(self, model_admin, user, params, repeat):
+        """Return the median seconds and the query count of one changelist load."""
+        timings = []
+        for _ in range(repeat):
+            request = RequestFactory().get('/', params)
+            request.user = user
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                model_admin.changelist_view(request).render()
+                timings.append(time.perf_counter() - start)
+        return sorted(timings)[len(timings) // 2], len(context.captured_queries)
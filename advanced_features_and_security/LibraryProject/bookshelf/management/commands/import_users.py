@@ -0,0 +1,243 @@
+import csv
+import datetime
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from relationship_app.models import UserProfile
+
+FIELDS = ('username', 'email', 'password', 'first_name', 'last_name', 'date_of_birth', 'role')
+
+
+def setup_worker(settings_module):
+    # Processes started with 'spawn' or 'forkserver' do not inherit the configured settings
+    if not settings.configured:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+        django.setup()
+
+
+class InProcessExecutor:
+    """Stand-in for ProcessPoolExecutor when --workers is 0."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def map(self, fn, iterable, chunksize=1):
+        return map(fn, list(iterable))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class Command(BaseCommand):
+    """
+    Import users with their UserProfile rows from a CSV or JSON Lines file.
+
+    The file is read as a stream, one batch at a time. The passwords of a
+    batch are hashed by a pool of worker processes while the previous
+    batch is written, and each batch is inserted with one bulk INSERT for
+    the users and one per role for the profiles (see
+    UserProfile.objects.create_users()). Users get no post_save signals,
+    as with any bulk_create().
+
+    Columns (CSV header or JSON keys): username (required), email,
+    password (plain text; empty for an unusable password), first_name,
+    last_name, date_of_birth (YYYY-MM-DD) and role (defaults to --role).
+    Every user is checked with Model.clean_fields() (except password and
+    the timestamps). Rows with an existing username are skipped, as are
+    invalid rows, which are reported on stderr with their line number.
+
+    After every committed batch the number of rows done is written to a
+    checkpoint file (<file>.checkpoint by default). Running the command
+    again resumes after the last committed batch; the checkpoint is
+    removed once the whole file is imported.
+
+    Usage:
+        python manage.py import_users members.csv
+        python manage.py import_users members.jsonl --batch-size 5000 --workers 8
+        python manage.py import_users members.csv --restart
+    """
+    help = 'Bulk import users and their profiles from a CSV or JSON Lines file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with a header row, or JSON Lines file.')
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='File format (default: from the file extension).')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users per transaction.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Password hashing processes (default: all cores); 0 hashes in this process.')
+        parser.add_argument('--role', choices=[role for role, _ in UserProfile.ROLE_CHOICES],
+                            default=UserProfile.DEFAULT_ROLE, help='Role of rows without one.')
+        parser.add_argument('--checkpoint', help='Checkpoint file (default: <path>.checkpoint).')
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        checkpoint = options['checkpoint'] or path + '.checkpoint'
+        done = 0 if options['restart'] else self.read_checkpoint(checkpoint, path)
+        if done:
+            self.stdout.write('Resuming after row %d.' % done)
+
+        self.counts = {'imported': 0, 'existing': 0, 'invalid': 0}
+        start = time.perf_counter()
+        workers = options['workers']
+        executor_class = ProcessPoolExecutor if workers else InProcessExecutor
+        with executor_class(workers, initializer=setup_worker, initargs=(os.environ.get('DJANGO_SETTINGS_MODULE'),)) as executor:
+            batches = self.read_batches(path, file_format, done, options['batch_size'])
+            for records, hashes in self.hash_passwords(executor, batches, workers):
+                self.write_batch(records, hashes, options['role'])
+                done += len(records)
+                self.write_checkpoint(checkpoint, path, done)
+                elapsed = time.perf_counter() - start
+                self.stdout.write('%d rows done, %d users imported (%.0f users/s)' % (
+                    done, self.counts['imported'], self.counts['imported'] / elapsed,
+                ))
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            'Imported %(imported)d users; skipped %(existing)d existing and %(invalid)d invalid rows' % self.counts
+            + ' in %.1fs (%.0f users/s).' % (elapsed, self.counts['imported'] / elapsed if elapsed else 0)
+        ))
+
+    def read_records(self, path, file_format):
+        """Yield (line number, record dict) for every row of the file."""
+        try:
+            with open(path, newline='', encoding='utf-8') as f:
+                if file_format == 'csv':
+                    reader = csv.DictReader(f)
+                    for record in reader:
+                        yield reader.line_num, record
+                else:
+                    for line_number, line in enumerate(f, 1):
+                        if line.strip():
+                            yield line_number, json.loads(line)
+        except OSError as e:
+            raise CommandError('Cannot read %s: %s' % (path, e))
+        except json.JSONDecodeError as e:
+            raise CommandError('%s: invalid JSON: %s' % (path, e))
+
+    def read_batches(self, path, file_format, skip, batch_size):
+        records = islice(self.read_records(path, file_format), skip, None)
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def hash_passwords(self, executor, batches, workers):
+        """
+        Yield (records, password hashes) per batch.
+
+        The next batch is handed to the pool before the current one is
+        yielded, so hashing overlaps with the database writes.
+        """
+        chunksize = 1
+        previous = None
+        for batch in batches:
+            if workers:
+                chunksize = max(1, len(batch) // (workers * 4))
+            # Non-object JSON lines are reported by build_user()
+            passwords = [record.get('password') or None if isinstance(record, dict) else None
+                         for _, record in batch]
+            current = (batch, executor.map(make_password, passwords, chunksize=chunksize))
+            if previous is not None:
+                yield previous[0], list(previous[1])
+            previous = current
+        if previous is not None:
+            yield previous[0], list(previous[1])
+
+    def build_user(self, record, password_hash):
+        UserModel = get_user_model()
+        if not isinstance(record, dict):
+            raise ValueError('expected an object, got %s' % type(record).__name__)
+        unknown = set(record) - set(FIELDS)
+        if unknown:
+            raise ValueError('unknown columns %s' % ', '.join(sorted(unknown)))
+        username = (record.get('username') or '').strip()
+        if not username:
+            raise ValueError('username is required')
+        date_of_birth = record.get('date_of_birth') or None
+        if date_of_birth:
+            date_of_birth = datetime.date.fromisoformat(date_of_birth)
+        role = record.get('role') or None
+        if role is not None and role not in dict(UserProfile.ROLE_CHOICES):
+            raise ValueError('unknown role %r' % role)
+        user = UserModel(
+            username=username,
+            email=UserModel.objects.normalize_email(record.get('email') or ''),
+            password=password_hash,
+            first_name=record.get('first_name') or '',
+            last_name=record.get('last_name') or '',
+            date_of_birth=date_of_birth,
+        )
+        # bulk_create() skips model validation; check lengths, formats and
+        # the username validator here so that bad rows are reported, not inserted
+        try:
+            user.clean_fields(exclude=['password', 'last_login', 'date_joined'])
+        except ValidationError as e:
+            raise ValueError('; '.join(
+                '%s: %s' % (field, ' '.join(messages)) for field, messages in e.message_dict.items()
+            ))
+        return user, role
+
+    def write_batch(self, records, hashes, default_role):
+        UserModel = get_user_model()
+        users_by_role = {}
+        usernames = set()
+        for (line_number, record), password_hash in zip(records, hashes):
+            try:
+                user, role = self.build_user(record, password_hash)
+            except ValueError as e:
+                self.stderr.write('Line %d: %s' % (line_number, e))
+                self.counts['invalid'] += 1
+                continue
+            if user.username in usernames:
+                self.counts['existing'] += 1
+                continue
+            usernames.add(user.username)
+            users_by_role.setdefault(role or default_role, []).append(user)
+
+        with transaction.atomic():
+            existing = set(UserModel.objects.filter(username__in=usernames).values_list('username', flat=True))
+            self.counts['existing'] += len(existing)
+            for role, users in users_by_role.items():
+                users = [user for user in users if user.username not in existing]
+                if users:
+                    UserProfile.objects.create_users(users, role=role)
+                    self.counts['imported'] += len(users)
+
+    def read_checkpoint(self, checkpoint, path):
+        try:
+            with open(checkpoint) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            raise CommandError('Cannot read checkpoint %s: %s' % (checkpoint, e))
+        if state.get('source') != os.path.abspath(path):
+            raise CommandError('Checkpoint %s belongs to %s; use --restart or --checkpoint.' % (
+                checkpoint, state.get('source'),
+            ))
+        return state['rows']
+
+    def write_checkpoint(self, checkpoint, path, rows):
+        # Write then rename, so a crash never leaves a half-written checkpoint
+        with open(checkpoint + '.tmp', 'w') as f:
+            json.dump({'source': os.path.abspath(path), 'rows': rows}, f)
+        os.replace(checkpoint + '.tmp', checkpoint)
@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from bookshelf.photos import photo_processor
+
+
+class Command(BaseCommand):
+    """
+    Build the profile photo thumbnails that do not exist yet.
+
+    Thumbnails are normally built by PhotoProcessor's background threads
+    right after an upload; run this after changing PROFILE_PHOTO_SIZES or
+    when a server restart dropped queued photos. Existing thumbnails are
+    left alone.
+
+    Usage:
+        python manage.py process_profile_photos
+    """
+    help = 'Build missing profile photo thumbnails.'
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.exclude(profile_photo='').exclude(profile_photo=None)
+        photos = built = 0
+        done = set()
+        for user in users.only('pk', 'profile_photo').iterator():
+            # Identical uploads share one file and one set of thumbnails
+            if user.profile_photo.name in done:
+                continue
+            done.add(user.profile_photo.name)
+            built += photo_processor.process(user.profile_photo)
+            photos += 1
+        self.stdout.write('Checked %d photos, built %d thumbnails.' % (photos, built))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:08
+
+import bookshelf.photos
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookshelf', '0002_alter_book_options'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='profile_photo',
+            field=bookshelf.photos.ProfilePhotoField(blank=True, null=True, upload_to='profile_photos/'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookshelf', '0004_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Author',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='author_ref',
+            field=models.ForeignKey(blank=True, db_column='author_id', db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='books', to='bookshelf.author', verbose_name='author'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['author_ref', 'title'], name='bookshelf_book_author_ref_idx'),
+        ),
+    ]
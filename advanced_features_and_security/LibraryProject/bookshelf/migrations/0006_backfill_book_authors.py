@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from bookshelf.authors import backfill_authors
+
+
+def link_book_authors(apps, schema_editor):
+    Author = apps.get_model('bookshelf', 'Author')
+    Book = apps.get_model('bookshelf', 'Book')
+    for _ in backfill_authors(Book, Author):
+        pass
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own (see bookshelf.authors.backfill_authors);
+    # on large tables run the backfill_book_authors command beforehand
+    atomic = False
+
+    dependencies = [
+        ('bookshelf', '0005_author'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_book_authors, migrations.RunPython.noop),
+    ]
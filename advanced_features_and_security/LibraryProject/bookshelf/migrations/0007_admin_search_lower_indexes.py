@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:49
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookshelf', '0006_backfill_book_authors'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='customuser',
+            name='bookshelf_user_email_idx',
+        ),
+        migrations.AddIndex(
+            model_name='author',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='bookshelf_author_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(django.db.models.functions.text.Lower('title'), name='bookshelf_book_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 08:24
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookshelf', '0008_user_search_lower_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='book',
+            name='bookshelf_book_author_idx',
+        ),
+    ]
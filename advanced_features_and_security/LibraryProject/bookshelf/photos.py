@@ -0,0 +1,153 @@
+import hashlib
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import models
+from django.db.models.fields.files import ImageFieldFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(content):
+    """Return the sha256 hex digest of a File, read in chunks."""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+class ProfilePhotoFieldFile(ImageFieldFile):
+    """
+    Stores an upload under the sha256 of its content.
+
+    profile_photos/3f/3fa9...e1.jpg: identical uploads share one file, and
+    a name never changes content, so the files can be served with
+    far-future cache headers. The upload is read in chunks, never loaded
+    whole into memory.
+    """
+
+    def save(self, name, content, save=True):
+        digest = content_hash(content)
+        extension = posixpath.splitext(name)[1].lower()
+        relative_name = '%s/%s%s' % (digest[:2], digest, extension)
+        hashed_name = self.field.generate_filename(self.instance, relative_name)
+        # Set before the instance is saved, for the post_save receiver in bookshelf.signals
+        self.instance._profile_photo_uploaded = True
+        if self.storage.exists(hashed_name):
+            self.name = hashed_name
+            setattr(self.instance, self.field.attname, self.name)
+            self._committed = True
+            if save:
+                self.instance.save()
+        else:
+            super().save(relative_name, content, save)
+
+    save.alters_data = True
+
+    def variant_name(self, size, image_format):
+        return '%s_%d.%s' % (posixpath.splitext(self.name)[0], size, image_format)
+
+    def variant_url(self, size, image_format):
+        return self.storage.url(self.variant_name(size, image_format))
+
+    @property
+    def thumbnail_size(self):
+        return min(photo_processor.sizes)
+
+    @property
+    def thumbnail_url(self):
+        return self.variant_url(self.thumbnail_size, 'jpg')
+
+    @property
+    def thumbnail_webp_url(self):
+        return self.variant_url(self.thumbnail_size, 'webp')
+
+
+class ProfilePhotoField(models.ImageField):
+    attr_class = ProfilePhotoFieldFile
+
+
+class PhotoProcessor:
+    """
+    Builds the square thumbnails of profile photos on a local worker pool.
+
+    For every size in PROFILE_PHOTO_SIZES a JPEG and a WebP thumbnail are
+    stored next to the original (profile_photos/3f/3fa9...e1_96.jpg and
+    _96.webp). enqueue() returns at once; the thumbnails are built by
+    background threads, so requests never decode the original. Until
+    they exist, ProfilePhotoFieldFile.thumbnail_url points at a missing
+    file.
+
+    Settings:
+    - PROFILE_PHOTO_SIZES: thumbnail edge lengths in pixels (default (96, 320))
+    - PROFILE_PHOTO_WORKERS: background threads (default 2); 0 builds the
+      thumbnails in the calling thread, e.g. in tests
+
+    The queue lives in the server process and is lost on restart; the
+    process_profile_photos command builds any missing thumbnails.
+    """
+    formats = {'jpg': ('JPEG', {'quality': 85, 'optimize': True}), 'webp': ('WEBP', {'quality': 80, 'method': 4})}
+
+    def __init__(self):
+        self._executor = None
+
+    @property
+    def sizes(self):
+        return getattr(settings, 'PROFILE_PHOTO_SIZES', (96, 320))
+
+    @property
+    def workers(self):
+        return getattr(settings, 'PROFILE_PHOTO_WORKERS', 2)
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='profile-photos')
+        return self._executor
+
+    def enqueue(self, fieldfile):
+        if not self.workers:
+            self.process(fieldfile)
+        else:
+            self.executor.submit(self.process_logged, fieldfile)
+
+    def process_logged(self, fieldfile):
+        try:
+            self.process(fieldfile)
+        except Exception:
+            logger.exception('Cannot build the thumbnails of %s', fieldfile.name)
+
+    def missing_variants(self, fieldfile):
+        return [
+            (size, image_format) for size in self.sizes for image_format in self.formats
+            if not fieldfile.storage.exists(fieldfile.variant_name(size, image_format))
+        ]
+
+    def process(self, fieldfile):
+        """Build the thumbnails of fieldfile that do not exist yet; return how many were built."""
+        missing = self.missing_variants(fieldfile)
+        if not missing:
+            return 0
+        with fieldfile.storage.open(fieldfile.name, 'rb') as f:
+            image = Image.open(f)
+            # Let JPEG decode at a reduced scale close to the largest thumbnail
+            largest = max(size for size, _ in missing)
+            image.draft('RGB', (largest, largest))
+            image = ImageOps.exif_transpose(image).convert('RGB')
+        for size, image_format in missing:
+            thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            pil_format, options = self.formats[image_format]
+            buffer = BytesIO()
+            thumbnail.save(buffer, pil_format, **options)
+            fieldfile.storage.save(fieldfile.variant_name(size, image_format), ContentFile(buffer.getvalue()))
+        return len(missing)
+
+
+photo_processor = PhotoProcessor()
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .instrumentation import install_query_timer
+from .nplusone import install_query_detector
+from .photos import photo_processor
+
+# Count and time the SQL of requests sampled by RequestMetricsMiddleware
+connection_created.connect(install_query_timer)
+
+# Look for N+1 queries in requests and tests (see bookshelf.nplusone)
+connection_created.connect(install_query_detector)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def process_profile_photo(sender, instance, **kwargs):
+    # Build the thumbnails of a new upload once it is committed, off the request
+    if getattr(instance, '_profile_photo_uploaded', False):
+        del instance._profile_photo_uploaded
+        photo = instance.profile_photo
+        transaction.on_commit(lambda: photo_processor.enqueue(photo))
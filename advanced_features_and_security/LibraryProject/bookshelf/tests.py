@@ -1,3 +1,488 @@
-from django.test import TestCase
+import json
+import os
+import re
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from relationship_app.models import Author, Book, UserProfile
+
+from .authors import backfill_authors, verify_authors
+from .changelists import estimate_count
+
+from .instrumentation import Histogram, request_metrics_store
+from .models import Author as ShelfAuthor
+from .models import Book as ShelfBook
+from .nplusone import NPlusOneError, NPlusOneTestMixin, detect_n_plus_one
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    REQUEST_METRICS_SAMPLE_RATE=1.0,
+    REQUEST_METRICS_CACHE_ALIAS='request-metrics-tests',
+    REQUEST_METRICS_FLUSH_INTERVAL=0,
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'request-metrics-tests': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'request-metrics-tests',
+        },
+    },
+)
+class RequestMetricsTestCase(TestCase):
+    """Tests for RequestMetricsMiddleware on template-rendered pages."""
+
+    def setUp(self):
+        request_metrics_store.reset()
+
+    def test_server_timing_header(self):
+        """Sampled pages report their queries and template time"""
+        response = self.client.get(reverse('admin:login'))
+
+        timings = dict(re.findall(r'(\w+);dur=([\d.]+)', response['Server-Timing']))
+        self.assertEqual(set(timings), {'db', 'template', 'render', 'total'})
+        self.assertIn('desc="0 queries"', response['Server-Timing'])
+        self.assertGreater(float(timings['template']), 0)
+
+    def test_sampling_off(self):
+        """With a sample rate of 0 nothing is measured or recorded"""
+        with self.settings(REQUEST_METRICS_SAMPLE_RATE=0.0):
+            response = self.client.get(reverse('admin:login'))
+
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(request_metrics_store.load(), {})
+
+    def test_report(self):
+        """The request_metrics command reports percentiles per view"""
+        for _ in range(2):
+            self.client.get(reverse('admin:login'))
+
+        out = StringIO()
+        call_command('request_metrics', '--format', 'json', stdout=out)
+        report = json.loads(out.getvalue())
+
+        self.assertEqual(list(report), ['admin:login'])
+        self.assertEqual(report['admin:login']['total']['count'], 2)
+        self.assertEqual(report['admin:login']['queries']['p99'], 0)
+
+    def test_histogram_percentiles(self):
+        """Percentiles are read from buckets rounded to two significant digits"""
+        histogram = Histogram()
+        for value in [0.5, 1.234, 1.25, 40, 41]:
+            histogram.add(value)
+
+        self.assertEqual(histogram.percentile(50), 1.2)
+        self.assertEqual(histogram.percentile(99), 41)
+
+
+class NPlusOneDetectorTestCase(NPlusOneTestMixin, TestCase):
+    """Tests for the N+1 query detector on the relationship_app models."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ['Octavia E. Butler', 'N. K. Jemisin', 'Ann Leckie']:
+            Book.objects.create(title='%s novel' % name, author=Author.objects.create(name=name))
+
+    def test_lazy_relation_in_loop_raises(self):
+        """Reading book.author for every book is reported at the second author query"""
+        with self.assertRaisesMessage(NPlusOneError, 'FROM "relationship_app_author"'):
+            with self.assertNoNPlusOne():
+                [book.author.name for book in Book.objects.all()]
+
+    def test_eager_loading_passes(self):
+        """The same loop with select_related() runs one query"""
+        with self.assertNoNPlusOne(), self.assertNumQueries(1):
+            [book.author.name for book in Book.objects.select_related('author')]
+
+    def test_log_action(self):
+        """In 'log' mode each repeated query is logged once with its final count"""
+        with self.assertLogs('bookshelf.nplusone', 'WARNING') as logs:
+            with detect_n_plus_one('log'):
+                [book.author.name for book in Book.objects.all()]
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('3 identical queries', logs.output[0])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportUsersTestCase(TestCase):
+    """Tests for the import_users command."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def import_users(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command('import_users', path, '--workers', '0', *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv(self):
+        """Users, hashed passwords and profiles are created from a CSV file"""
+        path = self.write('members.csv', (
+            'username,email,password,date_of_birth,role\n'
+            'ada,ada@Example.COM,secret-1,1815-12-10,Librarian\n'
+            'grace,,,,\n'
+        ))
+
+        out, _ = self.import_users(path)
+
+        ada = get_user_model().objects.get(username='ada')
+        self.assertTrue(ada.check_password('secret-1'))
+        self.assertEqual(ada.email, 'ada@example.com')
+        self.assertEqual(str(ada.date_of_birth), '1815-12-10')
+        self.assertFalse(get_user_model().objects.get(username='grace').has_usable_password())
+        self.assertEqual(dict(UserProfile.objects.values_list('user__username', 'role')),
+                         {'ada': 'Librarian', 'grace': 'Member'})
+        self.assertIn('Imported 2 users', out)
+        self.assertFalse(os.path.exists(path + '.checkpoint'))
+
+    def test_jsonl_batches(self):
+        """JSON Lines are written in batches of one bulk INSERT each"""
+        path = self.write('members.jsonl', ''.join(
+            json.dumps({'username': 'member-%d' % n, 'password': 'secret'}) + '\n' for n in range(5)
+        ))
+
+        # Per batch: savepoint, existing usernames, users, profiles, release
+        with self.assertNumQueries(3 * 5):
+            out, _ = self.import_users(path, '--batch-size', '2', '--role', 'Admin')
+
+        self.assertEqual(UserProfile.objects.filter(role='Admin').count(), 5)
+        self.assertIn('4 rows done, 4 users imported', out)
+
+    def test_invalid_and_existing_rows(self):
+        """Bad rows are reported by line and existing usernames are skipped"""
+        get_user_model().objects.create_user('ada')
+        path = self.write('members.csv', (
+            'username,role\n'
+            'ada,\n'
+            ',Member\n'
+            'grace,Captain\n'
+            'linus,\n'
+            'linus,\n'
+        ))
+
+        out, err = self.import_users(path)
+
+        self.assertEqual(err.splitlines(), ["Line 3: username is required", "Line 4: unknown role 'Captain'"])
+        self.assertIn('Imported 1 users; skipped 2 existing and 2 invalid rows', out)
+
+    def test_field_validation(self):
+        """Values rejected by the model fields and non-object lines are invalid rows"""
+        path = self.write('members.jsonl', '\n'.join([
+            json.dumps({'username': 'a' * 151}),
+            json.dumps({'username': 'ada', 'email': 'not-an-email'}),
+            json.dumps({'username': 'grace lovelace'}),
+            '[1]',
+            '"linus"',
+            json.dumps({'username': 'linus'}),
+        ]) + '\n')
+
+        out, err = self.import_users(path)
+
+        self.assertEqual(err.splitlines(), [
+            'Line 1: username: Ensure this value has at most 150 characters (it has 151).',
+            'Line 2: email: Enter a valid email address.',
+            'Line 3: username: Enter a valid username. This value may contain only letters, numbers, '
+            'and @/./+/-/_ characters.',
+            'Line 4: expected an object, got list',
+            'Line 5: expected an object, got str',
+        ])
+        self.assertEqual(list(get_user_model().objects.values_list('username', flat=True)), ['linus'])
+        self.assertIn('Imported 1 users; skipped 0 existing and 5 invalid rows', out)
+
+    def test_resume_from_checkpoint(self):
+        """A rerun continues after the rows recorded in the checkpoint"""
+        path = self.write('members.csv', 'username\nada\ngrace\nlinus\n')
+        with open(path + '.checkpoint', 'w') as f:
+            json.dump({'source': os.path.abspath(path), 'rows': 2}, f)
+
+        out, _ = self.import_users(path)
+
+        self.assertIn('Resuming after row 2.', out)
+        self.assertEqual(list(get_user_model().objects.values_list('username', flat=True)), ['linus'])
+
+    def test_process_pool(self):
+        """Passwords hashed by worker processes are usable"""
+        path = self.write('members.csv', 'username,password\nada,secret-1\ngrace,secret-2\n')
+
+        call_command('import_users', path, '--workers', '2', stdout=StringIO())
+
+        self.assertTrue(get_user_model().objects.get(username='grace').check_password('secret-2'))
+
+
+class ProfilePhotoTestCase(TestCase):
+    """Tests for content-hashed profile photos and their thumbnails."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = self.settings(
+            MEDIA_ROOT=directory.name, PROFILE_PHOTO_SIZES=(48, 160), PROFILE_PHOTO_WORKERS=0,
+            SECURE_SSL_REDIRECT=False,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.media_root = directory.name
+
+    def upload(self, username, color='red', size=(640, 480)):
+        buffer = BytesIO()
+        Image.new('RGB', size, color).save(buffer, 'JPEG')
+        user = get_user_model().objects.create_user(username, password='secret-pass-1')
+        user.profile_photo = SimpleUploadedFile('Holiday Photo.JPG', buffer.getvalue(), 'image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        return user
+
+    def files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, names in os.walk(self.media_root) for name in names
+        )
+
+    def test_content_hashed_name_and_thumbnails(self):
+        """The original is stored under its hash, next to JPEG and WebP thumbnails"""
+        user = self.upload('ada')
+
+        name = user.profile_photo.name
+        self.assertRegex(name, r'^profile_photos/([0-9a-f]{2})/\1[0-9a-f]{62}\.jpg$')
+        stem = name[:-len('.jpg')]
+        self.assertEqual(self.files(), sorted([
+            name, stem + '_48.jpg', stem + '_48.webp', stem + '_160.jpg', stem + '_160.webp',
+        ]))
+        with Image.open(os.path.join(self.media_root, stem + '_160.webp')) as thumbnail:
+            self.assertEqual((thumbnail.format, thumbnail.size), ('WEBP', (160, 160)))
+
+    def test_field_file_save(self):
+        """FieldFile.save() with save=True builds the thumbnails, also for a stored photo"""
+        buffer = BytesIO()
+        Image.new('RGB', (640, 480), 'green').save(buffer, 'JPEG')
+        first = get_user_model().objects.create_user('ada', password='secret-pass-1')
+        second = get_user_model().objects.create_user('grace', password='secret-pass-1')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.profile_photo.save('p.jpg', ContentFile(buffer.getvalue()))
+        os.remove(os.path.join(self.media_root, first.profile_photo.variant_name(48, 'jpg')))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.profile_photo.save('p.jpg', ContentFile(buffer.getvalue()))
+
+        self.assertEqual(second.profile_photo.name, first.profile_photo.name)
+        self.assertEqual(len(self.files()), 5)
+        self.assertFalse(hasattr(first, '_profile_photo_uploaded'))
+        self.assertFalse(hasattr(second, '_profile_photo_uploaded'))
+
+    def test_identical_uploads_share_files(self):
+        """The same photo uploaded twice is stored once"""
+        first = self.upload('ada')
+        second = self.upload('grace')
+        third = self.upload('linus', color='blue')
+
+        self.assertEqual(first.profile_photo.name, second.profile_photo.name)
+        self.assertNotEqual(first.profile_photo.name, third.profile_photo.name)
+        self.assertEqual(len(self.files()), 10)
+
+    def test_process_profile_photos(self):
+        """The command builds thumbnails that are missing"""
+        user = self.upload('ada')
+        os.remove(os.path.join(self.media_root, user.profile_photo.variant_name(48, 'webp')))
+
+        out = StringIO()
+        call_command('process_profile_photos', stdout=out)
+
+        self.assertEqual(out.getvalue().strip(), 'Checked 1 photos, built 1 thumbnails.')
+        self.assertEqual(len(self.files()), 5)
+
+    def test_admin_shows_thumbnail(self):
+        """The user changelist links the thumbnail, not the original"""
+        user = self.upload('ada')
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='secret-pass-1'))
+
+        response = self.client.get(reverse('admin:bookshelf_customuser_changelist'))
+
+        self.assertContains(response, 'src="%s"' % user.profile_photo.thumbnail_url)
+        self.assertContains(response, 'srcset="%s"' % user.profile_photo.thumbnail_webp_url)
+        self.assertNotContains(response, 'src="%s"' % user.profile_photo.url)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class LargeTableAdminTestCase(TestCase):
+    """Tests for the Book and CustomUser changelists (bookshelf.changelists)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        ShelfBook.objects.bulk_create([
+            ShelfBook(title=title, author=author, publication_year=year) for title, author, year in [
+                ('The Hobbit', 'J. R. R. Tolkien', 1937),
+                ('the silmarillion', 'J. R. R. Tolkien', 1977),
+                ('Dune', 'Frank Herbert', 1965),
+                ('A Wizard of Earthsea', 'Ursula K. Le Guin', 1968),
+            ]
+        ])
+        cls.superuser = get_user_model().objects.create_superuser('admin', password='secret-pass-1')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.superuser)
+        self.url = reverse('admin:bookshelf_book_changelist')
+
+    def titles(self, response):
+        return sorted(book.title for book in response.context['cl'].result_list)
+
+    def test_facets_cached(self):
+        """Filter choices are computed once, with GROUP BY rather than DISTINCT"""
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get(self.url)
+        with CaptureQueriesContext(connection) as second:
+            self.client.get(self.url)
+
+        self.assertContains(response, '?author_ref=%d' % ShelfAuthor.objects.get(name='Frank Herbert').pk)
+        self.assertContains(response, '?publication_year=1937')
+        # Two GROUP BY queries and the author names
+        self.assertEqual(len(first) - len(second), 3)
+        self.assertFalse(any('DISTINCT' in query['sql'] for query in first.captured_queries))
+
+    def test_filter(self):
+        """A cached choice filters the rows by author id"""
+        response = self.client.get(self.url, {'author_ref': ShelfAuthor.objects.get(name='J. R. R. Tolkien').pk})
+
+        self.assertEqual(self.titles(response), ['The Hobbit', 'the silmarillion'])
+
+    def test_invalid_filter_value(self):
+        """A value of the wrong type redirects to the ?e=1 error page"""
+        for parameter in ['publication_year', 'author_ref']:
+            with self.subTest(parameter=parameter):
+                response = self.client.get(self.url, {parameter: 'abc'})
+                self.assertRedirects(response, self.url + '?e=1', fetch_redirect_response=False)
+
+    def test_prefix_search(self):
+        """Search matches the start of a column, in any case"""
+        self.assertEqual(self.titles(self.client.get(self.url, {'q': 'the'})),
+                         ['The Hobbit', 'the silmarillion'])
+        self.assertEqual(self.titles(self.client.get(self.url, {'q': 'THE S'})), ['the silmarillion'])
+        self.assertEqual(self.titles(self.client.get(self.url, {'q': 'frank'})), ['Dune'])
+        self.assertEqual(self.titles(self.client.get(self.url, {'q': 'j. r. r. tolkien'})),
+                         ['The Hobbit', 'the silmarillion'])
+        self.assertEqual(self.titles(self.client.get(self.url, {'q': 'Hobbit'})), [])
+
+        response = self.client.get(reverse('admin:bookshelf_author_changelist'), {'q': 'ursula'})
+        self.assertEqual([author.name for author in response.context['cl'].result_list], ['Ursula K. Le Guin'])
+
+    def test_user_changelist(self):
+        """The user changelist does not load passwords and searches by prefix"""
+        url = reverse('admin:bookshelf_customuser_changelist')
+        get_user_model().objects.create_user('Grace', email='grace@example.com')
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+
+        self.assertContains(response, 'admin')
+        # The changelist rows, unlike request.user, are ordered by username
+        [rows] = [query['sql'] for query in context.captured_queries if 'ORDER BY' in query['sql']
+                  and 'FROM "bookshelf_customuser"' in query['sql']]
+        self.assertNotIn('"password"', rows)
+        for term in ['grace', 'GRACE@EX']:
+            with self.subTest(term=term):
+                response = self.client.get(url, {'q': term})
+                self.assertEqual([user.username for user in response.context['cl'].result_list], ['Grace'])
+
+    def test_estimated_count(self):
+        """Unfiltered tables past the threshold are counted from the estimate"""
+        with mock.patch('bookshelf.changelists.estimate_count', return_value=123456):
+            with self.settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1000):
+                self.assertContains(self.client.get(self.url), '123456 books')
+                self.assertContains(self.client.get(self.url, {'q': 'Dune'}), '1 book')
+            with self.settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1000000):
+                self.assertContains(self.client.get(self.url), '4 books')
+
+    def test_estimate_count_sqlite(self):
+        """SQLite estimates come from ANALYZE"""
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        self.assertEqual(estimate_count(ShelfBook), 4)
+
+
+class BookAuthorTestCase(TestCase):
+    """Tests for the move of Book.author to the Author table (bookshelf.authors)."""
+
+    def test_save_links_author(self):
+        """Saving a book links it to the author of its name, created when missing"""
+        book = ShelfBook.objects.create(title='Dune', author='Frank Herbert', publication_year=1965)
+        self.assertEqual(book.author_ref.name, 'Frank Herbert')
+
+        book = ShelfBook.objects.get(pk=book.pk)
+        with self.assertNumQueries(1):
+            book.title = 'Dune Messiah'
+            book.save()
+
+        book.author = 'Brian Herbert'
+        book.save(update_fields=['author'])
+        book.refresh_from_db()
+        self.assertEqual(book.author_ref.name, 'Brian Herbert')
+        self.assertEqual(ShelfAuthor.objects.count(), 2)
+
+    def test_bulk_writes_link_authors(self):
+        """bulk_create(), bulk_update() and update(author=...) set author_ref too"""
+        ShelfBook.objects.bulk_create([
+            ShelfBook(title='The Hobbit', author='J. R. R. Tolkien', publication_year=1937),
+            ShelfBook(title='The Silmarillion', author='J. R. R. Tolkien', publication_year=1977),
+        ])
+        self.assertEqual(ShelfAuthor.objects.get().books.count(), 2)
+
+        ShelfBook.objects.filter(title='The Silmarillion').update(author='Christopher Tolkien')
+        self.assertEqual(ShelfBook.objects.get(title='The Silmarillion').author_ref.name, 'Christopher Tolkien')
+
+        book = ShelfBook.objects.get(title='The Hobbit')
+        book.author = 'Tolkien'
+        ShelfBook.objects.bulk_update([book], ['author'])
+        self.assertEqual(ShelfBook.objects.get(title='The Hobbit').author_ref.name, 'Tolkien')
+        self.assertEqual(verify_authors(ShelfBook), (0, 0))
+
+    def test_backfill(self):
+        """Books written without author_ref are linked batch by batch, then verify"""
+        ShelfBook.objects.bulk_create([
+            ShelfBook(title='Book %d' % n, author='Author %d' % (n % 3), publication_year=2000) for n in range(7)
+        ])
+        ShelfBook.objects.update(author_ref=None)
+        ShelfAuthor.objects.filter(name='Author 2').delete()
+        self.assertEqual(verify_authors(ShelfBook), (7, 0))
+
+        batches = list(backfill_authors(ShelfBook, ShelfAuthor, batch_size=3))
+
+        self.assertEqual([(read, linked) for _, read, linked in batches], [(3, 3), (3, 3), (1, 1)])
+        self.assertEqual(verify_authors(ShelfBook), (0, 0))
+        for book in ShelfBook.objects.select_related('author_ref'):
+            self.assertEqual(book.author_ref.name, book.author)
+
+    def test_command_verify(self):
+        """--verify fails while a book is linked to another author"""
+        book = ShelfBook.objects.create(title='Dune', author='Frank Herbert', publication_year=1965)
+        ShelfBook.objects.filter(pk=book.pk).update(author_ref=ShelfAuthor.objects.create(name='Someone Else'))
+
+        with self.assertRaisesMessage(CommandError, '0 books have no author_ref and 1 an author_ref'):
+            call_command('backfill_book_authors', verify=True, stdout=StringIO())
+
+        ShelfBook.objects.update(author_ref=None)
+        out = StringIO()
+        call_command('backfill_book_authors', verify=True, stdout=out)
+        self.assertIn('Every book is linked to its author.', out.getvalue())
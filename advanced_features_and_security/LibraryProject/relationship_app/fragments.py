@@ -0,0 +1,110 @@
+import hashlib
+import json
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import models
+
+
+class FragmentCache:
+    """
+    Cache of rendered template fragments keyed by model versions.
+
+    Every model instance and every model table has a version counter in
+    the cache. A fragment's key is built from the versions of the objects
+    and tables it depends on (see the {% cachefragment %} tag), so bumping
+    a version (done by the receivers in relationship_app.signals, once the
+    write commits) makes exactly the fragments built from that object
+    unreachable. Stale fragments are never read again and simply expire.
+
+    Versions:
+    - Book and Author instances: their own saves and deletes
+    - Library instances: their own saves, changes to Library.books (the
+      through table, via m2m_changed), and saves or deletes of any book in
+      the library or of any author of those books
+    - Tables ('relationship_app.book'): any save or delete in the table
+
+    Settings:
+    - FRAGMENT_CACHE_ALIAS: cache alias to use (default 'default')
+    - FRAGMENT_CACHE_TIMEOUT: seconds to keep a fragment (default 600);
+      0 disables fragment caching
+
+    QuerySet.update(), bulk_create() and raw SQL send no signals and do not
+    bump versions.
+    """
+    key_prefix = 'relationship_app:fragments'
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'FRAGMENT_CACHE_ALIAS', 'default')]
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 600)
+
+    @property
+    def enabled(self):
+        return bool(self.timeout)
+
+    def version_key(self, dependency):
+        if isinstance(dependency, models.Model):
+            return '%s:version:%s:%s' % (self.key_prefix, dependency._meta.label_lower, dependency.pk)
+        return '%s:version:%s' % (self.key_prefix, dependency.lower())
+
+    def new_version(self):
+        # Start from the clock so that an evicted counter never repeats an old value
+        return time.time_ns()
+
+    def is_versioned(self, dependency):
+        if isinstance(dependency, models.Model):
+            return True
+        if isinstance(dependency, str) and '.' in dependency:
+            try:
+                apps.get_model(dependency)
+            except (LookupError, ValueError):
+                return False
+            return True
+        return False
+
+    def get_versions(self, keys):
+        versions = self.cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                self.cache.add(key, self.new_version(), timeout=None)
+                versions[key] = self.cache.get(key)
+        return [versions[key] for key in keys]
+
+    def bump(self, model, pks=()):
+        """Invalidate the fragments of model's table and of the instances with pks."""
+        label = model._meta.label_lower
+        keys = [self.version_key(label)]
+        keys += ['%s:version:%s:%s' % (self.key_prefix, label, pk) for pk in pks]
+        for key in keys:
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.set(key, self.new_version(), timeout=None)
+
+    def make_key(self, name, dependencies):
+        """
+        Return the cache key of fragment name.
+
+        Model instances and model labels ('relationship_app.book') add their
+        version to the key; any other value, such as a page number, is
+        part of the key as is.
+        """
+        version_keys = [self.version_key(d) for d in dependencies if self.is_versioned(d)]
+        values = [str(d) for d in dependencies if not self.is_versioned(d)]
+        signature = json.dumps([name, version_keys, self.get_versions(version_keys), values], separators=(',', ':'))
+        return '%s:%s:%s' % (self.key_prefix, name, hashlib.sha256(signature.encode('utf-8')).hexdigest())
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, content):
+        self.cache.set(key, content, timeout=self.timeout)
+
+
+fragment_cache = FragmentCache()
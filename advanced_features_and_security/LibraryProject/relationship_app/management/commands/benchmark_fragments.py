@@ -0,0 +1,93 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from relationship_app.fragments import fragment_cache
+from relationship_app.models import Author, Book, Library
+from relationship_app.views import LibraryDetailView, book_list
+
+
+class Command(BaseCommand):
+    """
+    Compare render time of the book list and library detail pages with
+    fragment caching off, and on with a cold cache, a warm cache and
+    right after one book was edited.
+
+    Books are seeded inside a transaction that is rolled back afterwards.
+    Fragments go to a private local-memory cache, so the command never
+    touches FRAGMENT_CACHE_ALIAS.
+
+    Usage:
+        python manage.py benchmark_fragments --books 5000 --repeat 5
+    """
+    help = 'Benchmark template fragment caching on the relationship_app pages.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=5000, help='Books in the library and the book list.')
+        parser.add_argument('--repeat', type=int, default=5, help='Renders per measurement (median is reported).')
+
+    # Keep the benchmark's fragments out of the real cache
+    @override_settings(
+        CACHES={'benchmark-fragments': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 1000000},
+        }},
+        FRAGMENT_CACHE_ALIAS='benchmark-fragments',
+    )
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            library = self.seed(options['books'])
+            pages = [
+                ('book list', book_list, {}),
+                ('library detail', LibraryDetailView.as_view(), {'pk': library.pk}),
+            ]
+
+            self.stdout.write('%-16s %-14s %10s %9s' % ('page', 'cache', 'ms', 'queries'))
+            for label, view, kwargs in pages:
+                for state in ['off', 'cold', 'warm', 'one book edited']:
+                    elapsed, queries = self.measure(view, kwargs, state, library, options['repeat'])
+                    self.stdout.write('%-16s %-14s %10.2f %9d' % (label, state, elapsed * 1000, queries))
+
+            transaction.set_rollback(True)
+
+    def seed(self, count, batch_size=5000):
+        authors = Author.objects.bulk_create([Author(name='Author %d' % n) for n in range(max(count // 10, 1))])
+        books = []
+        for offset in range(0, count, batch_size):
+            books += Book.objects.bulk_create([
+                Book(title='Book %07d' % n, author=authors[n % len(authors)])
+                for n in range(offset, min(offset + batch_size, count))
+            ])
+        library = Library.objects.create(name='Benchmark Library')
+        library.books.set(books)
+        return library
+
+    def prepare(self, view, kwargs, state, library):
+        fragment_cache.cache.clear()
+        if state in ('warm', 'one book edited'):
+            self.render(view, kwargs)
+        if state == 'one book edited':
+            book = library.books.order_by('title', 'pk').first()
+            book.title += ' (revised)'
+            book.save()
+
+    def render(self, view, kwargs):
+        response = view(RequestFactory().get('/'), **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response.content
+
+    def measure(self, view, kwargs, state, library, repeat):
+        """Return the median seconds and the query count of one render in state."""
+        timings = []
+        with override_settings(FRAGMENT_CACHE_TIMEOUT=0 if state == 'off' else 600):
+            for _ in range(repeat):
+                self.prepare(view, kwargs, state, library)
+                with CaptureQueriesContext(connection) as context:
+                    start = time.perf_counter()
+                    self.render(view, kwargs)
+                    timings.append(time.perf_counter() - start)
+        return sorted(timings)[len(timings) // 2], len(context.captured_queries)
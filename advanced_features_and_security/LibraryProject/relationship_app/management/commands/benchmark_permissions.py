@@ -0,0 +1,123 @@
+import statistics
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from relationship_app.backends import RoleModelBackend
+from relationship_app.permissions import permission_cache
+
+# Checked by the permission_required views of relationship_app and bookshelf
+PERMISSIONS = [
+    'relationship_app.can_add_book',
+    'relationship_app.can_change_book',
+    'relationship_app.can_delete_book',
+    'bookshelf.can_view',
+    'bookshelf.can_create',
+    'bookshelf.can_edit',
+    'bookshelf.can_delete',
+]
+
+
+class Command(BaseCommand):
+    """
+    Measure the permission check of permission_required views for many
+    logged-in users making requests from concurrent threads, with the
+    permission cache off, cold (first request of every user) and warm.
+
+    A request is what the auth middleware and the decorator do: load the
+    user with RoleModelBackend.get_user() and call has_perm(). Views are not
+    rendered, so the numbers are the cost of the permission gate alone.
+
+    Threads need their own database connections, so the users and their
+    group are committed and deleted again when the command finishes.
+    The cache is a private local-memory cache.
+
+    Usage:
+        python manage.py benchmark_permissions --users 200 --threads 8 --requests 20
+    """
+    help = 'Benchmark the permission cache under concurrent logged-in users.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Logged-in users.')
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent request threads.')
+        parser.add_argument('--requests', type=int, default=20, help='Requests per user in the warm run.')
+
+    # Keep the benchmark's permission sets out of the real cache
+    @override_settings(
+        CACHES={'benchmark-permissions': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 1000000},
+        }},
+        PERMISSION_CACHE_ALIAS='benchmark-permissions',
+    )
+    def handle(self, *args, **options):
+        user_pks, group = self.seed(options['users'])
+        try:
+            self.stdout.write('%-6s %9s %10s %10s %9s' % ('cache', 'requests', 'req/s', 'p50 ms', 'queries'))
+            for state in ['off', 'cold', 'warm']:
+                requests = options['requests'] if state != 'cold' else 1
+                with override_settings(PERMISSION_CACHE_TIMEOUT=0 if state == 'off' else 300):
+                    permission_cache.cache.clear()
+                    if state == 'warm':
+                        self.run(user_pks, 1, options['threads'])
+                    elapsed, timings, queries = self.run(user_pks, requests, options['threads'])
+                self.stdout.write('%-6s %9d %10.0f %10.3f %9.2f' % (
+                    state, len(timings), len(timings) / elapsed,
+                    statistics.median(timings) * 1000, queries / len(timings),
+                ))
+        finally:
+            get_user_model().objects.filter(pk__in=user_pks).delete()
+            group.delete()
+
+    def seed(self, count):
+        group = Group.objects.create(name='Benchmark permissions')
+        group.permissions.set(Permission.objects.filter(
+            content_type__app_label__in=['relationship_app', 'bookshelf'],
+            codename__in=[name.split('.')[1] for name in PERMISSIONS],
+        ))
+        UserModel = get_user_model()
+        users = UserModel.objects.bulk_create([
+            UserModel(username='benchmark-permissions-%d' % n) for n in range(count)
+        ])
+        group.user_set.add(*users)
+        return [user.pk for user in users], group
+
+    def run(self, user_pks, requests, threads):
+        """Return the wall time, the per-request timings and the query count of a run."""
+        timings = []
+        queries = []
+        lock = threading.Lock()
+        backend = RoleModelBackend()
+
+        def worker(pks):
+            local_timings = []
+            local_queries = []
+
+            def count_query(execute, sql, params, many, context):
+                local_queries.append(sql)
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(count_query):
+                for n in range(requests):
+                    for pk in pks:
+                        start = time.perf_counter()
+                        user = backend.get_user(pk)
+                        user.has_perm(PERMISSIONS[(pk + n) % len(PERMISSIONS)])
+                        local_timings.append(time.perf_counter() - start)
+            connection.close()
+            with lock:
+                timings.extend(local_timings)
+                queries.extend(local_queries)
+
+        workers = [threading.Thread(target=worker, args=(user_pks[n::threads],)) for n in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return time.perf_counter() - start, timings, len(queries)
@@ -0,0 +1,78 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import get_user_model, login
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from relationship_app.models import UserProfile
+
+
+class Command(BaseCommand):
+    """
+    Measure signup and login throughput with the UserProfile strategy.
+
+    Signups are run one user at a time with create_user(), and as one
+    import with UserProfile.objects.create_users(). Logins call
+    django.contrib.auth.login() on a fresh session for every user, which
+    saves last_login. Passwords are left unusable so that hashing does not
+    hide the database cost.
+
+    Everything runs inside a transaction that is rolled back afterwards.
+
+    Usage:
+        python manage.py benchmark_profiles --users 1000
+    """
+    help = 'Benchmark signup and login throughput with lazily created user profiles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Users to sign up and log in.')
+
+    def handle(self, *args, **options):
+        count = options['users']
+        UserModel = get_user_model()
+
+        with transaction.atomic():
+            self.stdout.write('%-20s %8s %10s %9s' % ('operation', 'users', 'users/s', 'queries'))
+
+            def signup():
+                return [
+                    UserModel.objects.create_user('benchmark-signup-%d' % n, password=None)
+                    for n in range(count)
+                ]
+            users = self.measure('signup (one by one)', count, signup)
+
+            def bulk_signup():
+                return UserProfile.objects.create_users([
+                    self.unsaved_user(UserModel, 'benchmark-import-%d' % n) for n in range(count)
+                ])
+            self.measure('signup (bulk)', count, bulk_signup)
+
+            SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+
+            def log_in():
+                for user in users:
+                    request = RequestFactory().post('/login/')
+                    request.session = SessionStore()
+                    login(request, user, backend=settings.AUTHENTICATION_BACKENDS[0])
+            self.measure('login', count, log_in)
+
+            transaction.set_rollback(True)
+
+    def unsaved_user(self, UserModel, username):
+        user = UserModel(username=username)
+        user.set_unusable_password()
+        return user
+
+    def measure(self, label, count, operation):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            result = operation()
+            elapsed = time.perf_counter() - start
+        self.stdout.write('%-20s %8d %10.0f %9.2f' % (
+            label, count, count / elapsed, len(context) / count,
+        ))
+        return result
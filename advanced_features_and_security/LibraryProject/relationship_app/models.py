@@ -1,5 +1,5 @@
+from django.conf import settings
 from django.db import models
-from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
@@ -11,9 +11,23 @@ class Author(models.Model):
     def __str__(self):
         return self.name
 
+class BookQuerySet(models.QuerySet):
+    def with_author(self):
+        # Join the author so book.author.name costs no extra query per book
+        return self.select_related('author')
+
+class LibraryQuerySet(models.QuerySet):
+    def with_books(self):
+        # Load every library's books, with their authors, in one extra query
+        return self.prefetch_related(
+            models.Prefetch('books', queryset=Book.objects.with_author().order_by('title', 'pk')),
+        )
+
 class Book(models.Model):
     title = models.CharField(max_length=200)
     author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='books')
+
+    objects = BookQuerySet.as_manager()
     
     def __str__(self):
         return self.title
@@ -28,6 +42,8 @@ class Book(models.Model):
 class Library(models.Model):
     name = models.CharField(max_length=200)
     books = models.ManyToManyField(Book, related_name='libraries')
+
+    objects = LibraryQuerySet.as_manager()
     
     def __str__(self):
         return self.name
@@ -43,24 +59,86 @@ class Librarian(models.Model):
         return self.name
 
 
+class UserProfileQuerySet(models.QuerySet):
+    def for_user(self, user):
+        """
+        Return the profile of user, creating it on first use.
+
+        Profiles are not created at signup; a user without one has the
+        default role (see relationship_app.backends.get_role).
+        """
+        profile, _ = self.get_or_create(user=user)
+        user.userprofile = profile
+        return profile
+
+    def create_for_users(self, users, role=None, batch_size=None):
+        """Insert a profile for each of the saved users that has none yet."""
+        existing = set(self.filter(user__in=users).values_list('user_id', flat=True))
+        profiles = [
+            self.model(user=user, role=role or self.model.DEFAULT_ROLE)
+            for user in users if user.pk not in existing
+        ]
+        return self.bulk_create(profiles, batch_size=batch_size, ignore_conflicts=True)
+
+    def create_users(self, users, role=None, batch_size=None):
+        """
+        Insert unsaved users and their profiles with one bulk INSERT each.
+
+        Like QuerySet.bulk_create(), no signals are sent and save() is not
+        called, so passwords must already be hashed (set_password()).
+        """
+        UserModel = self.model._meta.get_field('user').related_model
+        users = UserModel._default_manager.bulk_create(users, batch_size=batch_size)
+        if any(user.pk is None for user in users):
+            # Backends that cannot return the new primary keys from bulk_create()
+            pks = dict(UserModel._default_manager.filter(
+                username__in=[user.username for user in users],
+            ).values_list('username', 'pk'))
+            for user in users:
+                user.pk = pks[user.username]
+        # New users have no profiles yet, so there is nothing to look up
+        self.bulk_create(
+            [self.model(user=user, role=role or self.model.DEFAULT_ROLE) for user in users],
+            batch_size=batch_size,
+        )
+        return users
+
+
 class UserProfile(models.Model):
     ROLE_CHOICES = (
         ('Admin', 'Admin'),
         ('Librarian', 'Librarian'),
         ('Member', 'Member'),
     )
-    user = models.OneToOneField(User, on_delete=models.CASCADE)
-    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='Member')
-    
+    DEFAULT_ROLE = 'Member'
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default=DEFAULT_ROLE)
+
+    objects = UserProfileQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_role = instance.role
+        return instance
+
+    def has_changed(self):
+        """Whether the profile is unsaved or its role was changed since it was loaded."""
+        return self._state.adding or getattr(self, '_loaded_role', None) != self.role
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_role = self.role
+
     def __str__(self):
         return f"{self.user.username} - {self.role}"
 
 
-@receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
-        UserProfile.objects.create(user=instance)
-
-@receiver(post_save, sender=User)
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def save_user_profile(sender, instance, **kwargs):
-    instance.userprofile.save()
+    # Saving a user (e.g. last_login at every login) only writes the profile
+    # when it is already loaded and was changed; it never queries for it
+    profile_field = instance._meta.get_field('userprofile')
+    profile = profile_field.get_cached_value(instance, None)
+    if profile is not None and profile.has_changed():
+        profile.save()
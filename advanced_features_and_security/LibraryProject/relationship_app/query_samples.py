@@ -57,7 +57,8 @@ def get_books_by_author(author_name):
 # Query 2: List all books in a library
 def get_books_in_library(library_name):
     try:
-        library = Library.objects.get(name=library_name)
+        # Prefetches the books with their authors: two queries in total
+        library = Library.objects.with_books().get(name=library_name)
         books = library.books.all()
         
         print(f"\nBooks in {library_name}:")
@@ -0,0 +1,114 @@
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .fragments import fragment_cache
+from .models import Author, Book, Library
+from .permissions import permission_cache
+
+
+def get_library_pks(instance):
+    """Return the pks of the libraries listing book or one of author's books."""
+    if isinstance(instance, Book):
+        return list(Library.objects.filter(books=instance).values_list('pk', flat=True))
+    return list(Library.objects.filter(books__author=instance).values_list('pk', flat=True).distinct())
+
+
+def bump_fragments(model, pks, using):
+    # Only once the write is committed: bumped earlier, a concurrent request
+    # could still render the old rows and cache them under the new version
+    transaction.on_commit(partial(fragment_cache.bump, model, list(pks)), using=using)
+
+
+@receiver(post_save, sender=Library)
+@receiver(post_delete, sender=Library)
+def invalidate_library_fragments(sender, instance, using, **kwargs):
+    bump_fragments(Library, [instance.pk], using)
+
+
+@receiver(pre_delete, sender=Book)
+@receiver(pre_delete, sender=Author)
+def remember_libraries(sender, instance, **kwargs):
+    # The library links are gone by post_delete, so look them up first
+    instance._fragment_library_pks = get_library_pks(instance)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def invalidate_book_fragments(sender, instance, using, **kwargs):
+    """Invalidate the book or author and the libraries listing it."""
+    library_pks = getattr(instance, '_fragment_library_pks', None)
+    if library_pks is None:
+        library_pks = get_library_pks(instance)
+    bump_fragments(sender, [instance.pk], using)
+    bump_fragments(Library, library_pks, using)
+
+
+@receiver(m2m_changed, sender=Library.books.through)
+def invalidate_library_books_fragments(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """Invalidate the libraries whose list of books changed."""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            bump_fragments(Library, [instance.pk], using)
+    elif action == 'pre_clear':
+        # book.libraries.clear() does not say which libraries lose the book
+        instance._fragment_library_pks = get_library_pks(instance)
+    elif action == 'post_clear':
+        bump_fragments(Library, instance._fragment_library_pks, using)
+    elif action in ('post_add', 'post_remove'):
+        bump_fragments(Library, pk_set, using)
+
+
+def bump_permissions(user_pks, using):
+    # Only once the write is committed: bumped earlier, a concurrent request
+    # could still load the old permissions and cache them under the new version
+    if user_pks is not None:
+        user_pks = list(user_pks)
+    transaction.on_commit(partial(permission_cache.bump, user_pks), using=using)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_permissions(sender, instance, created, update_fields, using, **kwargs):
+    # is_active and is_superuser change what the backend returns; the
+    # last_login update at every login changes neither
+    if not created and update_fields != frozenset(['last_login']):
+        bump_permissions([instance.pk], using)
+
+
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+@receiver(post_delete, sender=Group)
+def invalidate_all_permissions(sender, using, **kwargs):
+    """Invalidate every user's permissions; groups reach any number of users."""
+    bump_permissions(None, using)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_permissions(sender, action, using, **kwargs):
+    if action.startswith('post_'):
+        bump_permissions(None, using)
+
+
+def invalidate_member_permissions(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """Invalidate the users whose groups or user_permissions changed."""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump_permissions([instance.pk], using)
+    elif action == 'post_clear':
+        # group.user_set.clear() does not say which users it removed
+        bump_permissions(None, using)
+    else:
+        bump_permissions(pk_set, using)
+
+
+UserModel = get_user_model()
+m2m_changed.connect(invalidate_member_permissions, sender=UserModel.groups.through)
+m2m_changed.connect(invalidate_member_permissions, sender=UserModel.user_permissions.through)
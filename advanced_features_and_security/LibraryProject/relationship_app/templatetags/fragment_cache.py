@@ -0,0 +1,48 @@
+from django import template
+
+from ..fragments import fragment_cache
+
+register = template.Library()
+
+
+class CacheFragmentNode(template.Node):
+    def __init__(self, nodelist, name, dependencies):
+        self.nodelist = nodelist
+        self.name = name
+        self.dependencies = dependencies
+
+    def render(self, context):
+        if not fragment_cache.enabled:
+            return self.nodelist.render(context)
+        key = fragment_cache.make_key(self.name, [dependency.resolve(context) for dependency in self.dependencies])
+        content = fragment_cache.get(key)
+        if content is None:
+            content = self.nodelist.render(context)
+            fragment_cache.set(key, content)
+        return content
+
+
+@register.tag
+def cachefragment(parser, token):
+    """
+    Cache the enclosed fragment until one of its dependencies changes.
+
+    Usage:
+        {% load fragment_cache %}
+        {% cachefragment "book_row" book book.author %}...{% endcachefragment %}
+        {% cachefragment "book_list" "relationship_app.book" "relationship_app.author" %}...{% endcachefragment %}
+
+    Model instances depend on that row, model labels on the whole table
+    and anything else (e.g. page_obj.number) simply varies the key; see
+    relationship_app.fragments.FragmentCache. Querysets passed to the
+    fragment as context are lazy, so a cache hit skips their queries.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError("'%s' tag requires a fragment name." % bits[0])
+    nodelist = parser.parse(('endcachefragment',))
+    parser.delete_first_token()
+    name = bits[1]
+    if name[0] in ('"', "'") and name[-1] == name[0]:
+        name = name[1:-1]
+    return CacheFragmentNode(nodelist, name, [parser.compile_filter(bit) for bit in bits[2:]])
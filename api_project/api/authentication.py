@@ -0,0 +1,211 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from .models import AuthToken
+
+
+class ExpiringLRU:
+    """
+    Thread-safe in-process mapping with a size bound and per-entry expiry.
+
+    Least recently used entries are evicted first once more than
+    max_entries are stored; expired entries are dropped when read.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout, max_entries):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def delete_matching(self, predicate):
+        with self._lock:
+            for key in [key for key, (value, _) in self._entries.items() if predicate(value)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TokenCache:
+    """
+    Two-tier cache of authenticated tokens, keyed by the token digest.
+
+    Tiers:
+    - An in-process LRU holding at most TOKEN_AUTH_CACHE_MAX_ENTRIES tokens,
+      each for TOKEN_AUTH_CACHE_TIMEOUT seconds; a hit costs no query and no
+      network round trip
+    - An optional shared Django cache (TOKEN_AUTH_CACHE_ALIAS), consulted on
+      local misses, so a token verified by one process is known to the others
+
+    Cached tokens carry their user, so a hit returns both without touching the
+    database. Only valid tokens of active users are stored; unknown keys are
+    never cached, so random keys cannot flush the LRU. Entries never outlive
+    the token's own expiry.
+
+    Invalidation (see api.signals), once the write commits:
+    - Deleting or saving a token (e.g. shortening it on rotation) removes it
+      from both tiers
+    - Saving a user (e.g. is_active = False) removes that user's tokens
+    - Other processes' local tiers only learn about a change when their
+      entry expires, so TOKEN_AUTH_CACHE_TIMEOUT bounds how long a revoked
+      token or deactivated user keeps working there; QuerySet.update() sends
+      no signals and is bounded the same way
+
+    Settings:
+    - TOKEN_AUTH_CACHE_TIMEOUT: seconds an entry lives (default 60); 0
+      disables the cache
+    - TOKEN_AUTH_CACHE_MAX_ENTRIES: size of the local LRU (default 10000)
+    - TOKEN_AUTH_CACHE_ALIAS: cache alias of the shared tier (default None,
+      local tier only)
+    """
+    key_prefix = 'api:token-auth'
+
+    def __init__(self):
+        self.local = ExpiringLRU()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'TOKEN_AUTH_CACHE_TIMEOUT', 60)
+
+    @property
+    def max_entries(self):
+        return getattr(settings, 'TOKEN_AUTH_CACHE_MAX_ENTRIES', 10000)
+
+    @property
+    def shared_cache(self):
+        alias = getattr(settings, 'TOKEN_AUTH_CACHE_ALIAS', None)
+        return None if alias is None else caches[alias]
+
+    def shared_key(self, digest):
+        return '%s:%s' % (self.key_prefix, digest)
+
+    def get_timeout(self, token):
+        remaining = (token.expires - timezone.now()).total_seconds()
+        return max(min(self.timeout, remaining), 0)
+
+    def get(self, digest):
+        """Return a copy of the cached token (with its user) or None."""
+        if not self.timeout:
+            return None
+        token = self.local.get(digest)
+        if token is None:
+            shared_cache = self.shared_cache
+            token = None if shared_cache is None else shared_cache.get(self.shared_key(digest))
+            if token is not None:
+                self.local.set(digest, token, self.get_timeout(token), self.max_entries)
+        if token is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.copy(token)
+
+    def set(self, digest, token):
+        timeout = self.get_timeout(token) if self.timeout else 0
+        if not timeout:
+            return
+        token = self.copy(token)
+        self.local.set(digest, token, timeout, self.max_entries)
+        shared_cache = self.shared_cache
+        if shared_cache is not None:
+            shared_cache.set(self.shared_key(digest), token, timeout=timeout)
+
+    @staticmethod
+    def copy(token):
+        # Callers get their own instances, so changes to request.user or
+        # request.auth never leak into the cache or other threads
+        token = copy.copy(token)
+        token.user = copy.copy(token.user)
+        return token
+
+    def invalidate(self, *digests):
+        self.local.delete(*digests)
+        shared_cache = self.shared_cache
+        if shared_cache is not None and digests:
+            shared_cache.delete_many([self.shared_key(digest) for digest in digests])
+
+    def invalidate_user(self, user_pk, shared_digests=()):
+        """Drop every local entry of the user, and shared_digests from the shared tier."""
+        self.local.delete_matching(lambda token: token.user_id == user_pk)
+        shared_cache = self.shared_cache
+        if shared_cache is not None and shared_digests:
+            shared_cache.delete_many([self.shared_key(digest) for digest in shared_digests])
+
+    def clear(self):
+        self.local.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {'size': len(self.local), 'hits': self.hits, 'misses': self.misses}
+
+
+token_cache = TokenCache()
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+    """
+    Authentication with expiring AuthTokens, remembered in token_cache.
+
+    The presented key is hashed and looked up by digest together with its
+    user; the lookup and the is_active check only run on cache misses, so a
+    hit authenticates the request with zero queries. Expired tokens are
+    rejected whether they come from the cache or the database.
+    Clients are unchanged: "Authorization: Token <key>".
+    """
+    model = AuthToken
+    cache = token_cache
+
+    def authenticate_credentials(self, key):
+        digest = AuthToken.hash_key(key)
+        token = self.cache.get(digest)
+        if token is None:
+            try:
+                token = self.model.objects.select_related('user').get(digest=digest)
+            except self.model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+            if not token.user.is_active:
+                raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+            self.cache.set(digest, token)
+
+        if token.is_expired():
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+        return token.user, token
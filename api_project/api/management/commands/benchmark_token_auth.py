@@ -0,0 +1,67 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory
+
+from api.authentication import CachingTokenAuthentication, token_cache
+from api.tokens import issue_token
+
+
+class Command(BaseCommand):
+    """
+    Measure per-request authentication cost of CachingTokenAuthentication
+    with the token cache disabled (one digest lookup per request, like
+    DRF's TokenAuthentication) and enabled.
+
+    Users and tokens are created inside a transaction that is rolled back
+    afterwards. Requests pick one of --tokens tokens at random, so a --tokens
+    larger than TOKEN_AUTH_CACHE_MAX_ENTRIES shows the cost of LRU evictions.
+
+    Usage:
+        python manage.py benchmark_token_auth --tokens 1000 --requests 20000
+    """
+    help = 'Benchmark TokenAuthentication with and without the token cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tokens', type=int, default=1000, help='Number of distinct users/tokens.')
+        parser.add_argument('--requests', type=int, default=20000, help='Authenticated requests per class.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            keys = self.seed(options['tokens'])
+            rng = random.Random(0)
+            factory = APIRequestFactory()
+            requests = [
+                factory.get('/api/books/', HTTP_AUTHORIZATION='Token %s' % rng.choice(keys))
+                for _ in range(options['requests'])
+            ]
+
+            self.stdout.write('%-28s %12s %14s' % ('authentication', 'us/request', 'queries/request'))
+            for label, timeout in [('uncached', 0), ('cached', token_cache.timeout or 60)]:
+                token_cache.clear()
+                with override_settings(TOKEN_AUTH_CACHE_TIMEOUT=timeout), \
+                        CaptureQueriesContext(connection) as context:
+                    authentication = CachingTokenAuthentication()
+                    start = time.perf_counter()
+                    for request in requests:
+                        authentication.authenticate(request)
+                    elapsed = time.perf_counter() - start
+                self.stdout.write('%-28s %12.1f %14.3f' % (
+                    label,
+                    elapsed / len(requests) * 1e6,
+                    len(context.captured_queries) / len(requests),
+                ))
+            self.stdout.write('token cache: %s' % token_cache.stats())
+            token_cache.clear()
+
+            transaction.set_rollback(True)
+
+    def seed(self, count):
+        users = User.objects.bulk_create(
+            [User(username='benchmark-token-user-%d' % n, password='!') for n in range(count)],
+        )
+        return [issue_token(user)[0] for user in users]
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import AuthToken
+
+
+class Command(BaseCommand):
+    """
+    Delete expired AuthTokens in small batches.
+
+    Each batch selects up to --batch-size expired ids through the expires
+    index and deletes them by primary key in its own short transaction, so
+    writers (logins issuing tokens) only ever wait for one batch rather
+    than for a single DELETE over the whole table. --sleep pauses between
+    batches to leave room for them under load.
+
+    Usage:
+        python manage.py purge_expired_tokens --batch-size 1000 --sleep 0.05
+    """
+    help = 'Delete expired API tokens in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tokens deleted per transaction.')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to pause between batches.')
+
+    def handle(self, *args, **options):
+        # Tokens expiring while the purge runs are left for the next run
+        now = timezone.now()
+        expired = AuthToken.objects.filter(expires__lte=now).order_by('expires')
+        deleted = 0
+        while True:
+            with transaction.atomic():
+                ids = list(expired.values_list('pk', flat=True)[:options['batch_size']])
+                if not ids:
+                    break
+                deleted += AuthToken.objects.filter(pk__in=ids).delete()[0]
+            if options['verbosity'] > 1:
+                self.stdout.write('deleted %d tokens' % deleted)
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        self.stdout.write('Deleted %d expired tokens.' % deleted)
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:34
+
+import hashlib
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def copy_drf_tokens(apps, schema_editor):
+    """Keep existing rest_framework.authtoken keys working, now with an expiry."""
+    Token = apps.get_model('authtoken', 'Token')
+    AuthToken = apps.get_model('api', 'AuthToken')
+    expires = timezone.now() + timedelta(seconds=getattr(settings, 'AUTH_TOKEN_TTL', 86400))
+    AuthToken.objects.bulk_create(
+        AuthToken(digest=hashlib.sha256(token.key.encode('utf-8')).hexdigest(), user_id=token.user_id,
+                  expires=expires)
+        for token in Token.objects.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+        ('authtoken', '0004_alter_tokenproxy_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('expires', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='auth_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(copy_drf_tokens, migrations.RunPython.noop),
+    ]
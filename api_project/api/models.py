@@ -1,4 +1,8 @@
+import hashlib
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 # Create your models here.
 
@@ -8,3 +12,33 @@ class Book(models.Model):
 
     def __str__(self):
         return self.title
+
+
+class AuthToken(models.Model):
+    """
+    Expiring API token stored as the SHA-256 digest of its key.
+
+    The key itself is only returned to the client when the token is issued
+    (see api.tokens); requests are authenticated by hashing the presented
+    key and looking the digest up through its unique index. Keys are 160
+    random bits, so a fast unsalted hash is enough to make a leaked table
+    useless while keeping the lookup indexable.
+
+    A user may hold several tokens at once (one per login, plus the
+    replacement issued on rotation). The expires index serves both the
+    expiry check and purge_expired_tokens.
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='auth_tokens', on_delete=models.CASCADE)
+    created = models.DateTimeField(auto_now_add=True)
+    expires = models.DateTimeField(db_index=True)
+
+    @staticmethod
+    def hash_key(key):
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def is_expired(self):
+        return self.expires <= timezone.now()
+
+    def __str__(self):
+        return 'Token of %s (expires %s)' % (self.user, self.expires)
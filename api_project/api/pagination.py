@@ -0,0 +1,14 @@
+from rest_framework.pagination import PageNumberPagination
+
+
+class BookPagination(PageNumberPagination):
+    """
+    Opt-in page-number pagination for the book list.
+
+    Lists stay plain arrays unless ?page_size= is given, so existing clients
+    are unaffected; ?page_size=50&page=3 returns {"count", "next", "previous",
+    "results"}. page_size is capped at max_page_size.
+    """
+    page_size = None
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
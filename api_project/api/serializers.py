@@ -1,7 +1,42 @@
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from rest_framework.authtoken.serializers import AuthTokenSerializer
 from .models import Book
+from .tokens import verify_credentials
 
-class BookSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Serializer mixin that keeps only the fields named in the ``fields`` argument.
+
+    BookSerializer(books, many=True, fields=['id', 'title']) renders just id
+    and title; without the argument every declared field is included.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class BookSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Book
         fields = '__all__'
+
+
+class LoginSerializer(AuthTokenSerializer):
+    """
+    AuthTokenSerializer that checks passwords through api.tokens.verify_credentials,
+    so repeat logins within a few seconds skip the password hasher.
+    """
+
+    def validate(self, attrs):
+        user = verify_credentials(self.context.get('request'), attrs['username'], attrs['password'])
+        # Like authenticate(), verify_credentials() returns None for inactive users
+        if not user:
+            msg = _('Unable to log in with provided credentials.')
+            raise serializers.ValidationError(msg, code='authorization')
+
+        attrs['user'] = user
+        return attrs
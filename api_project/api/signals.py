@@ -0,0 +1,26 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import token_cache
+from .models import AuthToken
+
+
+@receiver(post_save, sender=AuthToken)
+@receiver(post_delete, sender=AuthToken)
+def forget_changed_token(sender, instance, using, **kwargs):
+    """Revoked and rotated tokens are looked up again on their next use."""
+    # After the commit, so that a concurrent request cannot cache the old row again
+    transaction.on_commit(partial(token_cache.invalidate, instance.digest), using=using)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def forget_user_tokens(sender, instance, using, **kwargs):
+    """Cached tokens carry the user, so any change (e.g. deactivation) drops them."""
+    shared_digests = ()
+    if token_cache.shared_cache is not None:
+        shared_digests = list(AuthToken.objects.filter(user_id=instance.pk).values_list('digest', flat=True))
+    transaction.on_commit(partial(token_cache.invalidate_user, instance.pk, shared_digests), using=using)
@@ -1,3 +1,370 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from .authentication import CachingTokenAuthentication, token_cache
+from .models import AuthToken, Book
+from .tokens import issue_token, login_cache
+
+
+class CachingTokenAuthenticationTestCase(APITestCase):
+    """
+    Tests for CachingTokenAuthentication and its token cache.
+
+    Covers zero-query hits, invalidation on token deletion and user
+    deactivation, the LRU bound, expiry and the shared cache tier.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User(username='tokenuser')
+        cls.user.set_unusable_password()
+        cls.user.save()
+        cls.key, cls.token = issue_token(cls.user)
+        Book.objects.create(title='The Left Hand of Darkness', author='Ursula K. Le Guin')
+
+    def setUp(self):
+        token_cache.clear()
+        self.factory = APIRequestFactory()
+
+    def authenticate(self, key):
+        request = self.factory.get('/api/books/', HTTP_AUTHORIZATION='Token %s' % key)
+        return CachingTokenAuthentication().authenticate(request)
+
+    def test_cache_hit_runs_no_query(self):
+        """The second authentication with the same token is served from memory"""
+        with self.assertNumQueries(1):
+            self.authenticate(self.key)
+
+        with self.assertNumQueries(0):
+            user, token = self.authenticate(self.key)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(token.pk, self.token.pk)
+        self.assertEqual(token_cache.stats(), {'size': 1, 'hits': 1, 'misses': 1})
+
+    def test_authenticated_request_only_queries_books(self):
+        """With a warm cache an authenticated list request runs just the Book query"""
+        self.client.credentials(HTTP_AUTHORIZATION='Token %s' % self.key)
+        self.client.get('/api/books/')
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/books/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_cached_instances_are_copies(self):
+        """Changing request.user does not alter the cached user"""
+        self.authenticate(self.key)
+        user, _ = self.authenticate(self.key)
+        user.username = 'changed'
+
+        user, _ = self.authenticate(self.key)
+        self.assertEqual(user.username, 'tokenuser')
+
+    def test_deleted_token_is_rejected(self):
+        """Deleting a token invalidates it once the deletion commits"""
+        self.authenticate(self.key)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token %s' % self.key)
+        response = self.client.get('/api/books/')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        """Saving a user with is_active = False drops their cached tokens"""
+        self.authenticate(self.key)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token %s' % self.key)
+        response = self.client.get('/api/books/')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(token_cache.stats()['size'], 0)
+
+    def test_invalidated_on_commit(self):
+        """Cached tokens are only dropped once the write commits"""
+        self.authenticate(self.key)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.is_active = False
+            self.user.save()
+            self.token.delete()
+        self.assertEqual(token_cache.stats()['size'], 1)
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(token_cache.stats()['size'], 0)
+
+    def test_invalid_tokens_are_not_cached(self):
+        """Unknown keys always reach the database and never fill the cache"""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+        for _ in range(2):
+            self.assertEqual(self.client.get('/api/books/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.assertEqual(token_cache.stats()['size'], 0)
+
+    @override_settings(TOKEN_AUTH_CACHE_MAX_ENTRIES=2)
+    def test_lru_is_bounded(self):
+        """The least recently used token is evicted first"""
+        keys = [self.key]
+        for n in range(2):
+            user = User.objects.create(username='lruuser%d' % n)
+            keys.append(issue_token(user)[0])
+
+        self.authenticate(keys[0])
+        self.authenticate(keys[1])
+        self.authenticate(keys[0])
+        self.authenticate(keys[2])
+
+        with self.assertNumQueries(0):
+            self.authenticate(keys[0])
+        with self.assertNumQueries(1):
+            self.authenticate(keys[1])
+
+    def test_entries_expire(self):
+        """Entries older than TOKEN_AUTH_CACHE_TIMEOUT are looked up again"""
+        with mock.patch('api.authentication.time.monotonic', return_value=1000):
+            self.authenticate(self.key)
+
+        with mock.patch('api.authentication.time.monotonic', return_value=1061):
+            with self.assertNumQueries(1):
+                self.authenticate(self.key)
+
+    @override_settings(TOKEN_AUTH_CACHE_TIMEOUT=0)
+    def test_timeout_zero_disables_cache(self):
+        """TOKEN_AUTH_CACHE_TIMEOUT = 0 queries on every request"""
+        self.authenticate(self.key)
+
+        with self.assertNumQueries(1):
+            self.authenticate(self.key)
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'token-auth'}},
+        TOKEN_AUTH_CACHE_ALIAS='default',
+    )
+    def test_shared_tier(self):
+        """Another process (an empty local tier) finds the token in the shared cache"""
+        cache.clear()
+        self.authenticate(self.key)
+        token_cache.clear()
+
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate(self.key)
+        self.assertEqual(user, self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        self.assertIsNone(cache.get(token_cache.shared_key(self.token.digest)))
+
+
+class TokenIssuanceTestCase(APITestCase):
+    """
+    Tests for expiring token issuance, rotation, the login cache and
+    purge_expired_tokens.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='loginuser', password='correct horse battery')
+
+    def setUp(self):
+        token_cache.clear()
+        login_cache.clear()
+        self.token_url = reverse('api_token_auth')
+
+    def login(self, password='correct horse battery'):
+        return self.client.post(self.token_url, {'username': 'loginuser', 'password': password})
+
+    def test_login_issues_hashed_expiring_token(self):
+        """The key is returned once and only its digest is stored"""
+        response = self.login()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        key = response.data['token']
+        token = AuthToken.objects.get(user=self.user)
+        self.assertEqual(token.digest, AuthToken.hash_key(key))
+        self.assertNotIn(key, token.digest)
+        self.assertEqual(token.expires, response.data['expires'])
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token %s' % key)
+        self.assertEqual(self.client.post('/api/books/', {'title': 'Dune', 'author': 'Frank Herbert'}).status_code,
+                         status.HTTP_201_CREATED)
+
+    def test_wrong_password_is_rejected(self):
+        """Bad credentials return 400 and are not cached"""
+        self.assertEqual(self.login('wrong').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(login_cache.local), 0)
+
+    def test_repeat_login_skips_password_hasher(self):
+        """A second login with the same credentials does not call check_password()"""
+        self.login()
+
+        with mock.patch('django.contrib.auth.base_user.AbstractBaseUser.check_password') as check_password:
+            response = self.login()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        check_password.assert_not_called()
+        self.assertEqual(AuthToken.objects.filter(user=self.user).count(), 2)
+
+    def test_login_cache_follows_password_changes(self):
+        """After a password change the old password fails despite the cache"""
+        self.login()
+        self.user.set_password('new password 123')
+        self.user.save()
+
+        self.assertEqual(self.login().status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_login_cache_follows_deactivation(self):
+        """Inactive users cannot log in with cached credentials"""
+        self.login()
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        self.assertEqual(self.login().status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expired_token_is_rejected(self):
+        """Tokens past their expiry fail with 401, cached or not"""
+        key, token = issue_token(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token %s' % key)
+        self.client.get('/api/books/')
+
+        with mock.patch('django.utils.timezone.now', return_value=token.expires + timedelta(seconds=1)):
+            response = self.client.post('/api/books/', {'title': 'Dune', 'author': 'Frank Herbert'})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_TOKEN_ROTATION_GRACE=30)
+    def test_rotation(self):
+        """Rotating returns a new key and shortens the old token to the grace period"""
+        key, token = issue_token(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token %s' % key)
+        self.client.get('/api/books/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('api_token_rotate'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data['token'], key)
+        token.refresh_from_db()
+        self.assertLessEqual(token.expires, timezone.now() + timedelta(seconds=30))
+        self.assertEqual(token_cache.stats()['size'], 0)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token %s' % response.data['token'])
+        self.assertEqual(self.client.post(reverse('api_token_rotate')).status_code, status.HTTP_200_OK)
+
+    def test_rotation_requires_token(self):
+        """Anonymous requests cannot rotate"""
+        response = self.client.post(reverse('api_token_rotate'))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_purge_expired_tokens(self):
+        """The purge command deletes expired tokens in batches and keeps valid ones"""
+        for _ in range(5):
+            issue_token(self.user)
+        AuthToken.objects.update(expires=timezone.now() - timedelta(seconds=1))
+        _, valid = issue_token(self.user)
+        stdout = StringIO()
+
+        call_command('purge_expired_tokens', batch_size=2, verbosity=2, stdout=stdout)
+
+        self.assertEqual(list(AuthToken.objects.all()), [valid])
+        self.assertIn('Deleted 5 expired tokens.', stdout.getvalue())
+        self.assertEqual(stdout.getvalue().count('deleted '), 3)
+
+
+class BookSparseFieldsetTestCase(APITestCase):
+    """
+    Tests for ?fields=, ?compact=true and pagination on /books/.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='fieldsuser')
+        cls.key, _ = issue_token(cls.user)
+        cls.books = [
+            Book.objects.create(title='Dune', author='Frank Herbert'),
+            Book.objects.create(title='Hyperion', author='Dan Simmons'),
+            Book.objects.create(title='Solaris', author='Stanislaw Lem'),
+        ]
+
+    def setUp(self):
+        token_cache.clear()
+        self.books_url = reverse('book-list')
+
+    def test_list_is_unchanged_by_default(self):
+        """Without parameters the list is a plain array of full books"""
+        response = self.client.get(self.books_url)
+
+        self.assertEqual(response.json()[0], {'id': self.books[0].pk, 'title': 'Dune', 'author': 'Frank Herbert'})
+        self.assertEqual(len(response.json()), 3)
+
+    def test_fields_limit_output_and_columns(self):
+        """?fields=id,title renders two keys and selects two columns"""
+        with self.assertNumQueries(1) as context:
+            response = self.client.get(self.books_url, {'fields': 'title,id'})
+
+        self.assertEqual(response.json()[0], {'id': self.books[0].pk, 'title': 'Dune'})
+        self.assertNotIn('"api_book"."author"', context.captured_queries[0]['sql'])
+
+    def test_fields_on_detail(self):
+        """Sparse fieldsets work on single books too"""
+        response = self.client.get(reverse('book-detail', kwargs={'pk': self.books[1].pk}), {'fields': 'author'})
+
+        self.assertEqual(response.json(), {'author': 'Dan Simmons'})
+
+    def test_unknown_field_is_rejected(self):
+        """Invalid field names return 400"""
+        response = self.client.get(self.books_url, {'fields': 'title,isbn'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'fields': ['Unknown field(s): isbn.']})
+
+    def test_fields_do_not_apply_to_writes(self):
+        """Writes validate and return the full book"""
+        self.client.credentials(HTTP_AUTHORIZATION='Token %s' % self.key)
+
+        response = self.client.post('%s?fields=id' % self.books_url, {'title': 'Ubik', 'author': 'Philip K. Dick'})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(set(response.json()), {'id', 'title', 'author'})
+
+    def test_compact_mode(self):
+        """?compact=true returns column names once and rows as arrays"""
+        response = self.client.get(self.books_url, {'compact': 'true', 'fields': 'id,title'})
+
+        self.assertEqual(response.json(), {
+            'fields': ['id', 'title'],
+            'rows': [[book.pk, book.title] for book in self.books],
+        })
+
+    def test_pagination_is_opt_in(self):
+        """?page_size= paginates plain and compact lists"""
+        response = self.client.get(self.books_url, {'page_size': 2, 'page': 2, 'fields': 'title'})
+
+        self.assertEqual(response.json()['count'], 3)
+        self.assertEqual(response.json()['results'], [{'title': 'Solaris'}])
+
+        response = self.client.get(self.books_url, {'page_size': 2, 'compact': '1', 'fields': 'title'})
+        self.assertEqual(response.json()['results'], {'fields': ['title'], 'rows': [['Dune'], ['Hyperion']]})
+        self.assertIsNotNone(response.json()['next'])
+
+    def test_export_honors_fields(self):
+        """The streaming export uses the same sparse fieldset"""
+        response = self.client.get(reverse('book-export'), {'fields': 'title', 'format': 'json'})
+
+        self.assertEqual(b''.join(response.streaming_content),
+                         b'[{"title":"Dune"},{"title":"Hyperion"},{"title":"Solaris"}]')
@@ -0,0 +1,117 @@
+import hashlib
+import hmac
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from .authentication import ExpiringLRU
+from .models import AuthToken
+
+
+class LoginCache:
+    """
+    Per-process memory of recent successful username/password checks.
+
+    Password hashers are deliberately slow (PBKDF2 with hundreds of thousands
+    of iterations), which makes obtain-token the most expensive endpoint
+    during login storms, when the same clients log in again and again.
+
+    Entries are keyed by an HMAC of the username and password under a salt
+    generated at process start, so neither credentials nor reusable digests
+    are kept in memory, and they remember the user's pk and password hash.
+    A repeat login within AUTH_TOKEN_LOGIN_CACHE_TIMEOUT seconds loads the
+    user (one query) and only compares the stored hash with the current one,
+    so a password change, a hash upgrade or a deactivation takes effect at
+    once. Failed attempts are never cached.
+
+    Settings:
+    - AUTH_TOKEN_LOGIN_CACHE_TIMEOUT: seconds an entry lives (default 10);
+      0 disables the cache
+    - AUTH_TOKEN_LOGIN_CACHE_MAX_ENTRIES: size of the LRU (default 10000)
+    """
+
+    def __init__(self):
+        self.salt = secrets.token_bytes(32)
+        self.local = ExpiringLRU()
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'AUTH_TOKEN_LOGIN_CACHE_TIMEOUT', 10)
+
+    @property
+    def max_entries(self):
+        return getattr(settings, 'AUTH_TOKEN_LOGIN_CACHE_MAX_ENTRIES', 10000)
+
+    def credential_digest(self, username, password):
+        message = b'\0'.join([username.encode('utf-8'), password.encode('utf-8')])
+        return hmac.new(self.salt, message, hashlib.sha256).digest()
+
+    def get_user(self, username, password):
+        """Return the active user whose credentials were verified recently, or None."""
+        if not self.timeout:
+            return None
+        entry = self.local.get(self.credential_digest(username, password))
+        if entry is None:
+            return None
+        user_pk, password_hash = entry
+        user = get_user_model()._default_manager.filter(pk=user_pk).first()
+        if user is None or not user.is_active or user.password != password_hash:
+            return None
+        return user
+
+    def add(self, username, password, user):
+        if self.timeout:
+            self.local.set(self.credential_digest(username, password), (user.pk, user.password),
+                           self.timeout, self.max_entries)
+
+    def clear(self):
+        self.local.clear()
+
+
+login_cache = LoginCache()
+
+
+def verify_credentials(request, username, password):
+    """authenticate() that skips the password hasher for recently verified credentials."""
+    user = login_cache.get_user(username, password)
+    if user is None:
+        user = authenticate(request=request, username=username, password=password)
+        if user is not None:
+            login_cache.add(username, password, user)
+    return user
+
+
+def issue_token(user):
+    """
+    Create a token for user and return (key, token).
+
+    Only the digest is stored, so the key cannot be shown again later; a
+    client that loses it logs in again. Tokens live AUTH_TOKEN_TTL seconds.
+    """
+    key = secrets.token_hex(20)
+    token = AuthToken.objects.create(
+        digest=AuthToken.hash_key(key),
+        user=user,
+        expires=timezone.now() + timedelta(seconds=getattr(settings, 'AUTH_TOKEN_TTL', 86400)),
+    )
+    return key, token
+
+
+def rotate_token(token):
+    """
+    Replace token with a new one and return (key, new_token).
+
+    The old token keeps working for AUTH_TOKEN_ROTATION_GRACE seconds, so
+    requests already in flight with it do not fail, then expires.
+    """
+    grace_expires = timezone.now() + timedelta(seconds=getattr(settings, 'AUTH_TOKEN_ROTATION_GRACE', 60))
+    with transaction.atomic():
+        if token.expires > grace_expires:
+            token.expires = grace_expires
+            # Saving the token also drops it from the token cache (api.signals)
+            token.save(update_fields=['expires'])
+        return issue_token(token.user)
@@ -1,15 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import BookViewSet
-from .views import BookList
-from rest_framework.authtoken.views import obtain_auth_token
+from .views import ObtainExpiringAuthToken, RotateAuthToken
 
 router = DefaultRouter()
 router.register(r'books', BookViewSet, basename='book')
 
 urlpatterns = [
+    # GET/POST /books/ and GET/PUT/PATCH/DELETE /books/<pk>/ (names book-list, book-detail)
     path('', include(router.urls)),
-    path('books/', BookList.as_view(), name='book-list'),
-    path('auth/token/', obtain_auth_token, name='api_token_auth'),
+    path('auth/token/', ObtainExpiringAuthToken.as_view(), name='api_token_auth'),
+    path('auth/token/rotate/', RotateAuthToken.as_view(), name='api_token_rotate'),
     
 ]
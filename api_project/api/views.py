@@ -1,15 +1,164 @@
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
 from rest_framework import viewsets
-from .models import Book
-from .serializers import BookSerializer
+from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .models import AuthToken, Book
+from .pagination import BookPagination
+from .renderers import JSONLinesRenderer, iter_json_array, iter_json_lines
+from .serializers import BookSerializer, LoginSerializer
+from .tokens import issue_token, rotate_token
 from rest_framework import permissions
-from rest_framework import generics
 
-class BookViewSet(viewsets.ModelViewSet):
-    queryset = Book.objects.all()
+
+class SparseFieldsetViewMixin:
+    """
+    Lets GET requests choose the fields they need with ?fields=id,title.
+
+    - The serializer only renders the requested fields
+    - The queryset loads only their columns with .only(), so the database,
+      the ORM and the serializer all do work proportional to the request
+    - Unknown names are rejected with 400 Bad Request
+
+    ?compact=true (lists only) goes further and skips model instances and
+    the serializer: rows are read with values_list() and returned as
+    {"fields": [...], "rows": [[...], ...]}, which also avoids repeating
+    every key in every row. Compact rows hold the raw column values.
+
+    Writes always use the full serializer.
+    """
+    fields_query_param = 'fields'
+    compact_query_param = 'compact'
+
+    def get_requested_fields(self):
+        """Return the requested serializer field names in declaration order, or None."""
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = None
+            param = self.request.query_params.get(self.fields_query_param)
+            if param and self.request.method in permissions.SAFE_METHODS:
+                requested = {name.strip() for name in param.split(',') if name.strip()}
+                available = list(self.get_serializer_class()().fields)
+                unknown = requested.difference(available)
+                if unknown:
+                    raise ValidationError({self.fields_query_param: [
+                        'Unknown field(s): %s.' % ', '.join(sorted(unknown)),
+                    ]})
+                self._requested_fields = [name for name in available if name in requested]
+        return self._requested_fields
+
+    def get_field_sources(self, fields):
+        """Map serializer field names to model field names, or None when one is not a plain column."""
+        serializer_fields = self.get_serializer_class()().fields
+        model_fields = {field.name for field in self.queryset.model._meta.concrete_fields}
+        sources = [serializer_fields[name].source for name in fields]
+        return sources if set(sources) <= model_fields else None
+
+    def is_compact(self):
+        value = self.request.query_params.get(self.compact_query_param, '')
+        return value.lower() in ('1', 'true', 'yes')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_requested_fields()
+        sources = self.get_field_sources(fields) if fields else None
+        if sources:
+            queryset = queryset.only(*sources)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        fields = self.get_requested_fields() or list(self.get_serializer_class()().fields)
+        sources = self.get_field_sources(fields)
+        if not self.is_compact() or sources is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = self.filter_queryset(self.get_queryset()).values_list(*sources)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response({'fields': fields, 'rows': page})
+        return Response({'fields': fields, 'rows': list(rows)})
+
+
+class BookViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
+    """
+    The books API, served under /books/ by the router.
+
+    Handles:
+    - GET /books/: Lists books; supports ?fields=, ?compact=true and
+      opt-in pagination with ?page_size= and ?page=
+    - GET /books/<pk>/: Retrieves a book; supports ?fields=
+    - POST, PUT, PATCH, DELETE: Require authentication
+    - GET /books/export/: Streams every book (see export())
+    """
+    queryset = Book.objects.order_by('pk')
     serializer_class = BookSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = BookPagination
+
+    # Rows fetched from the database and written to the client per chunk by export()
+    export_chunk_size = 2000
+
+    @action(detail=False, methods=['get'], renderer_classes=[JSONLinesRenderer, JSONRenderer])
+    def export(self, request):
+        """
+        GET /books/export/ streams every book without building the list in memory.
+
+        ?format=jsonl (default) writes one JSON object per line, ?format=json
+        writes a single JSON array identical to the list response.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        rows = (
+            serializer.to_representation(book)
+            for book in queryset.iterator(chunk_size=self.export_chunk_size)
+        )
+
+        renderer = request.accepted_renderer
+        if renderer.format == JSONLinesRenderer.format:
+            stream = iter_json_lines(rows, self.export_chunk_size)
+        else:
+            stream = iter_json_array(rows, self.export_chunk_size)
+        return StreamingHttpResponse(stream, content_type=renderer.media_type)
+
+
+class ObtainExpiringAuthToken(ObtainAuthToken):
+    """
+    POST /auth/token/ with username and password returns a new expiring token.
+
+    Response: {"token": "<key>", "expires": "<ISO 8601 datetime>"}. Every
+    login issues a fresh token (only its digest is stored, so existing keys
+    cannot be handed out again); purge_expired_tokens removes old ones.
+    """
+    serializer_class = LoginSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        key, token = issue_token(serializer.validated_data['user'])
+        return Response({'token': key, 'expires': token.expires})
+
+
+class RotateAuthToken(APIView):
+    """
+    POST /auth/token/rotate/ replaces the token used to authenticate the request.
+
+    Returns the new token like /auth/token/; the old one expires after
+    AUTH_TOKEN_ROTATION_GRACE seconds.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        if not isinstance(request.auth, AuthToken):
+            raise PermissionDenied('Only token-authenticated requests can rotate their token.')
+        key, token = rotate_token(request.auth)
+        return Response({'token': key, 'expires': token.expires})
 
-class BookList(generics.ListAPIView):
-    queryset = Book.objects.all()
-    serializer_class = BookSerializer
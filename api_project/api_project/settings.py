@@ -128,9 +128,23 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # default settings for DRF
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachingTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
 }
+
+# Cache of verified API tokens (see api.authentication.TokenCache)
+TOKEN_AUTH_CACHE_TIMEOUT = 60
+TOKEN_AUTH_CACHE_MAX_ENTRIES = 10000
+# Alias of a cache shared by all processes, e.g. Redis or Memcached; None keeps the cache per process
+TOKEN_AUTH_CACHE_ALIAS = None
+
+# Expiring API tokens (see api.tokens)
+AUTH_TOKEN_TTL = 24 * 60 * 60
+# Seconds a rotated token keeps working
+AUTH_TOKEN_ROTATION_GRACE = 60
+# Repeat logins within this many seconds skip the password hasher
+AUTH_TOKEN_LOGIN_CACHE_TIMEOUT = 10
+AUTH_TOKEN_LOGIN_CACHE_MAX_ENTRIES = 10000
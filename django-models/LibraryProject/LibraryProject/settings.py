@@ -82,6 +82,20 @@ DATABASES = {
 }
 
 
+# Loads request.user with its UserProfile and role in one query and caches
+# permissions across requests
+AUTHENTICATION_BACKENDS = [
+    'relationship_app.backends.RoleModelBackend',
+    # Sessions created before RoleModelBackend store this path; keep it listed
+    # so they stay valid (they load the role on first use instead)
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Permission sets of users (see relationship_app/permissions.py); a timeout
+# of 0 disables the cache
+PERMISSION_CACHE_ALIAS = 'default'
+PERMISSION_CACHE_TIMEOUT = 300
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+from .models import UserProfile
+from .permissions import permission_cache
+
+
+def get_role(user):
+    """
+    Return the UserProfile role of user, or None for anonymous users.
+
+    Users whose profile was never created have UserProfile.DEFAULT_ROLE.
+
+    Users loaded by RoleModelBackend already carry the role; any other user
+    has it looked up once and remembered on the instance.
+    """
+    if not user.is_authenticated:
+        return None
+    if not hasattr(user, 'role'):
+        profile = getattr(user, 'userprofile', None)
+        user.role = profile.role if profile is not None else UserProfile.DEFAULT_ROLE
+    return user.role
+
+
+class RoleModelBackend(ModelBackend):
+    """
+    ModelBackend that loads the session user together with its UserProfile.
+
+    The profile is joined into the query that fetches request.user, and the
+    role is set as request.user.role, so role checks (see get_role) and
+    {{ user.userprofile.role }} need no further queries. The role is read
+    fresh on every request, so a role change applies from the next request
+    on without any invalidation.
+
+    The permissions checked by has_perm() and permission_required come
+    from relationship_app.permissions.PermissionCache when cached, instead
+    of the two auth_permission queries per request.
+
+    ModelBackend stays listed after this backend in AUTHENTICATION_BACKENDS
+    so that sessions created before it still resolve. Since it would check
+    the same password again, a rejected password ends authentication here.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username, password, **kwargs)
+        if user is None and password is not None and (
+            username is not None or get_user_model().USERNAME_FIELD in kwargs
+        ):
+            raise PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related('userprofile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        if not self.user_can_authenticate(user):
+            return None
+        get_role(user)
+        return user
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if (
+            permission_cache.enabled and obj is None and user_obj.is_active
+            and not user_obj.is_anonymous and not hasattr(user_obj, '_perm_cache')
+        ):
+            key = permission_cache.make_key(user_obj.pk)
+            permissions = permission_cache.get(key)
+            if permissions is None:
+                permissions = super().get_all_permissions(user_obj)
+                permission_cache.set(key, permissions)
+            user_obj._perm_cache = permissions
+        return super().get_all_permissions(user_obj, obj)
@@ -0,0 +1,84 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class PermissionCache:
+    """
+    Cache of the permission sets ModelBackend loads for a user.
+
+    Django only remembers permissions on the user instance, which lives
+    for one request, so every request to a permission_required view loads
+    them again. This cache keeps them across requests and processes under
+    a key built from the user id and two version counters:
+
+    - the user's version: bumped when the user is saved (is_active,
+      is_superuser) or their groups or user_permissions change
+    - the global version: bumped when a group's permissions change, a
+      group or a permission is deleted or a permission is saved, which can
+      affect any number of users
+
+    The receivers in relationship_app.signals do the bumping, once the
+    write commits. Stale sets are never read again and simply expire.
+
+    Settings:
+    - PERMISSION_CACHE_ALIAS: cache alias to use (default 'default')
+    - PERMISSION_CACHE_TIMEOUT: seconds to keep a permission set
+      (default 300); 0 disables the cache
+
+    QuerySet.update() and raw SQL on the auth tables send no signals and
+    do not bump versions.
+    """
+    key_prefix = 'relationship_app:permissions'
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'PERMISSION_CACHE_ALIAS', 'default')]
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'PERMISSION_CACHE_TIMEOUT', 300)
+
+    @property
+    def enabled(self):
+        return bool(self.timeout)
+
+    def version_key(self, user_pk=None):
+        if user_pk is None:
+            return '%s:version' % self.key_prefix
+        return '%s:version:%s' % (self.key_prefix, user_pk)
+
+    def new_version(self):
+        # Start from the clock so that an evicted counter never repeats an old value
+        return time.time_ns()
+
+    def get_versions(self, keys):
+        versions = self.cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                self.cache.add(key, self.new_version(), timeout=None)
+                versions[key] = self.cache.get(key)
+        return [versions[key] for key in keys]
+
+    def bump(self, user_pks=None):
+        """Invalidate the permissions of the users with user_pks, or of every user when None."""
+        keys = [self.version_key()] if user_pks is None else [self.version_key(pk) for pk in user_pks]
+        for key in keys:
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.set(key, self.new_version(), timeout=None)
+
+    def make_key(self, user_pk):
+        versions = self.get_versions([self.version_key(), self.version_key(user_pk)])
+        return '%s:%s:%s:%s' % (self.key_prefix, user_pk, *versions)
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, permissions):
+        self.cache.set(key, permissions, timeout=self.timeout)
+
+
+permission_cache = PermissionCache()
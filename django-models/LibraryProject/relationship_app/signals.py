@@ -0,0 +1,58 @@
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .permissions import permission_cache
+
+
+def bump_permissions(user_pks, using):
+    # Only once the write is committed: bumped earlier, a concurrent request
+    # could still load the old permissions and cache them under the new version
+    if user_pks is not None:
+        user_pks = list(user_pks)
+    transaction.on_commit(partial(permission_cache.bump, user_pks), using=using)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_permissions(sender, instance, created, update_fields, using, **kwargs):
+    # is_active and is_superuser change what the backend returns; the
+    # last_login update at every login changes neither
+    if not created and update_fields != frozenset(['last_login']):
+        bump_permissions([instance.pk], using)
+
+
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+@receiver(post_delete, sender=Group)
+def invalidate_all_permissions(sender, using, **kwargs):
+    """Invalidate every user's permissions; groups reach any number of users."""
+    bump_permissions(None, using)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_permissions(sender, action, using, **kwargs):
+    if action.startswith('post_'):
+        bump_permissions(None, using)
+
+
+def invalidate_member_permissions(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """Invalidate the users whose groups or user_permissions changed."""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump_permissions([instance.pk], using)
+    elif action == 'post_clear':
+        # group.user_set.clear() does not say which users it removed
+        bump_permissions(None, using)
+    else:
+        bump_permissions(pk_set, using)
+
+
+UserModel = get_user_model()
+m2m_changed.connect(invalidate_member_permissions, sender=UserModel.groups.through)
+m2m_changed.connect(invalidate_member_permissions, sender=UserModel.user_permissions.through)
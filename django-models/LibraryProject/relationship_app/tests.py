@@ -1,3 +1,297 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.models import Group, Permission, update_last_login
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .backends import get_role
+from .models import Author, Book, Library, UserProfile
+
+
+class BookQueryTestCase(TestCase):
+    """
+    Query counts of the book list and library detail pages.
+
+    The counts must not grow with the number of books: authors are joined
+    in, and the library detail shows one page of books at a time.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        authors = Author.objects.bulk_create([Author(name='Author %02d' % n) for n in range(10)])
+        cls.books = Book.objects.bulk_create([
+            Book(title='Book %03d' % n, author=authors[n % len(authors)]) for n in range(60)
+        ])
+        cls.library = Library.objects.create(name='Central Library')
+        cls.library.books.set(cls.books)
+
+    def test_book_list_single_query(self):
+        """The book list joins the authors instead of loading them per book"""
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('book_list'))
+
+        self.assertContains(response, '<li>Book 000 by Author 00</li>', html=True)
+        self.assertEqual(len(response.context['books']), 60)
+
+    def test_library_detail_query_count(self):
+        """The library, the book count and one page of books with authors"""
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('library_detail', kwargs={'pk': self.library.pk}))
+
+        self.assertEqual(len(response.context['books']), 50)
+        self.assertContains(response, '<li>Book 049 by Author 09</li>', html=True)
+        self.assertContains(response, 'Page 1 of 2')
+
+    def test_library_detail_last_page(self):
+        """Later pages cost the same three queries"""
+        url = reverse('library_detail', kwargs={'pk': self.library.pk})
+
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {'page': 2})
+
+        self.assertEqual([book.title for book in response.context['books']],
+                         ['Book %03d' % n for n in range(50, 60)])
+
+    def test_library_detail_missing(self):
+        """An unknown library is a 404"""
+        response = self.client.get(reverse('library_detail', kwargs={'pk': self.library.pk + 1}))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_with_books_prefetch(self):
+        """Library.objects.with_books() loads books and authors in two queries"""
+        with self.assertNumQueries(2):
+            library = Library.objects.with_books().get(pk=self.library.pk)
+            names = [book.author.name for book in library.books.all()]
+
+        self.assertEqual(len(names), 60)
+
+
+class RoleCheckTestCase(TestCase):
+    """
+    Role-gated views read request.user.role, loaded with the session user.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('reader', password='secret-pass-1')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_role_loaded_with_user(self):
+        """The session and the user joined with its profile; no query for the role check"""
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('member_view'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user.role, 'Member')
+
+    def test_wrong_role_redirects(self):
+        """A member is sent to the login page by the admin and librarian views"""
+        for name in ['admin_view', 'librarian_view']:
+            with self.subTest(name=name):
+                self.assertEqual(self.client.get(reverse(name)).status_code, 302)
+
+    def test_role_change_applies_next_request(self):
+        """The role is read fresh for every request"""
+        self.client.get(reverse('member_view'))
+
+        UserProfile.objects.for_user(self.user)
+        UserProfile.objects.filter(user=self.user).update(role='Librarian')
+
+        self.assertEqual(self.client.get(reverse('librarian_view')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('member_view')).status_code, 302)
+
+    def test_anonymous(self):
+        """Anonymous users have no role"""
+        self.client.logout()
+
+        self.assertEqual(self.client.get(reverse('member_view')).status_code, 302)
+
+    def test_session_from_model_backend(self):
+        """Sessions logged in through ModelBackend stay valid and get their role"""
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+
+        response = self.client.get(reverse('member_view'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user.role, 'Member')
+
+    def test_wrong_password_checked_once(self):
+        """A rejected password is not checked again by ModelBackend"""
+        UserModel = get_user_model()
+        with mock.patch.object(UserModel, 'check_password', autospec=True,
+                               side_effect=UserModel.check_password) as check_password:
+            self.assertIsNone(authenticate(username='reader', password='wrong'))
+            self.assertIsNotNone(authenticate(username='reader', password='secret-pass-1'))
+
+        self.assertEqual(check_password.call_count, 2)
+
+
+class PermissionCacheTestCase(TestCase):
+    """
+    Permissions of permission_required views are cached across requests
+    until the user's groups, user permissions or group permissions change.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.can_add_book = Permission.objects.get(codename='can_add_book')
+        cls.editors = Group.objects.create(name='Editors')
+        cls.editors.permissions.add(cls.can_add_book)
+        cls.user = get_user_model().objects.create_user('editor', password='secret-pass-1')
+
+    def setUp(self):
+        cache.clear()
+        self.user.groups.add(self.editors)
+        self.client.force_login(self.user)
+
+    def get_add_book(self):
+        return self.client.get(reverse('add_book'))
+
+    def test_warm_cache(self):
+        """A repeat request loads the session and the user but no permissions"""
+        with self.assertNumQueries(4):
+            self.assertEqual(self.get_add_book().status_code, 200)
+
+        with self.assertNumQueries(2):
+            self.assertEqual(self.get_add_book().status_code, 200)
+
+    def test_group_membership_change(self):
+        """Leaving and rejoining a group applies to the next request"""
+        self.get_add_book()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.remove(self.editors)
+        self.assertEqual(self.get_add_book().status_code, 302)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.editors.user_set.add(self.user)
+        self.assertEqual(self.get_add_book().status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.editors.user_set.clear()
+        self.assertEqual(self.get_add_book().status_code, 302)
+
+    def test_group_permission_change(self):
+        """Removing a permission from a group affects its members"""
+        self.get_add_book()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.editors.permissions.remove(self.can_add_book)
+
+        self.assertEqual(self.get_add_book().status_code, 302)
+
+    def test_user_permission_change(self):
+        """Permissions given to the user directly"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.clear()
+        self.assertEqual(self.get_add_book().status_code, 302)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.user_permissions.add(self.can_add_book)
+        self.assertEqual(self.get_add_book().status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.can_add_book.user_set.remove(self.user)
+        self.assertEqual(self.get_add_book().status_code, 302)
+
+    def test_superuser_change(self):
+        """Saving the user picks up is_superuser"""
+        self.user.groups.clear()
+        self.get_add_book()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_superuser = True
+            self.user.save()
+
+        self.assertEqual(self.get_add_book().status_code, 200)
+
+    def test_invalidated_on_commit(self):
+        """Cached permissions are invalidated when the write commits, not before"""
+        self.get_add_book()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.remove(self.editors)
+            # Versions are unchanged until the commit, so the cached permissions are used
+            self.assertEqual(self.get_add_book().status_code, 200)
+
+        self.assertEqual(self.get_add_book().status_code, 302)
+
+    @override_settings(PERMISSION_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        """A timeout of 0 loads the permissions on every request"""
+        self.get_add_book()
+
+        with self.assertNumQueries(4):
+            self.get_add_book()
+
+
+class UserProfileTestCase(TestCase):
+    """
+    Profiles are created on first use or in bulk, and saving a user only
+    writes the profile when it was loaded and changed.
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('reader', password='secret-pass-1')
+
+    def test_signup_creates_no_profile(self):
+        """A new user has no profile row and the default role"""
+        self.assertFalse(UserProfile.objects.filter(user=self.user).exists())
+        self.assertEqual(get_role(self.user), 'Member')
+
+    def test_for_user(self):
+        """for_user() creates the profile once and caches it on the user"""
+        profile = UserProfile.objects.for_user(self.user)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(UserProfile.objects.for_user(self.user), profile)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.user.userprofile, profile)
+
+    def test_login_saves_only_the_user(self):
+        """The last_login update at login writes the user and nothing else"""
+        UserProfile.objects.for_user(self.user)
+        user = get_user_model().objects.get(pk=self.user.pk)
+
+        with self.assertNumQueries(1):
+            update_last_login(None, user)
+        # An unchanged profile is not written again
+        user.userprofile
+        with self.assertNumQueries(1):
+            user.save()
+
+    def test_changed_profile_saved_with_user(self):
+        """A role changed on the loaded profile is written by user.save()"""
+        UserProfile.objects.for_user(self.user)
+        user = get_user_model().objects.select_related('userprofile').get(pk=self.user.pk)
+
+        user.userprofile.role = 'Librarian'
+        with self.assertNumQueries(2):
+            user.save()
+
+        self.assertEqual(UserProfile.objects.get(user=self.user).role, 'Librarian')
+
+    def test_create_users(self):
+        """Users and their profiles are inserted in bulk"""
+        UserModel = get_user_model()
+        users = [UserModel(username='member-%d' % n) for n in range(20)]
+
+        with self.assertNumQueries(2):
+            users = UserProfile.objects.create_users(users, role='Librarian')
+
+        self.assertEqual(UserProfile.objects.filter(user__in=users, role='Librarian').count(), 20)
+
+    def test_create_for_users_skips_existing(self):
+        """Existing profiles are kept as they are"""
+        UserProfile.objects.for_user(self.user)
+        other = get_user_model().objects.create_user('other', password='secret-pass-1')
+
+        UserProfile.objects.create_for_users([self.user, other], role='Admin')
+
+        self.assertEqual(UserProfile.objects.get(user=self.user).role, 'Member')
+        self.assertEqual(UserProfile.objects.get(user=other).role, 'Admin')
@@ -1,32 +1,24 @@
 from django.urls import path
-from .views import list_books, LibraryDetailView
-
-urlpatterns = [
-    path('books/', list_books, name='list_books'),
-    path('library/<int:pk>/', LibraryDetailView.as_view(), name='library_detail'),
-]
-
-views.register
-from django.urls import path
-from .views import register
 from django.contrib.auth.views import LoginView, LogoutView
+from . import views
 
 urlpatterns = [
-    path('books/', ...),  # existing views
-    path('library/<int:pk>/', ...),  # existing views
+    # Book and Library views
+    path('books/', views.book_list, name='book_list'),
+    path('library/<int:pk>/', views.LibraryDetailView.as_view(), name='library_detail'),
 
+    # Authentication views
     path('login/', LoginView.as_view(template_name='relationship_app/login.html'), name='login'),
     path('logout/', LogoutView.as_view(template_name='relationship_app/logout.html'), name='logout'),
-    path('register/', register, name='register'),
-]
+    path('register/', views.register_view, name='register'),
 
-from django.urls import path
-from .views import admin_view, librarian_view, member_view
+    # Role-based views
+    path('admin-area/', views.admin_view, name='admin_view'),
+    path('librarian-area/', views.librarian_view, name='librarian_view'),
+    path('member-area/', views.member_view, name='member_view'),
 
-urlpatterns += [
-    path('admin-area/', admin_view, name='admin_view'),
-    path('librarian-area/', librarian_view, name='librarian_view'),
-    path('member-area/', member_view, name='member_view'),
+    # Permission-based views
+    path('add_book/', views.add_book, name='add_book'),
+    path('edit_book/<int:pk>/', views.edit_book, name='edit_book'),
+    path('delete_book/<int:pk>/', views.delete_book, name='delete_book'),
 ]
-
-["add_book/", "edit_book/", "delete_book"]
@@ -3,25 +3,41 @@
 
 
 # Imports for Django views and models
+from django.core.paginator import Paginator
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import DetailView
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import user_passes_test, permission_required
 from django.contrib import messages
+from .backends import get_role
 from .models import Book, Library, Author, Librarian
 
 # Function-based view for book list
 def book_list(request):
-    books = Book.objects.all()
+    # One query: the authors are joined in for {{ book.author.name }}
+    books = Book.objects.with_author().order_by('title', 'pk')
     return render(request, 'relationship_app/list_books.html', {'books': books})
 
 # Class-based view for library details
 class LibraryDetailView(DetailView):
+    """
+    Shows a library and one page of its books (?page=2), each with its author.
+
+    Three queries for any library size: the library, the number of books
+    and the current page of books joined with their authors.
+    """
     model = Library
     template_name = 'relationship_app/library_detail.html'
     context_object_name = 'library'
-    # No need to override get_context_data unless adding extra context; template uses 'library' and 'library.books.all'
+    paginate_by = 50
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        books = self.object.books.with_author().order_by('title', 'pk')
+        page = Paginator(books, self.paginate_by).get_page(self.request.GET.get('page'))
+        context.update(books=page.object_list, page_obj=page, is_paginated=page.has_other_pages())
+        return context
 
 # Authentication views
 def login_view(request):
@@ -50,15 +66,15 @@ def register_view(request):
         form = UserCreationForm()
     return render(request, 'relationship_app/register.html', {'form': form})
 
-# Role-based views
+# Role-based views: request.user.role comes with the session user (see RoleModelBackend)
 def is_admin(user):
-    return user.is_authenticated and hasattr(user, 'userprofile') and user.userprofile.role == 'Admin'
+    return get_role(user) == 'Admin'
 
 def is_librarian(user):
-    return user.is_authenticated and hasattr(user, 'userprofile') and user.userprofile.role == 'Librarian'
+    return get_role(user) == 'Librarian'
 
 def is_member(user):
-    return user.is_authenticated and hasattr(user, 'userprofile') and user.userprofile.role == 'Member'
+    return get_role(user) == 'Member'
 
 @user_passes_test(is_admin)
 def admin_view(request):